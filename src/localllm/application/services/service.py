@@ -1,13 +1,16 @@
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
 from pathlib import Path
 
 import structlog
 
 from localllm.application.use_cases.interfaces import (
     EnrichAlbumUseCase,
+    FetchAlbumUseCase,
     FileStorageAlbumUseCase,
     IndexAlbumUseCase,
     LoadAlbumUseCase,
     StoreAlbumUseCase,
+    SyncAlbumUseCase,
 )
 from localllm.domain.multimedia import Album
 
@@ -29,12 +32,16 @@ class MultimediaIngesterService:
         store_albums_use_case: StoreAlbumUseCase,
         index_albums_use_case: IndexAlbumUseCase,
         file_storage_album_use_case: FileStorageAlbumUseCase = None,
+        fetch_albums_use_case: FetchAlbumUseCase = None,
+        sync_albums_use_case: SyncAlbumUseCase = None,
     ):
         self._load_albums_use_case = load_albums_use_case
         self._enrich_album_use_case = enrich_album_use_case
         self._store_albums_use_case = store_albums_use_case
         self._index_albums_use_case = index_albums_use_case
         self._file_storage_album_use_case = file_storage_album_use_case
+        self._fetch_albums_use_case = fetch_albums_use_case
+        self._sync_albums_use_case = sync_albums_use_case
 
     def load_albums(self, album_file_path: Path) -> list[Album]:
         """
@@ -46,15 +53,52 @@ class MultimediaIngesterService:
         logger.info(f"Loading albums from {album_file_path}")
         return self._load_albums_use_case.load_albums(file_path=album_file_path)
 
-    async def enrich_albums(self, albums: list[Album]) -> list[Album]:
+    def iter_albums(self, album_file_path: Path) -> Iterator[Album]:
+        """
+        Load albums from a file one at a time.
+
+        :param album_file_path: Path to the file containing the albums.
+        :return: iterator over the Album loaded.
+        """
+        logger.info(f"Streaming albums from {album_file_path}")
+        return self._load_albums_use_case.iter_albums(file_path=album_file_path)
+
+    async def fetch_albums(self) -> list[Album]:
+        """
+        Fetch albums from the remote music library.
+
+        :return: list of Album fetched.
+        """
+        logger.info("Fetching albums from music library")
+        return await self._fetch_albums_use_case.fetch_albums()
+
+    def iter_library_albums(self) -> AsyncIterator[Album]:
+        """
+        Fetch albums from the remote music library as they are received.
+
+        :return: asynchronous iterator over the Album fetched.
+        """
+        logger.info("Streaming albums from music library")
+        return self._fetch_albums_use_case.iter_albums()
+
+    async def enrich_albums(self, albums: list[Album], resume: bool = False) -> list[Album]:
         """
         Enrich albums with metadata from external sources.
 
         :param albums: Albums to enrich.
-        :return: Enriched albums.
+        :param resume: Skip the albums already enriched by an interrupted run.
+        :return: Albums enriched during this run.
         """
         logger.info("Enriching albums")
-        return await self._enrich_album_use_case.enrich_albums(albums)
+        return await self._enrich_album_use_case.enrich_albums(albums, resume=resume)
+
+    def iter_enriched_albums(self) -> Iterator[Album]:
+        """
+        Read the albums enriched so far, including those of interrupted runs.
+
+        :return: iterator over the enriched Album.
+        """
+        return self._enrich_album_use_case.iter_enriched()
 
     async def store_albums(self, albums: list[Album]) -> list[Album]:
         """
@@ -66,18 +110,29 @@ class MultimediaIngesterService:
         logger.info("Storing albums to repository")
         return self._store_albums_use_case.store_albums(albums)
 
-    def save_albums(self, albums: list[Album], path: Path) -> None:
+    def save_albums(self, albums: Iterable[Album], path: Path) -> None:
         """
         Save albums to a file.
 
-        :param albums: Albums to save.
+        :param albums: Albums to save, either a list or a stream.
         :param path: Path to the file to save.
         :return: None.
         """
         logger.info(f"Saving albums to {path}")
         self._file_storage_album_use_case.persist(albums, path)
 
-    def index_albums(self, albums: list[Album]) -> list[Album]:
+    async def sync_albums(self, albums: Iterable[Album] | AsyncIterable[Album], enrich: bool = True) -> list:
+        """
+        Load, enrich, store and index albums in a single streaming pass.
+
+        :param albums: Albums to synchronize, either a list or a stream.
+        :param enrich: Enrich the albums with metadata from external sources before storing them.
+        :return: The metrics of each stage of the pipeline.
+        """
+        logger.info("Synchronizing albums")
+        return await self._sync_albums_use_case.sync_albums(albums, enrich=enrich)
+
+    def index_albums(self, albums: Iterable[Album]) -> list[Album]:
         logger.info("Indexing albums")
         return self._index_albums_use_case.index_albums(albums)
 
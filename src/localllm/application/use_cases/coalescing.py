@@ -0,0 +1,60 @@
+import asyncio
+import unicodedata
+from collections.abc import Awaitable, Callable, Hashable
+from functools import partial
+from typing import Any
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes an artist name or an album title for comparison.
+
+    :param name: the name to normalize.
+    :return: the name, casefolded and with collapsed whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+class SingleFlight:
+    """
+    Merges concurrent calls sharing the same key into a single call.
+
+    Callers arriving while a call for their key is running wait for its result instead of
+    starting a new one. With ``memoize``, results are also kept for later callers, while failed
+    calls are forgotten so that they can be attempted again.
+
+    The call runs in its own task, shielded from its callers: a caller being cancelled stops
+    waiting for the result without cancelling the call the other callers are waiting for.
+    """
+
+    def __init__(self, memoize: bool = False):
+        """
+        Initializes the single flight group.
+
+        :param memoize: keep the result of successful calls for the lifetime of the group.
+        """
+        self.memoize = memoize
+        self.calls = 0
+        self.shared = 0
+        self._flights: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Calls a coroutine function, unless a call with the same key is running or memoized.
+
+        :param key: the key identifying identical calls.
+        :param func: the coroutine function to call.
+        :return: the result of the call.
+        """
+        if (flight := self._flights.get(key)) is not None:
+            self.shared += 1
+        else:
+            self.calls += 1
+            flight = self._flights[key] = asyncio.ensure_future(func())
+            flight.add_done_callback(partial(self._land, key))
+        return await asyncio.shield(flight)
+
+    def _land(self, key: Hashable, flight: asyncio.Task) -> None:
+        # Failed calls are forgotten, and so is their exception when no caller is left waiting for it
+        if flight.cancelled() or flight.exception() is not None or not self.memoize:
+            del self._flights[key]
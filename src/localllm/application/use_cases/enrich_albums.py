@@ -1,45 +1,458 @@
 import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass, field
 
 import structlog
 
+from localllm.application.use_cases.coalescing import SingleFlight, normalize_name
 from localllm.application.use_cases.interfaces import EnrichAlbumUseCase
-from localllm.domain.multimedia import Album
-from localllm.domain.ports.enrichers import AlbumEnricher
+from localllm.application.use_cases.merging import AlbumMerger, ProviderResult
+from localllm.domain.multimedia import Album, Artist
+from localllm.domain.ports.enrichers import (
+    AlbumEnricher,
+    ArtistEnricher,
+    ConnectionCounter,
+)
+from localllm.domain.ports.persistence import AlbumCheckpoint
 
 logger = structlog.getLogger(__name__)
 
+DEFAULT_WORKERS = 32
+DEFAULT_QUEUE_SIZE = 64
+_END_OF_ALBUMS = None
+
+
+@dataclass
+class EnrichmentStats:
+    """
+    Provider lookups of an enrichment run.
+
+    Attributes:
+    - album_lookups: SingleFlight, album lookups, identical lookups running at the same time are merged
+    - artist_lookups: SingleFlight, artist lookups, memoized for the whole run
+    - late: int, enricher lookups still running when the deadline of their album expired
+    - backfilled: int, late lookups whose result was patched into their album
+    - http_requests: int, HTTP requests sent to the sources by the enrichers
+    - handshakes: int, connections opened to send them.
+    """
+
+    album_lookups: SingleFlight = field(default_factory=SingleFlight)
+    artist_lookups: SingleFlight = field(default_factory=lambda: SingleFlight(memoize=True))
+    late: int = 0
+    backfilled: int = 0
+    http_requests: int = 0
+    handshakes: int = 0
+
+    @property
+    def requested(self) -> int:
+        """Number of album lookups needed by the albums, one per album and enricher."""
+        return self.album_lookups.calls + self.album_lookups.shared
+
+    @property
+    def issued(self) -> int:
+        """Number of lookups sent to the enrichers, artist lookups included."""
+        return self.album_lookups.calls + self.artist_lookups.calls
+
+    @property
+    def saved(self) -> int:
+        """Number of album lookups answered by another lookup of the run."""
+        return self.album_lookups.shared
+
+
+@dataclass
+class ProviderSlots:
+    """
+    Provider requests of an enrichment run.
+
+    Attributes:
+    - limits: the semaphores limiting the concurrent requests to each enricher, by enricher name
+    - held: the lookups holding a slot of their enricher, by lookup key, so that their deadline
+      only counts the time spent by the enricher
+    - late: int, late lookups still running.
+    """
+
+    limits: dict[str, asyncio.Semaphore]
+    held: dict[tuple, asyncio.Event] = field(default_factory=dict)
+    late: int = 0
+
+    def release_late(self, _lookup: asyncio.Future) -> None:
+        """Counts a late lookup out once it is done."""
+        self.late -= 1
+
+
+@dataclass
+class LateLookups:
+    """
+    Lookups of an album still running when its deadline expired.
+
+    Attributes:
+    - album: Album, the album before being enriched
+    - results: list of ProviderResult, the results of the lookups that answered in time
+    - lookups: the lookups still running, with the name of their enricher.
+    """
+
+    album: Album
+    results: list[ProviderResult]
+    lookups: dict[asyncio.Future, str]
+
 
 class EnrichAlbums(EnrichAlbumUseCase):
-    def __init__(self, enrichers: list[AlbumEnricher]):
+    def __init__(
+        self,
+        enrichers: list[AlbumEnricher],
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        provider_limits: dict[str, int] | None = None,
+        checkpoint: AlbumCheckpoint | None = None,
+        deadline: float | None = None,
+        merger: AlbumMerger | None = None,
+        artist_lookups: bool = False,
+        connections: ConnectionCounter | None = None,
+    ):
+        """
+        Initializes the enrichment scheduler.
+
+        :param enrichers: the enrichers queried for each album.
+        :param workers: the number of albums enriched at the same time.
+        :param queue_size: the number of albums waiting to be enriched or to be handed back in order.
+        :param provider_limits: the maximum number of concurrent requests per enricher name. Enrichers
+            without a limit can be queried by every worker at the same time.
+        :param checkpoint: the checkpoint recording every enriched album as soon as it is ready.
+        :param deadline: the time in seconds an album waits for its enrichers, None to wait for all of
+            them.
+        :param merger: the merger of the metadata found by the enrichers, with the default merge
+            policies if not given.
+        :param artist_lookups: also look up the metadata of each artist from the enrichers providing
+            it, one more lookup per artist and enricher.
+        :param connections: the transport shared by the enrichers, whose HTTP requests and handshakes
+            are counted in the stats of each run.
+        """
         self.enrichers = enrichers
+        self.workers = workers
+        self.queue_size = queue_size
+        self.provider_limits = provider_limits or {}
+        self.checkpoint = checkpoint
+        self.deadline = deadline
+        self.merger = merger or AlbumMerger()
+        self.artist_lookups = artist_lookups
+        self.connections = connections
+        self.stats = EnrichmentStats()
 
-    async def enrich_albums(self, albums: list[Album]) -> list[Album]:
+    async def enrich_albums(self, albums: list[Album], resume: bool = False) -> list[Album]:
         """
         Enrich albums with additional information from an external source.
 
         :param albums: list of Album to enrich.
-        :return: list of Album enriched with new metadata from external sources.
-        """
-
-        async def enrich_album(album: Album) -> Album:
-            logger.info(f"Enriching album: {album.title} by {album.artist}")
-            metadata_tasks = [enricher.get_album_metadata(album.artist, album.title) for enricher in self.enrichers]
-            results = await asyncio.gather(*metadata_tasks)
-
-            combined_metadata = album.model_dump()
-            for metadata in results:
-                if metadata:
-                    for key, value in metadata.dict().items():
-                        if value is not None and key != "album_id":
-                            if isinstance(value, list):
-                                combined_metadata[key] = list(set(combined_metadata.get(key, [])) | set(value))
-                            elif isinstance(value, dict):
-                                combined_metadata[key] = {**combined_metadata.get(key, {}), **value}
-                            else:
-                                combined_metadata[key] = value
-
-            return Album(**combined_metadata)
-
-        tasks = [enrich_album(album) for album in albums]
-        enriched_albums = await asyncio.gather(*tasks, return_exceptions=True)
-        return [album for album in enriched_albums if isinstance(album, Album)]
+        :param resume: skip the albums already recorded in the checkpoint instead of starting over.
+        :return: list of Album enriched with new metadata from external sources, patched with the
+            results that missed the deadline.
+        """
+        enriched_albums = {}
+        async for album in self.iter_enrich(albums, resume=resume):
+            enriched_albums[album.album_id] = album
+        return list(enriched_albums.values())
+
+    def iter_enriched(self) -> Iterator[Album]:
+        """
+        Read the albums recorded in the checkpoint one at a time.
+
+        :return: iterator over the enriched Album, in the order they were enriched.
+        """
+        if not self.checkpoint:
+            return iter(())
+        return self.checkpoint.iter_albums()
+
+    async def iter_enrich(
+        self, albums: Iterable[Album] | AsyncIterable[Album], resume: bool = False, record: bool = True
+    ) -> AsyncIterator[Album]:
+        """
+        Enrich albums as they are read and hand them back in their original order.
+
+        Albums are dispatched to a fixed number of workers through a bounded queue. At most
+        ``queue_size`` albums are read ahead of the consumer, so a slow consumer or a slow album
+        holds back the reading of new albums instead of letting work pile up. Albums that could
+        not be enriched are logged and skipped.
+
+        When a checkpoint is configured, each enriched album is appended to it before being handed
+        back. A new run starts from an empty checkpoint, while a resumed run skips the albums it
+        already holds. A run that does not record leaves the checkpoint untouched.
+
+        Identical album lookups running at the same time, with titles and artists differing only by
+        case or spacing, are sent once to the enrichers. Other editions of an album keep their own
+        lookups, so they never take the identifiers and tracklist of another edition. With artist
+        lookups, artist metadata is looked up once per run and shared by all the albums of the artist.
+        The lookups issued and the album lookups saved are counted in ``stats``, with the HTTP
+        requests and handshakes of the run when the transport of the enrichers is given.
+
+        An enricher failing a lookup, or refusing it because it is unavailable, does not fail the
+        album: the album is enriched from the other enrichers and the skipped enricher is recorded
+        in its ``pending_sources``. A resumed run queries the pending enrichers again for these albums.
+
+        With a deadline, an album is handed back once the deadline expires with the results of the
+        enrichers that answered in time, so a slow enricher does not hold it back. The enrichers
+        still running are recorded in its ``pending_sources``. Each late result is handed back
+        afterwards as a new version of the album, with the same ``album_id``, that supersedes the
+        previous one. The deadline of a lookup starts once the enricher has a free slot for it, so
+        an album waiting for a busy enricher is not late. At most ``queue_size`` late lookups run at
+        the same time, beyond that albums wait for all their enrichers.
+
+        :param albums: Album to enrich, either a list or a stream.
+        :param resume: skip the albums already recorded in the checkpoint instead of starting over.
+        :param record: record the enriched albums in the checkpoint.
+        :return: asynchronous iterator over the enriched Album.
+        """
+        checkpoint = self.checkpoint if record else None
+        done = set()
+        backfill = {}
+        if checkpoint and resume:
+            for enriched_album in checkpoint.iter_albums():
+                done.add(enriched_album.album_id)
+                if enriched_album.pending_sources:
+                    backfill[enriched_album.album_id] = enriched_album
+            logger.info(
+                f"Resuming enrichment, {len(done)} albums already enriched, {len(backfill)} of them to backfill"
+            )
+        elif checkpoint:
+            checkpoint.reset()
+
+        self.stats = stats = EnrichmentStats()
+        if self.connections:
+            requests_before, handshakes_before = self.connections.requests, self.connections.handshakes
+        slots = ProviderSlots(
+            {
+                enricher.name: asyncio.Semaphore(self.provider_limits.get(enricher.name, self.workers))
+                for enricher in self.enrichers
+            }
+        )
+        work: asyncio.Queue[tuple[Album, set[str] | None, asyncio.Future] | None] = asyncio.Queue(maxsize=self.workers)
+        pending: asyncio.Queue[asyncio.Future | None] = asyncio.Queue(maxsize=self.queue_size)
+        patches: asyncio.Queue[Album | None] = asyncio.Queue()
+        backfills: set[asyncio.Task] = set()
+        expected_patches = 0
+
+        async def produce() -> None:
+            loop = asyncio.get_running_loop()
+            try:
+                async for album in as_async_iterator(albums):
+                    sources = None
+                    if album.album_id in backfill:
+                        album = backfill.pop(album.album_id)
+                        sources = set(album.pending_sources)
+                    elif album.album_id in done:
+                        continue
+                    result = loop.create_future()
+                    await pending.put(result)
+                    await work.put((album, sources, result))
+            except Exception as e:
+                failure = loop.create_future()
+                failure.set_exception(e)
+                await pending.put(failure)
+            await pending.put(_END_OF_ALBUMS)
+            for _ in range(self.workers):
+                await work.put(_END_OF_ALBUMS)
+
+        async def work_on_albums() -> None:
+            while (item := await work.get()) is not _END_OF_ALBUMS:
+                album, sources, result = item
+                try:
+                    result.set_result(await self._enrich_album(album, slots, stats, sources))
+                except Exception as e:
+                    logger.error(f"Unable to enrich album {album.title} by {album.artist}: {e}")
+                    result.set_result(None)
+
+        def record(enriched_album: Album) -> Album:
+            if checkpoint:
+                checkpoint.append(enriched_album)
+            return enriched_album
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(work_on_albums()) for _ in range(self.workers)]
+        try:
+            while (result := await pending.get()) is not _END_OF_ALBUMS:
+                outcome = await result
+                while not patches.empty():
+                    expected_patches -= 1
+                    if patched_album := patches.get_nowait():
+                        yield record(patched_album)
+                if outcome:
+                    enriched_album, late = outcome
+                    yield record(enriched_album)
+                    if late:
+                        # Late results are only patched once the album itself has been handed back
+                        task = asyncio.create_task(self._backfill(enriched_album, late, stats, patches))
+                        backfills.add(task)
+                        task.add_done_callback(backfills.discard)
+                        expected_patches += len(late.lookups)
+            while expected_patches:
+                expected_patches -= 1
+                if patched_album := await patches.get():
+                    yield record(patched_album)
+        finally:
+            for task in tasks + list(backfills):
+                task.cancel()
+            await asyncio.gather(*tasks, *backfills, return_exceptions=True)
+            if checkpoint:
+                checkpoint.close()
+            logger.info(f"{stats.issued} provider lookups issued, {stats.saved} saved out of {stats.requested}")
+            if self.connections:
+                stats.http_requests = self.connections.requests - requests_before
+                stats.handshakes = self.connections.handshakes - handshakes_before
+                logger.info(f"{stats.http_requests} HTTP requests sent over {stats.handshakes} new connections")
+            if stats.late:
+                logger.info(f"{stats.late} provider lookups missed the deadline, {stats.backfilled} backfilled")
+
+    async def _enrich_album(
+        self,
+        album: Album,
+        slots: ProviderSlots,
+        stats: EnrichmentStats,
+        sources: set[str] | None = None,
+    ) -> tuple[Album, LateLookups | None]:
+        """
+        Enriches an album from every enricher, or from the given sources only.
+
+        :return: the enriched album, and the lookups still running when the deadline expired if any.
+        """
+        logger.info(f"Enriching album: {album.title} by {album.artist}")
+        enrichers = [enricher for enricher in self.enrichers if sources is None or enricher.name in sources]
+
+        def album_key(enricher: AlbumEnricher) -> tuple:
+            return (
+                enricher.name,
+                normalize_name(album.artist),
+                normalize_name(album.title),
+                album.external_ids.get(enricher.name),
+            )
+
+        async def get_album_metadata(enricher: AlbumEnricher) -> Album | None:
+            key = album_key(enricher)
+            async with slots.limits[enricher.name]:
+                slots.held.setdefault(key, asyncio.Event()).set()
+                try:
+                    return await enricher.get_album_metadata(album.artist, album.title, external_ids=album.external_ids)
+                finally:
+                    slots.held.pop(key, None)
+
+        async def get_artist_metadata(enricher: ArtistEnricher) -> Artist | None:
+            async with slots.limits[enricher.name]:
+                try:
+                    artist = await enricher.get_artist_metadata(album.artist)
+                except Exception as e:
+                    logger.warning(f"Unable to retrieve artist {album.artist} on {enricher.name}: {e}")
+                    return None
+            # Another artist found by a fuzzy search would bring its own genres and styles
+            if artist and normalize_name(artist.name) != normalize_name(album.artist):
+                logger.warning(f"Ignoring artist {artist.name} found on {enricher.name} for {album.artist}")
+                return None
+            return artist
+
+        async def lookup(enricher: AlbumEnricher) -> tuple[Album | None, Artist | None]:
+            album_lookup = stats.album_lookups.do(album_key(enricher), lambda: get_album_metadata(enricher))
+            if not self.artist_lookups or not isinstance(enricher, ArtistEnricher):
+                return await album_lookup, None
+            artist_key = (enricher.name, normalize_name(album.artist))
+            artist_lookup = stats.artist_lookups.do(artist_key, lambda: get_artist_metadata(enricher))
+            return tuple(await asyncio.gather(album_lookup, artist_lookup))
+
+        async def wait_for_deadline(task: asyncio.Future, enricher: AlbumEnricher) -> None:
+            held = asyncio.ensure_future(slots.held.setdefault(album_key(enricher), asyncio.Event()).wait())
+            try:
+                await asyncio.wait({task, held}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                held.cancel()
+            await asyncio.wait({task}, timeout=self.deadline)
+
+        lookups = {asyncio.ensure_future(lookup(enricher)): enricher for enricher in enrichers}
+        if self.deadline is None:
+            await asyncio.gather(*lookups, return_exceptions=True)
+        else:
+            await asyncio.gather(*(wait_for_deadline(task, enricher) for task, enricher in lookups.items()))
+        late = {task for task in lookups if not task.done()}
+        if late and slots.late + len(late) > self.queue_size:
+            logger.info(f"Too many late lookups, waiting for every enricher of {album.title} by {album.artist}")
+            await asyncio.wait(late)
+            late = set()
+        slots.late += len(late)
+        for task in late:
+            task.add_done_callback(slots.release_late)
+        lookups = {task: enricher.name for task, enricher in lookups.items()}
+
+        results = []
+        pending_sources = []
+        # Results are merged in the order of the enrichers, whatever the order they arrived in
+        for task, source in lookups.items():
+            if task in late:
+                logger.info(f"{source} missed the deadline for {album.title} by {album.artist}")
+                pending_sources.append(source)
+            elif error := task.exception():
+                logger.warning(f"Skipping {source} for {album.title} by {album.artist}: {error}")
+                pending_sources.append(source)
+            else:
+                results.append(ProviderResult(source, *task.result()))
+        stats.late += len(late)
+
+        enriched_album = self.merger.merge(album, results, pending_sources=sorted(pending_sources))
+        if not late:
+            return enriched_album, None
+        return enriched_album, LateLookups(album, results, {task: lookups[task] for task in late})
+
+    async def _backfill(
+        self,
+        album: Album,
+        late: LateLookups,
+        stats: EnrichmentStats,
+        patches: asyncio.Queue[Album | None],
+    ) -> None:
+        """
+        Patches an album with the results of its lookups that missed the deadline, as they come.
+
+        Each lookup puts a patched version of the album in the patches queue, or None when it
+        failed, in which case its enricher stays in the pending sources of the album. Patched
+        albums are merged again from all the results received so far, in the order of the
+        enrichers, so they are the same as if every enricher had answered in time.
+        """
+        order = {enricher.name: position for position, enricher in enumerate(self.enrichers)}
+        results = list(late.results)
+        pending_sources = list(album.pending_sources)
+        remaining = set(late.lookups)
+        unpatched = len(remaining)
+        try:
+            while remaining:
+                finished, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    source = late.lookups[task]
+                    unpatched -= 1
+                    patched_album = None
+                    try:
+                        if error := "cancelled" if task.cancelled() else task.exception():
+                            logger.warning(f"Unable to backfill {album.title} by {album.artist} from {source}: {error}")
+                        else:
+                            results.append(ProviderResult(source, *task.result()))
+                            results.sort(key=lambda result: order[result.source])
+                            pending_sources.remove(source)
+                            album = self.merger.merge(late.album, results, pending_sources=list(pending_sources))
+                            stats.backfilled += 1
+                            patched_album = album
+                    finally:
+                        patches.put_nowait(patched_album)
+        finally:
+            for task in remaining:
+                task.cancel()
+            # Every lookup releases its patch, so that the albums are not awaited forever
+            for _ in range(unpatched):
+                patches.put_nowait(None)
+
+
+async def as_async_iterator(albums: Iterable[Album] | AsyncIterable[Album]) -> AsyncIterator[Album]:
+    """
+    Iterates asynchronously over albums coming from a list, a stream or an asynchronous stream.
+
+    :param albums: Album to iterate over.
+    :return: asynchronous iterator over the Album.
+    """
+    if isinstance(albums, AsyncIterable):
+        async for album in albums:
+            yield album
+    else:
+        for album in albums:
+            yield album
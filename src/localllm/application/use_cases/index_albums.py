@@ -1,3 +1,5 @@
+from collections.abc import Iterable
+
 import structlog
 from langchain_core.embeddings import Embeddings
 from qdrant_client.models import Distance
@@ -28,14 +30,16 @@ class QdrantIndexAlbums(IndexAlbumUseCase):
         )
         self.repository.initialize()
 
-    def index_albums(self, albums: list[Album]) -> list[Album]:
-        for album in albums:
-            logger.info(f"Indexing album to vector store - {album.album_id} / {album.title} by {album.artist}")
-            entity_id, album = self.repository.index_album(album)
-            logger.info(f"Album with album_id {album.album_id} stored into repository with id {entity_id}")
-
+    def index_albums(self, albums: Iterable[Album]) -> list[Album]:
+        indexed_albums = [self.index_album(album) for album in albums]
         logger.info("All albums indexed in repository")
-        return albums
+        return indexed_albums
+
+    def index_album(self, album: Album) -> Album:
+        logger.info(f"Indexing album to vector store - {album.album_id} / {album.title} by {album.artist}")
+        entity_id, album = self.repository.index_album(album)
+        logger.info(f"Album with album_id {album.album_id} stored into repository with id {entity_id}")
+        return album
 
     def search_albums(self, query: str, top_k: int = 5) -> list[tuple[Album, float]]:
         logger.info(f"Searching for albums with query {query}")
@@ -1,3 +1,4 @@
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
 from pathlib import Path
 from typing import Protocol
 
@@ -14,6 +15,33 @@ class LoadAlbumUseCase(Protocol):
         """
         raise NotImplementedError
 
+    def iter_albums(self, file_path: Path) -> Iterator[Album]:
+        """
+        Load albums from a file one at a time.
+
+        :param file_path: the path to the file to load.
+        :return: iterator over the Album loaded from the file.
+        """
+        raise NotImplementedError
+
+
+class FetchAlbumUseCase(Protocol):
+    async def fetch_albums(self) -> list[Album]:
+        """
+        Fetch albums from a remote music library.
+
+        :return: list of Album fetched from the library.
+        """
+        raise NotImplementedError
+
+    def iter_albums(self) -> AsyncIterator[Album]:
+        """
+        Fetch albums from a remote music library as they are received.
+
+        :return: asynchronous iterator over the Album fetched from the library.
+        """
+        raise NotImplementedError
+
 
 class StoreAlbumUseCase(Protocol):
     def store_albums(self, albums: list[Album]) -> list[Album]:
@@ -25,13 +53,31 @@ class StoreAlbumUseCase(Protocol):
         """
         raise NotImplementedError
 
+    def store_album(self, album: Album) -> Album:
+        """
+        Store a single album to a repository.
+
+        :param album: the Album to save.
+        :return: the Album stored.
+        """
+        raise NotImplementedError
+
+    def update_album(self, album: Album) -> Album | None:
+        """
+        Update an album already stored in a repository.
+
+        :param album: the new version of the Album, identified by its album_id.
+        :return: the Album updated, or None if it was not stored.
+        """
+        raise NotImplementedError
+
 
 class FileStorageAlbumUseCase(Protocol):
-    def persist(self, albums: list[Album], path: Path) -> None:
+    def persist(self, albums: Iterable[Album], path: Path) -> None:
         """
         Store albums to a file.
 
-        :param albums: list of Album to save.
+        :param albums: Album to save, either a list or a stream.
         :param path: the path to the file to save.
         :return: None.
         """
@@ -39,21 +85,52 @@ class FileStorageAlbumUseCase(Protocol):
 
 
 class EnrichAlbumUseCase(Protocol):
-    async def enrich_albums(self, albums: list[Album]):
+    async def enrich_albums(self, albums: list[Album], resume: bool = False):
         """
         Enrich albums with additional information from an external source.
 
         :param albums: list of Album to enrich.
+        :param resume: skip the albums already enriched by an interrupted run.
+        """
+        raise NotImplementedError
+
+    def iter_enrich(
+        self, albums: Iterable[Album] | AsyncIterable[Album], resume: bool = False, record: bool = True
+    ) -> AsyncIterator[Album]:
+        """
+        Enrich albums as they are read, keeping their order.
+
+        :param albums: Album to enrich, either a list or a stream.
+        :param resume: skip the albums already enriched by an interrupted run.
+        :param record: record the enriched albums so that an interrupted run can be resumed.
+        :return: asynchronous iterator over the enriched Album.
+        """
+        raise NotImplementedError
+
+    def iter_enriched(self) -> Iterator[Album]:
+        """
+        Read the albums enriched so far one at a time.
+
+        :return: iterator over the enriched Album.
         """
         raise NotImplementedError
 
 
 class IndexAlbumUseCase(Protocol):
-    def index_albums(self, albums: list[Album]):
+    def index_albums(self, albums: Iterable[Album]):
         """
         Index albums in a vector database.
 
-        :param albums: list of Album to index.
+        :param albums: Album to index, either a list or a stream.
+        """
+        raise NotImplementedError
+
+    def index_album(self, album: Album) -> Album:
+        """
+        Index a single album in a vector database.
+
+        :param album: the Album to index.
+        :return: the Album indexed.
         """
         raise NotImplementedError
 
@@ -65,3 +142,15 @@ class IndexAlbumUseCase(Protocol):
         :param top_k: the number of results to return.
         """
         raise NotImplementedError
+
+
+class SyncAlbumUseCase(Protocol):
+    async def sync_albums(self, albums: Iterable[Album] | AsyncIterable[Album], enrich: bool = True) -> list:
+        """
+        Load, enrich, store and index albums in a single streaming pass.
+
+        :param albums: Album to synchronize, either a list or a stream.
+        :param enrich: enrich the albums with metadata from external sources before storing them.
+        :return: the metrics of each stage of the pipeline.
+        """
+        raise NotImplementedError
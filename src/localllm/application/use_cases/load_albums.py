@@ -1,17 +1,20 @@
+from collections.abc import AsyncIterator, Iterator
 from pathlib import Path
 
 import structlog
 
-from localllm.application.use_cases.interfaces import LoadAlbumUseCase
+from localllm.application.use_cases.interfaces import FetchAlbumUseCase, LoadAlbumUseCase
 from localllm.domain.multimedia import Album
-from localllm.domain.ports.fetchers import AlbumFileReader
+from localllm.domain.ports.fetchers import AlbumFileReader, AlbumLibraryReader
+from localllm.domain.ports.persistence import AlbumCatalogCache
 
 logger = structlog.getLogger(__name__)
 
 
 class LoadAlbums(LoadAlbumUseCase):
-    def __init__(self, fetcher: AlbumFileReader | None = None):
+    def __init__(self, fetcher: AlbumFileReader | None = None, cache: AlbumCatalogCache | None = None):
         self.fetcher = fetcher
+        self.cache = cache
 
     def load_albums(self, file_path: Path) -> list[Album]:
         """
@@ -26,6 +29,64 @@ class LoadAlbums(LoadAlbumUseCase):
             logger.info("No fetcher configured, returning empty list")
             return []
 
+        if self.cache and (albums := self.cache.load(source=file_path)) is not None:
+            logger.info(f"{len(albums)} albums loaded from cache")
+            return albums
+
         albums = self.fetcher.read(path=file_path)
         logger.info(f"{len(albums)} albums loaded")
+        if self.cache:
+            self.cache.save(source=file_path, albums=albums)
+        return albums
+
+    def iter_albums(self, file_path: Path) -> Iterator[Album]:
+        """
+        Load albums from a file one at a time.
+
+        :param file_path: Path to the file to load.
+        :return: Iterator over the Album loaded from the file.
+        """
+        logger.info(f"Streaming albums from {file_path}")
+
+        if not self.fetcher:
+            logger.info("No fetcher configured, nothing to stream")
+            return
+
+        if self.cache and (albums := self.cache.load(source=file_path)) is not None:
+            logger.info(f"{len(albums)} albums streamed from cache")
+            yield from albums
+            return
+
+        count = 0
+        for album in self.fetcher.iter_read(path=file_path):
+            count += 1
+            yield album
+        logger.info(f"{count} albums streamed")
+
+
+class FetchAlbums(FetchAlbumUseCase):
+    def __init__(self, reader: AlbumLibraryReader | None = None):
+        self.reader = reader
+
+    async def fetch_albums(self) -> list[Album]:
+        """
+        Fetch albums from a remote music library.
+
+        :return: List of Album fetched from the library.
+        """
+        albums = [album async for album in self.iter_albums()]
+        logger.info(f"{len(albums)} albums fetched")
         return albums
+
+    async def iter_albums(self) -> AsyncIterator[Album]:
+        """
+        Fetch albums from a remote music library as they are received.
+
+        :return: Asynchronous iterator over the Album fetched from the library.
+        """
+        if not self.reader:
+            logger.info("No library reader configured, nothing to fetch")
+            return
+
+        async for album in self.reader.iter_read():
+            yield album
@@ -0,0 +1,171 @@
+from collections.abc import Mapping, Sequence
+from typing import Any, NamedTuple
+
+from localllm.domain.multimedia import Album, Artist
+
+# The value of the album is kept, providers cannot change it
+KEEP = "keep"
+# The value of the album wins when it is set, otherwise the first value set by a provider
+FIRST = "first"
+# The value of the highest priority provider wins over the value of the album
+PRIORITY = "priority"
+# The items of the album and of every provider, in order of appearance and without duplicates
+UNION = "union"
+# The entries of every provider overlay the entries of the album, later providers winning
+OVERLAY = "overlay"
+
+POLICIES = (KEEP, FIRST, PRIORITY, UNION, OVERLAY)
+
+DEFAULT_POLICIES = {
+    "album_id": KEEP,
+    "title": PRIORITY,
+    "artist": PRIORITY,
+    "year": PRIORITY,
+    "genres": UNION,
+    "styles": UNION,
+    "labels": UNION,
+    "country": PRIORITY,
+    "tracklist": FIRST,
+    "credits": PRIORITY,
+    "popularity": PRIORITY,
+    "external_urls": OVERLAY,
+    "external_ids": OVERLAY,
+    "pending_sources": KEEP,
+}
+DEFAULT_PRIORITIES = {
+    "country": ("discogs", "spotify"),
+    "popularity": ("spotify", "discogs"),
+}
+# Fields of the album completed by artist metadata, the artist name of the album is never replaced
+ARTIST_FIELDS = {"genres": "genres", "styles": "styles"}
+
+
+class ProviderResult(NamedTuple):
+    """Album and artist metadata found by an enricher."""
+
+    source: str
+    album: Album | None
+    artist: Artist | None = None
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, str | list | dict) and not value)
+
+
+class AlbumMerger:
+    """
+    Merges the metadata found by enrichers into an album, field by field.
+
+    Each field of the album follows a merge policy: KEEP, FIRST, PRIORITY, UNION or OVERLAY.
+    Providers are considered in the order of their results, except for the PRIORITY fields listed
+    in ``priorities`` where the listed providers come first. Artist metadata contributes its
+    genres and styles, it never replaces the artist name of the album.
+
+    Albums are merged attribute by attribute, only the fields that changed are copied into the
+    merged album, without serializing nor validating it again.
+    """
+
+    def __init__(
+        self,
+        policies: Mapping[str, str] | None = None,
+        priorities: Mapping[str, Sequence[str]] | None = None,
+    ):
+        """
+        Initializes the merger.
+
+        :param policies: the merge policy of the album fields, overriding the default ones. Fields
+            without a policy follow the PRIORITY policy.
+        :param priorities: the providers of a PRIORITY field, from the highest priority to the lowest.
+            Providers that are not listed come after the listed ones.
+        :raises ValueError: if a field or a policy is unknown.
+        """
+        self.policies = {name: PRIORITY for name in Album.model_fields} | DEFAULT_POLICIES | dict(policies or {})
+        self.priorities = DEFAULT_PRIORITIES | dict(priorities or {})
+        if unknown_fields := (set(self.policies) | set(self.priorities)) - set(Album.model_fields):
+            raise ValueError(f"Unknown album fields: {', '.join(sorted(unknown_fields))}")
+        if unknown_policies := set(self.policies.values()) - set(POLICIES):
+            raise ValueError(f"Unknown merge policies: {', '.join(sorted(unknown_policies))}")
+        self._fields = {policy: [] for policy in POLICIES}
+        for name, policy in self.policies.items():
+            self._fields[policy].append((name, ARTIST_FIELDS.get(name)))
+        self._priorities = [
+            (name, artist_field, self.priorities.get(name, ())) for name, artist_field in self._fields[PRIORITY]
+        ]
+
+    def merge(self, album: Album, results: Sequence[ProviderResult], pending_sources: list[str] | None = None) -> Album:
+        """
+        Merges the metadata found by enrichers into an album.
+
+        :param album: the album to enrich.
+        :param results: the metadata found by each enricher.
+        :param pending_sources: the enrichers left to query for the album, None to keep the album ones.
+        :return: the enriched album, or the album itself if nothing changed.
+        """
+        values = album.__dict__
+        # Field values are read from the model dicts, the models are neither dumped nor validated
+        provided = [result.album.__dict__ for result in results if result.album is not None]
+        artists = [result.artist.__dict__ for result in results if result.artist is not None]
+        by_source = {result.source: result.album.__dict__ for result in results if result.album is not None}
+        update = {}
+
+        for name, artist_field in self._fields[UNION]:
+            lists = [fields[name] for fields in provided]
+            if artist_field:
+                lists += [fields[artist_field] for fields in artists]
+            if (merged := _union(values[name], lists)) is not values[name]:
+                update[name] = merged
+
+        for name, _ in self._fields[OVERLAY]:
+            if (merged := _overlay(values[name], [fields[name] for fields in provided])) is not values[name]:
+                update[name] = merged
+
+        for name, artist_field in self._fields[FIRST]:
+            if _is_empty(values[name]):
+                candidates = [fields[artist_field] for fields in artists] if artist_field else []
+                candidates += [fields[name] for fields in provided]
+                _set_first(update, name, values[name], candidates)
+
+        for name, artist_field, priority in self._priorities:
+            candidates = [fields[artist_field] for fields in artists] if artist_field else []
+            if priority:
+                # The listed providers come first, the others keep their order
+                candidates += [by_source[source][name] for source in priority if source in by_source]
+                candidates += [fields[name] for source, fields in by_source.items() if source not in priority]
+            else:
+                candidates += [fields[name] for fields in provided]
+            _set_first(update, name, values[name], candidates)
+
+        if pending_sources is not None and pending_sources != album.pending_sources:
+            update["pending_sources"] = pending_sources
+        return album.model_copy(update=update) if update else album
+
+
+def _set_first(update: dict[str, Any], name: str, value: Any, candidates: list) -> None:
+    for candidate in candidates:
+        if not _is_empty(candidate):
+            if candidate != value:
+                update[name] = candidate
+            return
+
+
+def _union(value: list, lists: list[list]) -> list:
+    items = None
+    for provided in lists:
+        for item in provided:
+            # The album list is only copied once a provider brings a new item
+            if items is None:
+                if item in value:
+                    continue
+                items = dict.fromkeys(value)
+            items.setdefault(item)
+    return value if items is None else list(items)
+
+
+def _overlay(value: dict, dicts: list[dict]) -> dict:
+    merged = value
+    for entries in dicts:
+        if entries:
+            if merged is value:
+                merged = dict(value)
+            merged.update(entries)
+    return value if merged == value else merged
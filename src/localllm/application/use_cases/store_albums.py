@@ -1,10 +1,11 @@
+from collections.abc import Iterable
 from pathlib import Path
 
 import structlog
 
 from localllm.application.use_cases.interfaces import FileStorageAlbumUseCase, StoreAlbumUseCase
 from localllm.domain.multimedia import Album
-from localllm.domain.ports.persistence import AlbumFileStorage, AlbumRepository
+from localllm.domain.ports.persistence import DEFAULT_BATCH_SIZE, AlbumFileStorage, AlbumRepository
 
 logger = structlog.getLogger(__name__)
 
@@ -14,8 +15,9 @@ class DatabaseStoreAlbums(StoreAlbumUseCase):
     Use case to store albums in a repository.
     """  # noqa: D200
 
-    def __init__(self, repository: AlbumRepository = None):
+    def __init__(self, repository: AlbumRepository = None, batch_size: int = DEFAULT_BATCH_SIZE):
         self.repository = repository
+        self.batch_size = batch_size
         if self.repository:
             logger.info("Initializing repository")
             self.repository.initialize()
@@ -24,6 +26,9 @@ class DatabaseStoreAlbums(StoreAlbumUseCase):
         """
         Store albums to a repository.
 
+        Albums are written in batches of ``batch_size`` within a single transaction, so either all
+        of them are stored or none.
+
         :param albums: list of Album to save.
         :return: list of Album stored.
         """
@@ -31,13 +36,40 @@ class DatabaseStoreAlbums(StoreAlbumUseCase):
             logger.info("No repository configured, skipping save")
             return []
 
-        for album in albums:
-            logger.info(f"Storing album to repository - {album.album_id} / {album.title} by {album.artist}")
-            entity_id, album = self.repository.add_album(album)
-            logger.info(f"Album with album_id {album.album_id} stored into repository with id {entity_id}")
-        logger.info("All albums stored in repository")
+        stored = self.repository.add_albums(albums, batch_size=self.batch_size)
+        logger.info(f"{stored} of {len(albums)} albums added or changed in repository")
         return albums
 
+    def store_album(self, album: Album) -> Album:
+        """
+        Store a single album to a repository.
+
+        :param album: the Album to save.
+        :return: the Album stored.
+        """
+        if not self.repository:
+            logger.info("No repository configured, skipping save")
+            return album
+
+        logger.info(f"Storing album to repository - {album.album_id} / {album.title} by {album.artist}")
+        entity_id, album = self.repository.add_album(album)
+        logger.info(f"Album with album_id {album.album_id} stored into repository with id {entity_id}")
+        return album
+
+    def update_album(self, album: Album) -> Album | None:
+        """
+        Update an album already stored in a repository.
+
+        :param album: the new version of the Album, identified by its album_id.
+        :return: the Album updated, or None if it was not stored.
+        """
+        if not self.repository:
+            logger.info("No repository configured, skipping update")
+            return album
+
+        logger.info(f"Updating album in repository - {album.album_id} / {album.title} by {album.artist}")
+        return self.repository.update_album(album.album_id, album)
+
 
 class JSONFileStorageAlbums(FileStorageAlbumUseCase):
     """
@@ -47,11 +79,11 @@ class JSONFileStorageAlbums(FileStorageAlbumUseCase):
     def __init__(self, repository: AlbumFileStorage = None):
         self.repository = repository
 
-    def persist(self, albums: list[Album], path: Path) -> None:
+    def persist(self, albums: Iterable[Album], path: Path) -> None:
         """
         Store albums to a file.
 
-        :param albums: list of Album to save.
+        :param albums: Album to save, either a list or a stream.
         :param path: the path to the file to save.
         :return: None.
         """
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import structlog
+
+from localllm.application.use_cases.enrich_albums import as_async_iterator
+from localllm.application.use_cases.interfaces import (
+    EnrichAlbumUseCase,
+    IndexAlbumUseCase,
+    StoreAlbumUseCase,
+    SyncAlbumUseCase,
+)
+from localllm.domain.multimedia import Album
+
+logger = structlog.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 32
+_END_OF_ALBUMS = None
+
+
+@dataclass
+class StageMetrics:
+    """
+    Throughput of a pipeline stage.
+
+    Attributes:
+    - name: str, the name of the stage
+    - processed: int, number of albums handed to the next stage
+    - failed: int, number of albums the stage could not process
+    - backfilled: int, number of new versions of albums already processed, patched with late
+      enrichment results
+    - busy: float | None, seconds spent doing the stage work, None when the work is spread over
+      concurrent requests
+    - elapsed: float, seconds from the start of the pipeline to the end of the stage.
+    """
+
+    name: str
+    processed: int = 0
+    failed: int = 0
+    backfilled: int = 0
+    busy: float | None = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Albums processed per second over the lifetime of the pipeline."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+class SyncAlbums(SyncAlbumUseCase):
+    """
+    Streaming pipeline loading, enriching, storing and indexing albums.
+
+    Stages are chained by bounded queues, so each album is stored and indexed as soon as it is
+    enriched while the next albums are still being enriched. Storage and indexing are blocking
+    and run on their own thread, which lets embedding computation overlap with the network
+    requests of the enrichment. A full queue holds back the stages before it.
+
+    When enrichment hands back a new version of an album already synchronized, patched with
+    enrichment results that missed the deadline, the stored album is updated and indexed again.
+    The enrichment checkpoint is left untouched, so synchronizing albums does not discard the
+    albums recorded by an interrupted enrichment.
+    """
+
+    def __init__(
+        self,
+        enrich_albums_use_case: EnrichAlbumUseCase,
+        store_albums_use_case: StoreAlbumUseCase,
+        index_albums_use_case: IndexAlbumUseCase,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        """
+        Initializes the pipeline.
+
+        :param enrich_albums_use_case: the use case enriching albums.
+        :param store_albums_use_case: the use case storing albums in the repository.
+        :param index_albums_use_case: the use case indexing albums in the vector store.
+        :param queue_size: the number of albums waiting between two stages.
+        """
+        self.enrich_albums_use_case = enrich_albums_use_case
+        self.store_albums_use_case = store_albums_use_case
+        self.index_albums_use_case = index_albums_use_case
+        self.queue_size = queue_size
+
+    async def sync_albums(
+        self, albums: Iterable[Album] | AsyncIterable[Album], enrich: bool = True
+    ) -> list[StageMetrics]:
+        """
+        Load, enrich, store and index albums in a single streaming pass.
+
+        Albums that fail to be stored are still indexed, while those that fail to be indexed are
+        only logged. Albums patched after enrichment are updated in the repository and in the
+        vector store.
+
+        :param albums: Album to synchronize, either a list or a stream.
+        :param enrich: enrich the albums with metadata from external sources before storing them.
+        :return: list of StageMetrics, one per stage in pipeline order.
+        """
+        started = time.perf_counter()
+        load = StageMetrics("load")
+        enrichment = StageMetrics("enrich", busy=None)
+        store = StageMetrics("store")
+        index = StageMetrics("index")
+        to_store: asyncio.Queue[Album | None] = asyncio.Queue(maxsize=self.queue_size)
+        to_index: asyncio.Queue[Album | None] = asyncio.Queue(maxsize=self.queue_size)
+
+        async def loaded_albums() -> AsyncIterator[Album]:
+            source = aiter(as_async_iterator(albums))
+            while True:
+                start = time.perf_counter()
+                try:
+                    album = await anext(source)
+                except StopAsyncIteration:
+                    break
+                load.busy += time.perf_counter() - start
+                load.processed += 1
+                yield album
+            load.elapsed = time.perf_counter() - started
+
+        async def enrich_stage() -> None:
+            albums_to_store = (
+                self.enrich_albums_use_case.iter_enrich(loaded_albums(), record=False) if enrich else loaded_albums()
+            )
+            enriched = set()
+            async for album in albums_to_store:
+                if album.album_id in enriched:
+                    enrichment.backfilled += 1
+                else:
+                    enriched.add(album.album_id)
+                    enrichment.processed += 1
+                await to_store.put(album)
+            enrichment.failed = load.processed - enrichment.processed
+            enrichment.elapsed = time.perf_counter() - started
+            await to_store.put(_END_OF_ALBUMS)
+
+        async def blocking_stage(
+            metrics: StageMetrics,
+            process: Callable[[Album], object],
+            inbox: asyncio.Queue[Album | None],
+            outbox: asyncio.Queue[Album | None] | None,
+            patch: Callable[[Album], object] | None = None,
+        ) -> None:
+            loop = asyncio.get_running_loop()
+            seen = set()
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sync-{metrics.name}") as executor:
+                while (album := await inbox.get()) is not _END_OF_ALBUMS:
+                    start = time.perf_counter()
+                    try:
+                        if album.album_id in seen:
+                            await loop.run_in_executor(executor, patch or process, album)
+                            metrics.backfilled += 1
+                        else:
+                            seen.add(album.album_id)
+                            await loop.run_in_executor(executor, process, album)
+                            metrics.processed += 1
+                    except Exception as e:
+                        logger.error(f"Unable to {metrics.name} album {album.album_id} / {album.title}: {e}")
+                        metrics.failed += 1
+                    metrics.busy += time.perf_counter() - start
+                    if outbox is not None:
+                        await outbox.put(album)
+            metrics.elapsed = time.perf_counter() - started
+            if outbox is not None:
+                await outbox.put(_END_OF_ALBUMS)
+
+        tasks = [
+            asyncio.create_task(enrich_stage()),
+            asyncio.create_task(
+                blocking_stage(
+                    store,
+                    self.store_albums_use_case.store_album,
+                    to_store,
+                    to_index,
+                    patch=self.store_albums_use_case.update_album,
+                )
+            ),
+            asyncio.create_task(blocking_stage(index, self.index_albums_use_case.index_album, to_index, None)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        stages = [load, enrichment, store, index] if enrich else [load, store, index]
+        for stage in stages:
+            logger.info(
+                f"Stage {stage.name}: {stage.processed} albums, {stage.failed} failed, "
+                f"{stage.backfilled} backfilled, {stage.throughput:.1f} albums/s"
+            )
+        return stages
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from dotenv import load_dotenv
 from pydantic import Field, SecretStr
@@ -13,10 +14,50 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     document_folder: Path = Field(default=Path(ROOT_DIR, Path("data/inputs")).absolute())
+    catalog_snapshot: bool = False
+
+    lms_url: str | None = None
+    lms_page_size: int = 500
+    lms_max_concurrency: int = 4
 
     discogs_user_token: SecretStr
     spotify_client_id: SecretStr
     spotify_client_secret: SecretStr
+    discogs_max_workers: int = 4
+    spotify_max_workers: int = 4
+    spotify_batch_size: int = 20
+    discogs_rate: float = 1.0
+    spotify_rate: float = 5.0
+    spotify_max_rate: float = 20.0
+    spotify_token_cache_path: Path | None = Field(default=Path(ROOT_DIR, Path("data/spotify_token.json")).absolute())
+    http_pool_size: int = 8
+    enrichment_cassette_path: Path | None = None
+    enrichment_cassette_mode: Literal["record", "replay"] = "record"
+    enrichment_replay_latency: float = 0.0
+    enrichment_replay_rate_limited: float = 0.0
+    enrichment_workers: int = 32
+    enrichment_queue_size: int = 64
+    enrichment_deadline: float | None = 10.0
+    enrichment_artist_lookups: bool = False
+    enrichment_cache: bool = True
+    enrichment_cache_path: Path = Field(default=Path(ROOT_DIR, Path("data/enrichment_cache.db")).absolute())
+    discogs_cache_ttl: int = 30 * 24 * 3600
+    spotify_cache_ttl: int = 7 * 24 * 3600
+    enrichment_negative_cache_ttl: int = 24 * 3600
+    enrichment_breaker_failures: int = 5
+    enrichment_breaker_cooldown: float = 60.0
+    sync_queue_size: int = 32
+    enrichment_checkpoint_path: Path = Field(default=Path(ROOT_DIR, Path("data/enriched_albums.jsonl")).absolute())
 
     database_model_url: str
+    database_batch_size: int = 500
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30.0
+    database_list_loading: str = "selectin"
+    database_single_loading: str = "joined"
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024
     vector_model_url: str
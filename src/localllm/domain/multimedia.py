@@ -21,6 +21,26 @@ class Track(BaseModel):
     duration: int | None = Field(None, description="The duration of the track in seconds")
 
 
+class Artist(BaseModel):
+    """
+    Artist is a class that represents the artist of albums in the multimedia library.
+
+    Attributes:
+    - name: str, canonical artist name
+    - genres: genre list of the artist
+    - styles: style list of the artist (subgenres)
+    - external_ids: external service IDs.
+    """
+
+    name: str = Field(..., description="Canonical artist name", min_length=1)
+    genres: list[str] = Field(default_factory=list, description="Music genres")
+    styles: list[str] = Field(default_factory=list, description="Music styles (subgenres)")
+    external_ids: dict[str, str] = Field(default_factory=dict, description="External service IDs")
+
+    class Config:
+        frozen = True
+
+
 class Album(BaseModel):
     """
     Album is a class that represents an album in the multimedia library.
@@ -41,6 +61,7 @@ class Album(BaseModel):
     - popularity: popularity score
     - external_urls: external service URLs
     - external_ids: external service IDs
+    - pending_sources: external sources that could not be queried, to query in a later run
     """
 
     # Required fields
@@ -59,6 +80,9 @@ class Album(BaseModel):
     popularity: int | None = Field(None, ge=0, le=100, description="Popularity score (0-100)")
     external_urls: dict[str, HttpUrl] = Field(default_factory=dict, description="External service URLs")
     external_ids: dict[str, str] = Field(default_factory=dict, description="External service IDs")
+    pending_sources: list[str] = Field(
+        default_factory=list, description="External sources that could not be queried during enrichment"
+    )
 
     class Config:
         frozen = True
@@ -1,6 +1,14 @@
-from typing import Protocol
+from typing import Protocol, runtime_checkable
 
-from localllm.domain.multimedia import Album
+from localllm.domain.multimedia import Album, Artist
+
+
+class ProviderUnavailableError(Exception):
+    """
+    Exception raised when an external source is not called because it is known to be failing.
+    """  # noqa: D200
+
+    pass
 
 
 class AlbumEnricher(Protocol):
@@ -9,14 +17,61 @@ class AlbumEnricher(Protocol):
 
     This interface defines the contract for enriching album metadata for an external
     source.
+
+    Attributes:
+    - name: str, the name of the external source, used to limit the requests sent to it
     """
 
-    async def get_album_metadata(self, artist: str, album: str) -> Album | None:
+    name: str
+
+    async def get_album_metadata(
+        self, artist: str, album: str, external_ids: dict[str, str] | None = None
+    ) -> Album | None:
         """
         Retrieves album metadata from external source.
 
         :param artist: str, the artist of the album
         :param album: str, the title of the album
+        :param external_ids: dict[str, str], the IDs of the album on external services, letting the
+            source look the album up directly instead of searching for it
         :return: Album, the metadata of the album or None if not found
+        :raises ProviderUnavailableError: if the source is failing and was not called
+        """
+        pass
+
+
+@runtime_checkable
+class ArtistEnricher(Protocol):
+    """
+    Interface for external sources also providing artist metadata.
+
+    Artist metadata is shared by all the albums of the artist, sources without artist level
+    metadata only implement AlbumEnricher.
+
+    Attributes:
+    - name: str, the name of the external source, used to limit the requests sent to it
+    """
+
+    name: str
+
+    async def get_artist_metadata(self, artist: str) -> Artist | None:
+        """
+        Retrieves artist metadata from external source.
+
+        :param artist: str, the name of the artist
+        :return: Artist, the metadata of the artist or None if not found
         """
         pass
+
+
+class ConnectionCounter(Protocol):
+    """
+    Interface for the transport shared by the enrichers, counting the traffic sent to the sources.
+
+    Attributes:
+    - handshakes: int, the number of connections opened, each one costing a TCP and a TLS handshake
+    - requests: int, the number of HTTP requests sent
+    """
+
+    handshakes: int
+    requests: int
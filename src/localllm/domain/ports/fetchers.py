@@ -1,3 +1,4 @@
+from collections.abc import AsyncIterator, Iterator
 from pathlib import Path
 from typing import Protocol
 
@@ -19,3 +20,36 @@ class AlbumFileReader(Protocol):
         :return: list[Album], the albums read from file
         """
         pass
+
+    def iter_read(self, path: Path) -> Iterator[Album]:
+        """
+        Reads albums from file one at a time.
+
+        :param path: Path, the path to the file
+        :return: Iterator[Album], the albums read from file
+        """
+        pass
+
+
+class AlbumLibraryReader(Protocol):
+    """
+    Generic interface for reading albums from a remote music library.
+
+    This interface defines the contract for reading albums from a music server.
+    """
+
+    async def read(self) -> list[Album]:
+        """
+        Reads all albums from the library.
+
+        :return: list[Album], the albums of the library
+        """
+        pass
+
+    def iter_read(self) -> AsyncIterator[Album]:
+        """
+        Reads albums from the library as they are received.
+
+        :return: AsyncIterator[Album], the albums of the library
+        """
+        pass
@@ -1,8 +1,11 @@
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Protocol
 
 from localllm.domain.multimedia import Album
 
+DEFAULT_BATCH_SIZE = 500
+
 
 class AlbumRepository(Protocol):
     def initialize(self) -> None:
@@ -22,6 +25,16 @@ class AlbumRepository(Protocol):
         """
         pass
 
+    def add_albums(self, albums: Iterable[Album], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Add albums to the storage, all of them or none.
+
+        :param albums: Album to save, either a list or a stream.
+        :param batch_size: int, the number of albums written at once
+        :return: int, the number of albums saved
+        """
+        pass
+
     def get_number_albums(self) -> int:
         """
         Retrieves total number of albums from the storage.
@@ -38,6 +51,15 @@ class AlbumRepository(Protocol):
         """
         pass
 
+    def iter_albums(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Album]:
+        """
+        Streams all albums from the storage, without holding all of them in memory.
+
+        :param batch_size: int, the number of albums read at once
+        :return: Iterator[Album], the albums
+        """
+        pass
+
     def get_album_by_id(self, album_id: str) -> Album:
         """
         Retrieves an album by its ID.
@@ -69,11 +91,20 @@ class AlbumRepository(Protocol):
         """
         pass
 
-    def update_album(self, album_id: int, updated_album: Album) -> Album | None:
+    def get_facets(self, metadata: dict | None = None) -> dict[str, dict[str, int]]:
+        """
+        Counts albums by facet, such as genre or decade, for browsing the library.
+
+        :param metadata: dict, metadata key-value pairs the albums counted must match, all albums when None
+        :return: dict, the number of albums of each value, by facet
+        """
+        pass
+
+    def update_album(self, album_id: str, updated_album: Album) -> Album | None:
         """
         Updates an existing album in the storage.
 
-        :param album_id: int, the ID of the album to be updated
+        :param album_id: str, the ID of the album in our local library
         :param updated_album: Album, the updated album data
         :return: Album, the updated album or None if not found
         """
@@ -118,12 +149,76 @@ class AlbumVectorRepository(Protocol):
 
 
 class AlbumFileStorage(Protocol):
-    def save(self, path: Path, albums: list[Album]) -> None:
+    def save(self, path: Path, albums: Iterable[Album]) -> None:
         """
         Saves albums to a file.
 
         :param path: Path, the path to the file
-        :param albums: list[Album], the albums to be saved
+        :param albums: Iterable[Album], the albums to be saved, either a list or a stream
+        :return: None
+        """
+        pass
+
+
+class AlbumCatalogCache(Protocol):
+    def load(self, source: Path) -> list[Album] | None:
+        """
+        Loads the albums of a source file from the cache.
+
+        :param source: Path, the source file
+        :return: list[Album], the cached albums or None if the cache is missing or outdated
+        """
+        pass
+
+    def save(self, source: Path, albums: list[Album]) -> None:
+        """
+        Caches the albums read from a source file.
+
+        :param source: Path, the source file
+        :param albums: list[Album], the albums read from the source file
+        :return: None
+        """
+        pass
+
+
+class AlbumCheckpoint(Protocol):
+    def album_ids(self) -> set[str]:
+        """
+        Retrieves the IDs of the albums already recorded in the checkpoint.
+
+        :return: set[str], the IDs of the recorded albums
+        """
+        pass
+
+    def append(self, album: Album) -> None:
+        """
+        Records a processed album, so that it survives an interrupted run.
+
+        :param album: Album, the processed album
+        :return: None
+        """
+        pass
+
+    def iter_albums(self) -> Iterator[Album]:
+        """
+        Reads the recorded albums one at a time, in the order they were recorded.
+
+        :return: Iterator[Album], the recorded albums
+        """
+        pass
+
+    def reset(self) -> None:
+        """
+        Removes every recorded album.
+
+        :return: None
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the checkpoint.
+
         :return: None
         """
         pass
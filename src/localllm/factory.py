@@ -9,12 +9,22 @@ from localllm.application import (
     MultimediaIngesterService,
     QdrantIndexAlbums,
 )
+from localllm.application.use_cases.load_albums import FetchAlbums
 from localllm.application.use_cases.store_albums import JSONFileStorageAlbums
+from localllm.application.use_cases.sync_albums import SyncAlbums
 from localllm.config import Settings
+from localllm.infra.spi.persistence.file.checkpoints import JSONLAlbumCheckpoint
 from localllm.infra.spi.persistence.file.fetchers import LocalFileJSONReader
 from localllm.infra.spi.persistence.file.repository import JSONAlbumFileStorage
+from localllm.infra.spi.persistence.file.snapshots import PickleAlbumSnapshotCache
 from localllm.infra.spi.persistence.repository.databases import DatabaseAlbumPersistence
+from localllm.infra.spi.web.breaker import CircuitBreaker
+from localllm.infra.spi.web.cache import SQLiteResponseCache
+from localllm.infra.spi.web.cassettes import Cassette, RecordingHTTPAdapter, ReplayHTTPAdapter
+from localllm.infra.spi.web.connections import PooledHTTPAdapter
 from localllm.infra.spi.web.enrichers import DiscogsAlbumEnricher, SpotifyAlbumEnricher
+from localllm.infra.spi.web.fetchers import LMSAlbumReader
+from localllm.infra.spi.web.pacing import RateGovernor
 
 logger = structlog.getLogger(__name__)
 
@@ -26,28 +36,118 @@ def create_multimedia_service() -> MultimediaIngesterService:
     logger.debug("Initializing multimedia assistant")
 
     fetcher = LocalFileJSONReader()
-    discogs_enricher = DiscogsAlbumEnricher(discogs_token=settings.discogs_user_token.get_secret_value())
+    catalog_cache = PickleAlbumSnapshotCache() if settings.catalog_snapshot else None
+    library_reader = (
+        LMSAlbumReader(
+            url=settings.lms_url,
+            page_size=settings.lms_page_size,
+            max_concurrency=settings.lms_max_concurrency,
+        )
+        if settings.lms_url
+        else None
+    )
+    response_cache = (
+        SQLiteResponseCache(
+            path=settings.enrichment_cache_path,
+            ttls={
+                DiscogsAlbumEnricher.name: settings.discogs_cache_ttl,
+                SpotifyAlbumEnricher.name: settings.spotify_cache_ttl,
+            },
+            negative_ttl=settings.enrichment_negative_cache_ttl,
+        )
+        if settings.enrichment_cache
+        else None
+    )
+    # Both enrichers share the same keep-alive connections, counting the handshakes of the run
+    http_adapter = connections = PooledHTTPAdapter(pool_size=settings.http_pool_size)
+    replaying = bool(settings.enrichment_cassette_path) and settings.enrichment_cassette_mode == "replay"
+    if replaying:
+        http_adapter = connections = ReplayHTTPAdapter(
+            Cassette(settings.enrichment_cassette_path),
+            latency=settings.enrichment_replay_latency,
+            rate_limited=settings.enrichment_replay_rate_limited,
+        )
+    elif settings.enrichment_cassette_path:
+        http_adapter = RecordingHTTPAdapter(Cassette(settings.enrichment_cassette_path), http_adapter)
+    discogs_enricher = DiscogsAlbumEnricher(
+        discogs_token=settings.discogs_user_token.get_secret_value(),
+        max_workers=settings.discogs_max_workers,
+        cache=response_cache,
+        breaker=CircuitBreaker(
+            DiscogsAlbumEnricher.name,
+            failure_threshold=settings.enrichment_breaker_failures,
+            cooldown=settings.enrichment_breaker_cooldown,
+        ),
+        governor=RateGovernor(DiscogsAlbumEnricher.name, rate=settings.discogs_rate),
+        http_adapter=http_adapter,
+    )
     spotify_enricher = SpotifyAlbumEnricher(
         client_id=settings.spotify_client_id.get_secret_value(),
         client_secret=settings.spotify_client_secret.get_secret_value(),
+        max_workers=settings.spotify_max_workers,
+        cache=response_cache,
+        breaker=CircuitBreaker(
+            SpotifyAlbumEnricher.name,
+            failure_threshold=settings.enrichment_breaker_failures,
+            cooldown=settings.enrichment_breaker_cooldown,
+        ),
+        governor=RateGovernor(
+            SpotifyAlbumEnricher.name, rate=settings.spotify_rate, max_rate=settings.spotify_max_rate
+        ),
+        batch_size=settings.spotify_batch_size,
+        http_adapter=http_adapter,
+        # A replayed token is the redacted one of the cassette, it must not replace the cached token
+        token_cache_path=None if replaying else settings.spotify_token_cache_path,
     )
 
     enrichers = [discogs_enricher, spotify_enricher]
-    db_repository = DatabaseAlbumPersistence(db_url=settings.database_model_url)
+    db_repository = DatabaseAlbumPersistence(
+        db_url=settings.database_model_url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        sqlite_pragmas={
+            "journal_mode": settings.sqlite_journal_mode,
+            "synchronous": settings.sqlite_synchronous,
+            "mmap_size": settings.sqlite_mmap_size,
+            "cache_size": settings.sqlite_cache_size,
+        },
+        list_loading=settings.database_list_loading,
+        single_loading=settings.database_single_loading,
+    )
     json_repository = JSONAlbumFileStorage()
 
     embeddings = OllamaEmbeddings(model="snowflake-arctic-embed2")
 
+    enrich_albums = EnrichAlbums(
+        enrichers,
+        workers=settings.enrichment_workers,
+        queue_size=settings.enrichment_queue_size,
+        provider_limits={
+            discogs_enricher.name: settings.discogs_max_workers,
+            # Albums fetched by ID share Spotify requests, so each request can serve a whole batch.
+            spotify_enricher.name: settings.spotify_max_workers * settings.spotify_batch_size,
+        },
+        checkpoint=JSONLAlbumCheckpoint(settings.enrichment_checkpoint_path),
+        deadline=settings.enrichment_deadline,
+        artist_lookups=settings.enrichment_artist_lookups,
+        connections=connections,
+    )
+    store_albums = DatabaseStoreAlbums(db_repository, batch_size=settings.database_batch_size)
+    index_albums = QdrantIndexAlbums(
+        database_url=settings.vector_model_url,
+        collection_name="albums",
+        embeddings=embeddings,
+        vector_size=len(embeddings.embed_query("test")),
+        distance=Distance.COSINE,
+    )
+
     return MultimediaIngesterService(
-        load_albums_use_case=LoadAlbums(fetcher),
-        enrich_album_use_case=EnrichAlbums(enrichers),
-        store_albums_use_case=DatabaseStoreAlbums(db_repository),
-        index_albums_use_case=QdrantIndexAlbums(
-            database_url=settings.vector_model_url,
-            collection_name="albums",
-            embeddings=embeddings,
-            vector_size=len(embeddings.embed_query("test")),
-            distance=Distance.COSINE,
-        ),
+        load_albums_use_case=LoadAlbums(fetcher, cache=catalog_cache),
+        enrich_album_use_case=enrich_albums,
+        store_albums_use_case=store_albums,
+        index_albums_use_case=index_albums,
         file_storage_album_use_case=JSONFileStorageAlbums(json_repository),
+        fetch_albums_use_case=FetchAlbums(library_reader),
+        sync_albums_use_case=SyncAlbums(enrich_albums, store_albums, index_albums, queue_size=settings.sync_queue_size),
     )
@@ -8,10 +8,13 @@ from langchain_ollama.llms import OllamaLLM
 from rich.console import Console
 from rich.table import Table
 
+from localllm.config import Settings
 from localllm.factory import create_multimedia_service
+from localllm.infra.api.cli.bench import bench_app
 
 logger = structlog.get_logger(__name__)
 app = typer.Typer(help="CLI to manage multimedia content in the localllm project.")
+app.add_typer(bench_app, name="bench")
 console = Console()
 
 PROMPT_TEMPLATE = """
@@ -25,29 +28,83 @@ Answer the question based on the above context: {question}
 """
 
 
+def _check_library(lms: bool) -> None:
+    """
+    Checks the LMS server to read albums from is configured, before anything is read.
+
+    :param lms: bool, whether albums are read from the LMS server.
+    :raise typer.BadParameter: if albums are read from the LMS server but LMS_URL is not set.
+    """
+    if lms and not Settings().lms_url:
+        raise typer.BadParameter("LMS_URL must be set to read albums from the LMS server", param_hint="--lms")
+
+
 @app.command()
-def ingest(enrich: bool = False, file: Path = Path("data/inputs/albums.json"), store: bool = False):
+def ingest(
+    enrich: bool = False,
+    file: Path = Path("data/inputs/albums.json"),
+    store: bool = False,
+    lms: bool = False,
+    resume: bool = False,
+):
     """
     Ingest albums.
 
-    This command ingests albums from a source file and stores them into local sqlite database.
-    Optionally, it can enrich the albums with additional metadata from external services.
+    This command ingests albums from a source file, or directly from the LMS server with --lms, and
+    stores them into local sqlite database.
+    Optionally, it can enrich the albums with additional metadata from external services. Enriched
+    albums are checkpointed as they complete, and --resume skips those of an interrupted run. Albums
+    enriched while a provider was unavailable are queried again on that provider with --resume.
     """
+    _check_library(lms)
     application = create_multimedia_service()
-    albums = application.load_albums(album_file_path=file)
+    if lms:
+        albums = asyncio.run(application.fetch_albums())
+    else:
+        albums = application.load_albums(album_file_path=file)
     if enrich:
-        albums = asyncio.run(application.enrich_albums(albums=albums))
-        application.save_albums(albums=albums, path=Path("data/enriched_albums.json"))
+        asyncio.run(application.enrich_albums(albums=albums, resume=resume))
+        application.save_albums(albums=application.iter_enriched_albums(), path=Path("data/enriched_albums.json"))
+        albums = list(application.iter_enriched_albums()) if store else albums
 
     if store:
         asyncio.run(application.store_albums(albums=albums))
 
 
+@app.command()
+def sync(file: Path = Path("data/inputs/albums.json"), lms: bool = False, enrich: bool = True):
+    """
+    Synchronize albums.
+
+    This command loads albums from a source file, or directly from the LMS server with --lms, and
+    streams each of them through enrichment, storage into the local sqlite database and indexing
+    into the vector store, so the stages run at the same time. The throughput of each stage is
+    reported at the end.
+    """
+    _check_library(lms)
+    application = create_multimedia_service()
+    albums = application.iter_library_albums() if lms else application.iter_albums(album_file_path=file)
+    stages = asyncio.run(application.sync_albums(albums=albums, enrich=enrich))
+
+    table = Table("Stage", "Albums", "Failed", "Backfilled", "Busy (s)", "Elapsed (s)", "Albums/s")
+    for stage in stages:
+        table.add_row(
+            stage.name,
+            str(stage.processed),
+            str(stage.failed),
+            str(stage.backfilled),
+            f"{stage.busy:.2f}" if stage.busy is not None else "-",
+            f"{stage.elapsed:.2f}",
+            f"{stage.throughput:.1f}",
+        )
+    console.print(table)
+
+
 @app.command()
 def index(file: Path = Path("data/inputs/albums.json")):
     """Index albums into vector store."""
     application = create_multimedia_service()
-    albums = application.load_albums(album_file_path=file)
+    albums = application.iter_albums(album_file_path=file)
     application.index_albums(albums=albums)
 
 
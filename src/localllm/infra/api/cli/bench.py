@@ -0,0 +1,842 @@
+import asyncio
+import hashlib
+import json
+import logging
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle, islice
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+import structlog
+import typer
+from pydantic import HttpUrl
+from requests.adapters import HTTPAdapter
+from rich.console import Console
+from rich.table import Table
+from sqlalchemy import event, text
+
+from localllm.application.use_cases.enrich_albums import EnrichAlbums
+from localllm.application.use_cases.load_albums import LoadAlbums
+from localllm.application.use_cases.merging import AlbumMerger, ProviderResult
+from localllm.domain.multimedia import Album, Artist, Track
+from localllm.infra.spi.persistence.file.fetchers import LocalFileJSONReader, json_to_album, json_to_albums
+from localllm.infra.spi.persistence.file.snapshots import PickleAlbumSnapshotCache
+from localllm.infra.spi.persistence.repository.databases import (
+    LOADING_STRATEGIES,
+    SEARCH_QUERY,
+    DatabaseAlbumPersistence,
+    _entity_to_domain,
+    _parse_search_query,
+)
+from localllm.infra.spi.persistence.repository.models import AlbumEntity
+from localllm.infra.spi.web.cassettes import Cassette, RecordingHTTPAdapter, ReplayHTTPAdapter, build_response
+from localllm.infra.spi.web.connections import PooledHTTPAdapter, mount_adapter
+from localllm.infra.spi.web.enrichers import DiscogsAlbumEnricher, SpotifyAlbumEnricher
+from localllm.infra.spi.web.pacing import RateGovernor
+
+bench_app = typer.Typer(help="Benchmarks of the localllm ingestion pipeline.")
+console = Console()
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_WORKERS = [1, 4, 8]
+
+
+def _silence_logs() -> None:
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+
+def _best_time(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class _StubRelease:
+    def __init__(self, data: dict):
+        self.data = data
+
+
+class _StubDiscogsClient:
+    """Discogs client answering every search after a fixed latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def search(self, query: str, type: str) -> list[_StubRelease]:
+        time.sleep(self.latency)
+        return [_StubRelease({"id": 1, "title": f"Stub Artist - {query}", "year": "2000", "genre": ["Rock"]})]
+
+
+class _StubSpotifyClient:
+    """Spotify client answering every request after a fixed latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def search(self, q: str, type: str) -> dict:
+        self.calls += 1
+        time.sleep(self.latency)
+        if type == "artist":
+            return {"artists": {"items": [{"id": "1", "name": "Stub Artist", "genres": ["Pop"]}]}}
+        return {"albums": {"items": [{"id": "1", "name": q, "artists": [{"name": "Stub Artist"}], "genres": ["Pop"]}]}}
+
+    def albums(self, albums: list[str]) -> dict:
+        self.calls += 1
+        time.sleep(self.latency)
+        return {"albums": [{"id": id, "name": id, "artists": [{"name": "Stub Artist"}]} for id in albums]}
+
+
+def _stub_enrichers(latency: float, max_workers: int) -> list:
+    discogs = DiscogsAlbumEnricher(discogs_token="stub", max_workers=max_workers)  # nosec B106
+    discogs.discogs = _StubDiscogsClient(latency)
+    spotify = SpotifyAlbumEnricher(client_id="stub", client_secret="stub", max_workers=max_workers)  # nosec B106
+    spotify.spotify = _StubSpotifyClient(latency)
+    return [discogs, spotify]
+
+
+def _load_json_albums(file: Path) -> list[dict]:
+    with open(file) as json_document:
+        data = json.load(json_document)
+    return data if isinstance(data, list) else data["result"]["albums_loop"]
+
+
+def _json_to_album_formatting_log(json_album: dict) -> Album:
+    """Converts a JSON album, formatting the record into its debug log even when it is filtered out."""
+    structlog.getLogger().debug(f"Converting JSON album {json_album}")
+    return json_to_album(json_album)
+
+
+@bench_app.command()
+def load(file: Path = Path("data/inputs/albums.json"), size: list[int] = DEFAULT_SIZES, repeat: int = 3):
+    """Compare album conversion with a formatted debug log with the structured one."""
+    _silence_logs()
+    json_albums = _load_json_albums(file)
+
+    table = Table("Records", "Formatted log (s)", "Structured log (s)", "Speedup")
+    for records in size:
+        sample = list(islice(cycle(json_albums), records))
+        formatted = _best_time(
+            lambda sample=sample: [_json_to_album_formatting_log(json_album) for json_album in sample], repeat
+        )
+        structured = _best_time(lambda sample=sample: json_to_albums(sample), repeat)
+        table.add_row(
+            str(records),
+            f"{formatted:.4f}",
+            f"{structured:.4f}",
+            f"x{formatted / structured:.1f}",
+        )
+
+    console.print(table)
+
+
+@bench_app.command()
+def snapshot(file: Path = Path("data/inputs/albums.json"), repeat: int = 5):
+    """Compare catalog loading from JSON with loading from a binary snapshot."""
+    _silence_logs()
+    with tempfile.TemporaryDirectory() as folder:
+        source = Path(shutil.copy(file, folder))
+        cache = PickleAlbumSnapshotCache()
+        json_load = _best_time(lambda: LoadAlbums(LocalFileJSONReader()).load_albums(source), repeat)
+        cold_load = _best_time(lambda: LoadAlbums(LocalFileJSONReader(), cache=cache).load_albums(source), 1)
+        warm_load = _best_time(lambda: LoadAlbums(LocalFileJSONReader(), cache=cache).load_albums(source), repeat)
+
+    table = Table("JSON + pydantic (s)", "Cold, writing snapshot (s)", "Warm snapshot (s)", "Speedup")
+    table.add_row(f"{json_load:.4f}", f"{cold_load:.4f}", f"{warm_load:.4f}", f"x{json_load / warm_load:.1f}")
+    console.print(table)
+
+
+@bench_app.command()
+def enrich(albums: int = 40, latency: float = 0.05, workers: list[int] = DEFAULT_WORKERS):
+    """Measure album enrichment against stub providers answering after a fixed latency."""
+    _silence_logs()
+    catalog = [Album(album_id=str(i), title=f"Album {i}", artist="Stub Artist", year=2000) for i in range(albums)]
+
+    table = Table("Workers per provider", "Wall clock (s)", "Expected (s)", "Sequential (s)", "Speedup")
+    sequential = albums * 2 * latency
+    for max_workers in workers:
+        enrichers = _stub_enrichers(latency, max_workers)
+        use_case = EnrichAlbums(enrichers)
+        elapsed = _best_time(lambda use_case=use_case: asyncio.run(use_case.enrich_albums(catalog)), 1)
+        for enricher in enrichers:
+            enricher.close()
+        table.add_row(
+            str(max_workers),
+            f"{elapsed:.3f}",
+            f"{albums * latency / max_workers:.3f}",
+            f"{sequential:.3f}",
+            f"x{sequential / elapsed:.1f}",
+        )
+
+    console.print(table)
+
+
+@bench_app.command()
+def refresh(albums: int = 1400, latency: float = 0.01, max_workers: int = 4):
+    """Compare Spotify requests needed to refresh albums by search and by known ID."""
+    _silence_logs()
+    table = Table("Lookup", "Albums", "Spotify calls", "Wall clock (s)")
+    for lookup, external_ids in (("search", lambda i: {}), ("by ID", lambda i: {"spotify": f"id{i}"})):
+        catalog = [
+            Album(album_id=str(i), title=f"Album {i}", artist="Stub Artist", year=2000, external_ids=external_ids(i))
+            for i in range(albums)
+        ]
+        spotify = SpotifyAlbumEnricher(client_id="stub", client_secret="stub", max_workers=max_workers)  # nosec B106
+        spotify.spotify = _StubSpotifyClient(latency)
+        use_case = EnrichAlbums(
+            [spotify], provider_limits={spotify.name: max_workers * spotify.albums_batcher.max_size}
+        )
+        elapsed = _best_time(lambda use_case=use_case, catalog=catalog: asyncio.run(use_case.enrich_albums(catalog)), 1)
+        spotify.close()
+        table.add_row(lookup, str(albums), str(spotify.spotify.calls), f"{elapsed:.3f}")
+
+    console.print(table)
+
+
+@bench_app.command()
+def coalesce(
+    file: Path = Path("data/inputs/albums.json"), latency: float = 0.01, max_workers: int = 8, artists: bool = False
+):
+    """Count the album lookups saved by coalescing identical queries, and the artist lookups added if enabled."""
+    _silence_logs()
+    catalog = json_to_albums(_load_json_albums(file))
+    enrichers = _stub_enrichers(latency, max_workers)
+    use_case = EnrichAlbums(enrichers, artist_lookups=artists)
+    elapsed = _best_time(lambda: asyncio.run(use_case.enrich_albums(catalog)), 1)
+    for enricher in enrichers:
+        enricher.close()
+
+    stats = use_case.stats
+    table = Table(
+        "Albums", "Artists", "Album lookups needed", "Artist lookups", "Lookups issued", "Saved", "Wall clock (s)"
+    )
+    table.add_row(
+        str(len(catalog)),
+        str(len({album.artist for album in catalog})),
+        str(stats.requested),
+        str(stats.artist_lookups.calls),
+        str(stats.issued),
+        f"{stats.saved} ({stats.saved / stats.requested:.0%})" if stats.requested else "0",
+        f"{elapsed:.3f}",
+    )
+    console.print(table)
+
+
+def _dump_merge(album: Album, results: list[ProviderResult]) -> Album:
+    """Merge serializing every model to a dict and validating a new album, as enrichment used to."""
+    combined_metadata = album.model_dump()
+    for _, metadata, _ in results:
+        if metadata:
+            for key, value in metadata.model_dump().items():
+                if value is not None and key not in ("album_id", "pending_sources"):
+                    if isinstance(value, list) and value and isinstance(value[0], dict):
+                        combined_metadata[key] = combined_metadata.get(key) or value
+                    elif isinstance(value, list):
+                        combined_metadata[key] = list(set(combined_metadata.get(key, [])) | set(value))
+                    elif isinstance(value, dict):
+                        combined_metadata[key] = {**combined_metadata.get(key, {}), **value}
+                    else:
+                        combined_metadata[key] = value
+    for _, _, artist in results:
+        if artist:
+            combined_metadata["artist"] = artist.name
+            combined_metadata["genres"] = list(set(combined_metadata["genres"]) | set(artist.genres))
+            combined_metadata["styles"] = list(set(combined_metadata["styles"]) | set(artist.styles))
+    return Album(**combined_metadata)
+
+
+def _provider_results(enriched_album: Album) -> tuple[Album, list[ProviderResult]]:
+    """Split an enriched album into the album to enrich and the results of a Discogs and a Spotify lookup."""
+    album = Album(
+        album_id=enriched_album.album_id,
+        title=enriched_album.title,
+        artist=enriched_album.artist,
+        year=enriched_album.year,
+    )
+    spotify_album = enriched_album.model_copy(
+        update={
+            "genres": enriched_album.genres[:1] + ["Spotify"],
+            "labels": enriched_album.labels[:1],
+            "popularity": 50,
+            "external_urls": {"spotify": HttpUrl(f"https://open.spotify.com/album/{enriched_album.album_id}")},
+            "external_ids": {"spotify": enriched_album.album_id},
+        }
+    )
+    artist = Artist(name=enriched_album.artist, genres=enriched_album.genres, styles=enriched_album.styles[:1])
+    return album, [ProviderResult("discogs", enriched_album), ProviderResult("spotify", spotify_album, artist)]
+
+
+@bench_app.command()
+def merge(file: Path = Path("data/inputs/enriched_albums.json"), repeat: int = 5):
+    """Compare the per album cost of merging enrichment results through dicts with the field-wise merger."""
+    _silence_logs()
+    cases = [_provider_results(enriched_album) for enriched_album in json_to_albums(_load_json_albums(file))]
+    merger = AlbumMerger()
+
+    dump_merge = _best_time(lambda: [_dump_merge(album, results) for album, results in cases], repeat)
+    field_merge = _best_time(lambda: [merger.merge(album, results) for album, results in cases], repeat)
+
+    table = Table("Albums", "Dump + validate (µs/album)", "Field-wise (µs/album)", "Speedup")
+    table.add_row(
+        str(len(cases)),
+        f"{dump_merge / len(cases) * 1e6:.1f}",
+        f"{field_merge / len(cases) * 1e6:.1f}",
+        f"x{dump_merge / field_merge:.1f}",
+    )
+    console.print(table)
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Handler answering every request on a keep-alive connection, counting the connections opened."""
+
+    protocol_version = "HTTP/1.1"
+    # Answer in a single segment, so that keep-alive connections do not wait for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self) -> None:
+        content = b'{"results": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def _count_connections(get: Callable[[str], object], requests_count: int, threads: int) -> tuple[int, float]:
+    """Send requests to a local keep-alive server from several threads, and count the connections it accepted."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/database/search"
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            elapsed = _best_time(lambda: list(executor.map(lambda _: get(url), range(requests_count))), 1)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return server.connections, elapsed
+
+
+@bench_app.command()
+def connections(requests_count: int = 400, threads: int = 8, pool_size: int = 4):
+    """Count the connections opened, each one a TCP and TLS handshake, with and without a pooled adapter."""
+    _silence_logs()
+    adapter = PooledHTTPAdapter(pool_size=pool_size)
+    # Two sessions sharing the adapter, as the Discogs and Spotify enrichers do
+    sessions = cycle([mount_adapter(requests.Session(), adapter), mount_adapter(requests.Session(), adapter)])
+    clients = {
+        "One connection per request": requests.get,
+        "Pooled adapter, shared": lambda url: next(sessions).get(url),
+    }
+
+    table = Table("Client", "Requests", "Connections", "Requests/connection", "Wall clock (s)")
+    for client, get in clients.items():
+        opened, elapsed = _count_connections(get, requests_count, threads)
+        table.add_row(client, str(requests_count), str(opened), f"{requests_count / opened:.0f}", f"{elapsed:.3f}")
+    console.print(table)
+    console.print(f"Handshakes counted by the pooled adapter: {adapter.handshakes} for {adapter.requests} requests")
+
+
+class _SyntheticProviderAdapter(HTTPAdapter):
+    """Adapter answering Discogs and Spotify requests with responses built from the query, to record a cassette."""
+
+    def send(self, request: requests.PreparedRequest, *args: object, **kwargs: object) -> requests.Response:
+        url = urlsplit(request.url)
+        params = dict(parse_qsl(url.query))
+        identifier = int(hashlib.sha256(request.url.encode()).hexdigest()[:8], 16)
+        if url.path.endswith("/api/token"):
+            body = {"access_token": "synthetic", "token_type": "Bearer", "expires_in": 3600}
+        elif url.netloc == "api.discogs.com" and url.path == "/database/search":
+            release = {
+                "id": identifier,
+                "type": "release",
+                "title": f"Synthetic Artist - {params.get('q')}",
+                "year": "2000",
+                "genre": ["Rock"],
+            }
+            body = {"pagination": {"page": 1, "pages": 1, "per_page": 50, "items": 1}, "results": [release]}
+        elif url.netloc == "api.discogs.com" and url.path.startswith("/releases/"):
+            release_id = url.path.rsplit("/", 1)[-1]
+            body = {"id": release_id, "title": "Synthetic", "year": 2000, "artists": [{"name": "Synthetic Artist"}]}
+        elif url.path.endswith("/search") and params.get("type") == "artist":
+            artist = {"id": str(identifier), "name": params.get("q", "").removeprefix("artist:"), "genres": ["Pop"]}
+            body = {"artists": {"items": [artist]}}
+        elif url.path.endswith("/search"):
+            album = {"id": str(identifier), "name": params.get("q"), "artists": [{"name": "Synthetic Artist"}]}
+            body = {"albums": {"items": [album | {"release_date": "2000", "genres": ["Pop"]}]}}
+        elif url.path.rstrip("/").endswith("/albums"):
+            ids = params.get("ids", "").split(",")
+            body = {"albums": [{"id": id, "name": id, "artists": [{"name": "Synthetic Artist"}]} for id in ids]}
+        else:
+            return build_response(request, 404, {"Content-Type": "application/json"}, b"{}")
+        return build_response(request, 200, {"Content-Type": "application/json"}, json.dumps(body).encode())
+
+
+def _replay_enrichers(adapter: HTTPAdapter, rate: float, max_workers: int) -> list:
+    discogs = DiscogsAlbumEnricher(
+        discogs_token="replay",  # nosec B106
+        max_workers=max_workers,
+        governor=RateGovernor(DiscogsAlbumEnricher.name, rate=rate),
+        http_adapter=adapter,
+    )
+    spotify = SpotifyAlbumEnricher(
+        client_id="replay",
+        client_secret="replay",  # nosec B106
+        max_workers=max_workers,
+        governor=RateGovernor(SpotifyAlbumEnricher.name, rate=rate),
+        http_adapter=adapter,
+    )
+    return [discogs, spotify]
+
+
+async def _enrich_with_latencies(use_case: EnrichAlbums, catalog: list[Album]) -> list[float]:
+    """Enrich albums, measuring the time from the reading of each album to its first enriched version."""
+    read_at = {}
+
+    def read() -> Iterator[Album]:
+        for album in catalog:
+            read_at[album.album_id] = time.perf_counter()
+            yield album
+
+    latencies = {}
+    async for album in use_case.iter_enrich(read()):
+        latencies.setdefault(album.album_id, time.perf_counter() - read_at[album.album_id])
+    return list(latencies.values())
+
+
+@bench_app.command()
+def replay(
+    file: Path = Path("data/inputs/albums.json"),
+    cassette: Path | None = None,
+    latency: float = 0.05,
+    jitter: float = 0.05,
+    rate_limited: float = 0.0,
+    retry_after: float = 0.1,
+    seed: int = 0,
+    rate: float = 1000.0,
+    workers: int = 32,
+    max_workers: int = 8,
+    provider_limits: bool = False,
+):
+    """
+    Enrich the catalog offline, replaying provider responses from a cassette, and report throughput and tail latency.
+
+    Without --cassette, a cassette of synthetic responses is recorded first. Requests are paced at --rate requests per
+    second, and the rate limit headers of the cassette are ignored unless --provider-limits is given.
+    """
+    _silence_logs()
+    catalog = json_to_albums(_load_json_albums(file))
+    with tempfile.TemporaryDirectory() as folder:
+        if cassette is None:
+            cassette = Path(folder, "synthetic.jsonl")
+            recorder = RecordingHTTPAdapter(Cassette(cassette), _SyntheticProviderAdapter())
+            enrichers = _replay_enrichers(recorder, rate, max_workers)
+            asyncio.run(EnrichAlbums(enrichers, workers=workers).enrich_albums(catalog))
+            for enricher in enrichers:
+                enricher.close()
+
+        replayer = ReplayHTTPAdapter(
+            Cassette(cassette),
+            latency=latency,
+            jitter=jitter,
+            rate_limited=rate_limited,
+            retry_after=retry_after,
+            seed=seed,
+            rate_limit_headers=provider_limits,
+        )
+        enrichers = _replay_enrichers(replayer, rate, max_workers)
+        use_case = EnrichAlbums(enrichers, workers=workers)
+        start = time.perf_counter()
+        latencies = asyncio.run(_enrich_with_latencies(use_case, catalog))
+        elapsed = time.perf_counter() - start
+        for enricher in enrichers:
+            enricher.close()
+
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    table = Table("Albums", "Enriched", "Requests", "429s", "Misses", "Wall clock (s)", "Albums/s")
+    table.add_row(
+        str(len(catalog)),
+        str(len(latencies)),
+        str(replayer.requests),
+        str(replayer.throttled),
+        str(replayer.misses),
+        f"{elapsed:.2f}",
+        f"{len(latencies) / elapsed:.1f}",
+    )
+    console.print(table)
+    table = Table("Latency p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)")
+    table.add_row(
+        *(f"{value * 1000:.0f}" for value in (percentiles[49], percentiles[94], percentiles[98], max(latencies)))
+    )
+    console.print(table)
+
+
+@bench_app.command()
+def store(
+    file: Path = Path("data/inputs/enriched_albums.json"),
+    size: list[int] = DEFAULT_SIZES,
+    batch_size: int = 500,
+    tracks: int = 10,
+    max_one_by_one: int = 10_000,
+):
+    """Compare storing albums one by one, in bulk in a single transaction, and storing them again unchanged."""
+    _silence_logs()
+    tracklist = [Track(position=position, title=f"Track {position}", duration=240) for position in range(1, tracks + 1)]
+    enriched_albums = [
+        album.model_copy(update={"tracklist": album.tracklist or tracklist})
+        for album in json_to_albums(_load_json_albums(file))
+    ]
+
+    table = Table(
+        "Albums", "Tracks", "One by one (albums/s)", "Bulk (albums/s)", "Speedup", "Unchanged (albums/s)", "Rewritten"
+    )
+    for records in size:
+        albums = islice(cycle(enriched_albums), records)
+        sample = [album.model_copy(update={"album_id": str(i)}) for i, album in enumerate(albums)]
+        with tempfile.TemporaryDirectory() as folder:
+            one_by_one = None
+            if records <= max_one_by_one:
+                repository = DatabaseAlbumPersistence(db_url=f"sqlite:///{folder}/one_by_one.db")
+                repository.initialize()
+                one_by_one = _best_time(lambda sample=sample: [repository.add_album(album) for album in sample], 1)
+                repository._engine.dispose()
+            repository = DatabaseAlbumPersistence(db_url=f"sqlite:///{folder}/bulk.db")
+            repository.initialize()
+            bulk = _best_time(lambda sample=sample: repository.add_albums(sample, batch_size=batch_size), 1)
+            # Storing the same catalog again only compares content hashes, without writing any row
+            written = []
+            unchanged = _best_time(
+                lambda sample=sample: written.append(repository.add_albums(sample, batch_size=batch_size)), 1
+            )
+            repository._engine.dispose()
+        table.add_row(
+            str(records),
+            str(sum(len(album.tracklist) for album in sample)),
+            f"{records / one_by_one:.0f}" if one_by_one else "-",
+            f"{records / bulk:.0f}",
+            f"x{one_by_one / bulk:.1f}" if one_by_one else "-",
+            f"{records / unchanged:.0f}",
+            str(written[0]),
+        )
+    console.print(table)
+
+
+def _read_albums(
+    repository: DatabaseAlbumPersistence, albums: list[Album], operations: int, threads: int, writer: bool
+) -> tuple[float, list[float], int]:
+    """Looks albums up by ID and searches them by title from several threads, while an album is rewritten."""
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def read(thread: int) -> None:
+        nonlocal errors
+        for i in range(thread, operations, threads):
+            album = albums[hashlib.sha256(str(i).encode()).digest()[0] * len(albums) // 256]
+            start = time.perf_counter()
+            try:
+                if i % 2:
+                    repository.search_albums(album.title.split()[0], top_k=5)
+                else:
+                    repository.get_album_by_id(album.album_id)
+            except Exception:
+                with lock:
+                    errors += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    def write() -> None:
+        while not done.is_set():
+            try:
+                repository.update_album(albums[0].album_id, albums[0])
+            except Exception:
+                continue
+
+    writer_thread = threading.Thread(target=write, daemon=True) if writer else None
+    if writer_thread:
+        writer_thread.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(read, range(threads)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    if writer_thread:
+        writer_thread.join()
+    return elapsed, latencies, errors
+
+
+@bench_app.command()
+def read(
+    file: Path = Path("data/inputs/enriched_albums.json"),
+    records: int = 10_000,
+    operations: int = 4_000,
+    threads: list[int] = DEFAULT_WORKERS,
+    writer: bool = True,
+):
+    """Compare album lookups and searches on SQLite with its default settings and with the tuned pragmas."""
+    _silence_logs()
+    albums = islice(cycle(json_to_albums(_load_json_albums(file))), records)
+    sample = [album.model_copy(update={"album_id": str(i)}) for i, album in enumerate(albums)]
+    configurations = {"SQLite defaults": {}, "Tuned pragmas": None}
+
+    table = Table("Configuration", "Threads", "Operations/s", "p50 (ms)", "p99 (ms)", "Errors")
+    with tempfile.TemporaryDirectory() as folder:
+        for number, (name, pragmas) in enumerate(configurations.items()):
+            repository = DatabaseAlbumPersistence(db_url=f"sqlite:///{folder}/{number}.db", sqlite_pragmas=pragmas)
+            repository.initialize()
+            repository.add_albums(sample)
+            for workers in threads:
+                elapsed, latencies, errors = _read_albums(repository, sample, operations, workers, writer)
+                quantiles = statistics.quantiles(latencies, n=100)
+                table.add_row(
+                    name,
+                    str(workers),
+                    f"{len(latencies) / elapsed:.0f}",
+                    f"{quantiles[49] * 1000:.2f}",
+                    f"{quantiles[98] * 1000:.2f}",
+                    str(errors),
+                )
+            repository._engine.dispose()
+    console.print(table)
+
+
+@bench_app.command()
+def search(
+    file: Path = Path("data/inputs/enriched_albums.json"),
+    records: int = 100_000,
+    queries: int = 500,
+    top_k: int = 5,
+):
+    """Compare searching albums with LIKE patterns and with the FTS5 full-text index, in SQLite."""
+    _silence_logs()
+    albums = islice(cycle(json_to_albums(_load_json_albums(file))), records)
+    # Each copy of the catalog gets a made-up word in its title, so that each query finds a single album
+    sample = []
+    for i, album in enumerate(albums):
+        word = hashlib.sha256(str(i).encode()).hexdigest()[:6]
+        sample.append(album.model_copy(update={"album_id": str(i), "title": f"{album.title} {word}"}))
+    searched = sample[:: max(1, len(sample) // queries)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        repository = DatabaseAlbumPersistence(db_url=f"sqlite:///{folder}/bench.db")
+        repository.initialize()
+        start = time.perf_counter()
+        repository.add_albums(sample)
+        console.print(f"Stored {records} albums in {time.perf_counter() - start:.1f}s")
+
+        connection = repository._engine.connect()
+        with repository._session_class() as session:
+            common_terms = repository._common_search_terms(session)
+        methods = {
+            "LIKE pattern on title": lambda album: repository._search_albums_by_pattern(album.title, top_k),
+            "FTS5 + BM25, all words, index only": lambda album: connection.execute(
+                text(f"{SEARCH_QUERY} ORDER BY rank LIMIT {top_k}"),
+                {"match": _parse_search_query(f"{album.artist} {album.title}")[0]},
+            ).all(),
+            "FTS5 + BM25, common words left out, index only": lambda album: connection.execute(
+                text(f"{SEARCH_QUERY} ORDER BY rank LIMIT {top_k}"),
+                {"match": _parse_search_query(f"{album.artist} {album.title}", common_terms)[0]},
+            ).all(),
+            "FTS5 + BM25, albums": lambda album: repository.search_albums(f"{album.artist} {album.title}", top_k),
+        }
+        table = Table("Search", "Queries", "Found", "p50 (ms)", "p99 (ms)")
+        for name, method in methods.items():
+            latencies, found = [], 0
+            for album in searched:
+                start = time.perf_counter()
+                found += bool(method(album))
+                latencies.append(time.perf_counter() - start)
+            quantiles = statistics.quantiles(latencies, n=100)
+            table.add_row(
+                name, str(len(searched)), str(found), f"{quantiles[49] * 1000:.3f}", f"{quantiles[98] * 1000:.3f}"
+            )
+        connection.close()
+        repository._engine.dispose()
+    console.print(table)
+
+
+@bench_app.command()
+def metadata(
+    file: Path = Path("data/inputs/enriched_albums.json"),
+    records: int = 100_000,
+    queries: int = 200,
+    top_k: int = 5,
+):
+    """Measure searching albums by genre, style, label and year through the tag tables, in SQLite."""
+    _silence_logs()
+    albums = islice(cycle(json_to_albums(_load_json_albums(file))), records)
+    sample = [album.model_copy(update={"album_id": str(i)}) for i, album in enumerate(albums)]
+    criteria = {
+        "Common genre": {"genres": "Rock"},
+        "Genre + style + decade": {"genres": "Rock", "styles": "Prog Rock", "year": (1970, 1979)},
+        "Rare style": {"styles": "Progressive Metal", "year": (2000, None)},
+        "Genre + label": {"genres": "Jazz", "labels": "Blue Note"},
+        "No match": {"genres": "Rock", "styles": "Bebop"},
+    }
+
+    with tempfile.TemporaryDirectory() as folder:
+        repository = DatabaseAlbumPersistence(db_url=f"sqlite:///{folder}/bench.db")
+        repository.initialize()
+        start = time.perf_counter()
+        repository.add_albums(sample)
+        console.print(f"Stored {records} albums in {time.perf_counter() - start:.1f}s")
+
+        table = Table("Criteria", "Queries", "Found", "p50 (ms)", "p99 (ms)")
+        for name, metadata in criteria.items():
+            latencies, found = [], 0
+            for _ in range(queries):
+                start = time.perf_counter()
+                found = len(repository.search_albums_by_metadata(metadata, top_k=top_k))
+                latencies.append(time.perf_counter() - start)
+            quantiles = statistics.quantiles(latencies, n=100)
+            table.add_row(name, str(queries), str(found), f"{quantiles[49] * 1000:.3f}", f"{quantiles[98] * 1000:.3f}")
+        repository._engine.dispose()
+    console.print(table)
+
+
+def _count_facets(albums: list[Album]) -> dict[str, Counter]:
+    """Counts albums by facet from the albums themselves, as a browse page would without facet counts."""
+    facets = {name: Counter() for name in ("genres", "styles", "labels", "decades", "countries")}
+    for album in albums:
+        facets["genres"].update(album.genres)
+        facets["styles"].update(album.styles)
+        facets["labels"].update(album.labels)
+        if album.year:
+            facets["decades"][f"{album.year // 10 * 10}s"] += 1
+        if album.country:
+            facets["countries"][album.country] += 1
+    return facets
+
+
+@bench_app.command()
+def facets(file: Path = Path("data/inputs/enriched_albums.json"), records: int = 100_000, repeat: int = 5):
+    """Compare counting albums by facet from all the albums, from the facet counts, and for a filter."""
+    _silence_logs()
+    albums = islice(cycle(json_to_albums(_load_json_albums(file))), records)
+    sample = [album.model_copy(update={"album_id": str(i)}) for i, album in enumerate(albums)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        repository = DatabaseAlbumPersistence(db_url=f"sqlite:///{folder}/bench.db")
+        repository.initialize()
+        start = time.perf_counter()
+        repository.add_albums(sample)
+        console.print(f"Stored {records} albums in {time.perf_counter() - start:.1f}s")
+        # Stores a tenth of the albums again with other genres, so that counts are updated as well
+        changed = [album.model_copy(update={"genres": ["Jazz"]}) for album in sample[::10]]
+        repository.add_albums(changed)
+
+        methods = {
+            "Decode all albums": lambda: _count_facets(repository.get_albums()),
+            "Facet counts": lambda: repository.get_facets(),
+            "Counted from albums": lambda: repository.get_facets({"year": (None, None)}),
+            "Filter: Rock, 1970s": lambda: repository.get_facets({"genres": "Rock", "year": (1970, 1979)}),
+            "Filter: Progressive Metal": lambda: repository.get_facets({"styles": "Progressive Metal"}),
+        }
+        table = Table("Facets", "Time (ms)")
+        for name, method in methods.items():
+            table.add_row(name, f"{_best_time(method, repeat) * 1000:.2f}")
+        consistent = repository.get_facets() == repository.get_facets({"year": (None, None)})
+        repository._engine.dispose()
+    console.print(table)
+    console.print(f"Facet counts match the albums: {consistent}")
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@bench_app.command()
+def stream(file: Path = Path("data/inputs/enriched_albums.json"), records: int = 20_000, batch_size: int = 500):
+    """Compare counting and reading all albums at once, as before, with COUNT(*) and streaming by batches."""
+    _silence_logs()
+    albums = islice(cycle(json_to_albums(_load_json_albums(file))), records)
+    sample = [album.model_copy(update={"album_id": str(i)}) for i, album in enumerate(albums)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        repository = DatabaseAlbumPersistence(db_url=f"sqlite:///{folder}/bench.db")
+        repository.initialize()
+        repository.add_albums(sample)
+
+        def count_all() -> int:
+            with repository._session_class() as session:
+                return len(session.query(AlbumEntity).all())
+
+        def read_all() -> None:
+            with repository._session_class() as session:
+                for album in [_entity_to_domain(entity) for entity in session.query(AlbumEntity).all()]:
+                    pass
+
+        def read_stream() -> None:
+            for album in repository.iter_albums(batch_size=batch_size):
+                pass
+
+        methods = {
+            "Count, loading all albums": count_all,
+            "Count, COUNT(*)": repository.get_number_albums,
+            "Read all albums at once": read_all,
+            f"Stream by batches of {batch_size}": read_stream,
+        }
+        table = Table("Method", "Albums", "Time (s)", "Peak memory (MiB)")
+        for name, method in methods.items():
+            elapsed = _best_time(method, 1)
+            table.add_row(name, str(records), f"{elapsed:.3f}", f"{_peak_memory(method) / 2**20:.1f}")
+        repository._engine.dispose()
+    console.print(table)
+
+
+@bench_app.command()
+def loading(file: Path = Path("data/inputs/enriched_albums.json"), records: int = 2_000, lookups: int = 500):
+    """Compare the ways of loading tracklists, when listing albums and when looking albums up one by one."""
+    _silence_logs()
+    albums = islice(cycle(json_to_albums(_load_json_albums(file))), records)
+    sample = [album.model_copy(update={"album_id": str(i)}) for i, album in enumerate(albums)]
+
+    table = Table("Loading", "List albums (s)", "Statements", f"{lookups} lookups (s)", "Statements")
+    with tempfile.TemporaryDirectory() as folder:
+        for strategy in LOADING_STRATEGIES:
+            repository = DatabaseAlbumPersistence(
+                db_url=f"sqlite:///{folder}/{strategy}.db", list_loading=strategy, single_loading=strategy
+            )
+            repository.initialize()
+            repository.add_albums(sample)
+            statements = []
+            event.listen(repository._engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+            listed = _best_time(repository.get_albums, 1)
+            listing_statements = len(statements)
+            statements.clear()
+            looked_up = _best_time(
+                lambda repository=repository: [repository.get_album_by_id(str(i)) for i in range(lookups)], 1
+            )
+            table.add_row(strategy, f"{listed:.3f}", str(listing_statements), f"{looked_up:.3f}", str(len(statements)))
+            repository._engine.dispose()
+    console.print(table)
@@ -0,0 +1,124 @@
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TextIO
+
+import structlog
+from pydantic import ValidationError
+
+from localllm.domain.multimedia import Album
+from localllm.domain.ports.persistence import AlbumCheckpoint
+
+logger = structlog.getLogger()
+
+
+class JSONLAlbumCheckpoint(AlbumCheckpoint):
+    """
+    Checkpoint of processed albums, stored as a JSON Lines file.
+
+    Each album is written on its own line and flushed as soon as it is recorded, so a crash only
+    loses the album being written. A partially written last line is ignored when reading and
+    removed before recording new albums. An album recorded again, once its missing metadata has been
+    filled in, supersedes its previous records.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initializes the checkpoint.
+
+        :param path: Path, the JSON Lines file holding the recorded albums
+        """
+        self.path = path
+        self._file: TextIO | None = None
+
+    def _lines(self) -> Iterator[tuple[int, str]]:
+        try:
+            with open(self.path, encoding="utf-8") as checkpoint:
+                yield from enumerate(checkpoint, start=1)
+        except FileNotFoundError:
+            return
+
+    def _records(self) -> Iterator[tuple[int, Album]]:
+        for number, line in self._lines():
+            if not line.strip():
+                continue
+            try:
+                yield number, Album.model_validate_json(line)
+            except ValidationError as e:
+                logger.warning(f"Ignoring unreadable line {number} of checkpoint {self.path}: {e.errors()[0]['msg']}")
+
+    def iter_albums(self) -> Iterator[Album]:
+        """
+        Reads the recorded albums one at a time, in the order they were recorded.
+
+        Only the last record of an album recorded several times is read.
+
+        :return: Iterator[Album], the recorded albums
+        """
+        latest = {album.album_id: number for number, album in self._records()}
+        # Records are read again rather than kept, to hold a single album in memory at a time
+        for number, album in self._records():
+            if latest[album.album_id] == number:
+                yield album
+
+    def album_ids(self) -> set[str]:
+        """
+        Retrieves the IDs of the albums already recorded in the checkpoint.
+
+        :return: set[str], the IDs of the recorded albums
+        """
+        return {album.album_id for _, album in self._records()}
+
+    def _open(self) -> TextIO:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._drop_partial_line()
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _drop_partial_line(self) -> None:
+        """Truncates a last line left incomplete by an interrupted run."""
+        try:
+            with open(self.path, "rb+") as checkpoint:
+                size = checkpoint.seek(0, os.SEEK_END)
+                if size == 0:
+                    return
+                checkpoint.seek(size - 1)
+                if checkpoint.read(1) == b"\n":
+                    return
+                checkpoint.seek(0)
+                end = checkpoint.read().rfind(b"\n") + 1
+                logger.warning(f"Removing incomplete last line of checkpoint {self.path}")
+                checkpoint.truncate(end)
+        except FileNotFoundError:
+            return
+
+    def append(self, album: Album) -> None:
+        """
+        Records a processed album and flushes it to disk.
+
+        :param album: Album, the processed album
+        :return: None
+        """
+        checkpoint = self._open()
+        checkpoint.write(album.model_dump_json() + "\n")
+        checkpoint.flush()
+
+    def reset(self) -> None:
+        """
+        Removes every recorded album.
+
+        :return: None
+        """
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """
+        Closes the checkpoint file.
+
+        :return: None
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,23 +1,28 @@
 import json
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import structlog
 
 from localllm.domain.multimedia import Album
 from localllm.domain.ports.fetchers import AlbumFileReader
+from localllm.infra.spi.persistence.file.streams import iter_json_array
 
 logger = structlog.getLogger()
 
+LMS_ALBUMS_PATH = ("result", "albums_loop")
+ENRICHED_FIELDS = ("tracklist", "credits", "popularity", "external_urls", "external_ids", "pending_sources")
 
-def json_to_album(json_album: dict) -> Album:
+
+def _json_album_fields(json_album: dict) -> dict:
     """
-    Converts a JSON album to an Album object.
+    Maps a raw JSON album (LMS export or enriched snapshot) to Album fields.
+
+    Metadata found by enrichment, such as external IDs, is kept when present.
 
     :param json_album: dict, the JSON album
-    :return: Album, the Album object
+    :return: dict, the Album fields
     """
-    logger.debug(f"Converting JSON album {json_album}")
-
     if "id" in json_album:
         album_id = str(json_album["id"])
     elif "album_id" in json_album:
@@ -31,16 +36,39 @@ def json_to_album(json_album: dict) -> Album:
         title = json_album["title"]
     else:
         title = ""
-    return Album(
-        album_id=album_id,
-        title=title,
-        artist=json_album["artist"],
-        year=json_album["year"],
-        genres=json_album["genres"] if "genres" in json_album else [],
-        styles=json_album["styles"] if "styles" in json_album else [],
-        labels=json_album["labels"] if "labels" in json_album else [],
-        country=json_album["country"] if "country" in json_album else "",
-    )
+    fields = {
+        "album_id": album_id,
+        "title": title,
+        "artist": json_album["artist"],
+        "year": json_album["year"],
+        "genres": json_album.get("genres", []),
+        "styles": json_album.get("styles", []),
+        "labels": json_album.get("labels", []),
+        "country": json_album.get("country", ""),
+    }
+    fields.update({field: json_album[field] for field in ENRICHED_FIELDS if json_album.get(field) is not None})
+    return fields
+
+
+def json_to_album(json_album: dict) -> Album:
+    """
+    Converts a JSON album to an Album object.
+
+    :param json_album: dict, the JSON album
+    :return: Album, the Album object
+    """
+    logger.debug("Converting JSON album", json_album=json_album)
+    return Album.model_validate(_json_album_fields(json_album))
+
+
+def json_to_albums(json_albums: Iterable[dict]) -> list[Album]:
+    """
+    Converts a batch of JSON albums to Album objects.
+
+    :param json_albums: Iterable[dict], the JSON albums
+    :return: list[Album], the Album objects
+    """
+    return [json_to_album(json_album) for json_album in json_albums]
 
 
 class LocalFileJSONReader(AlbumFileReader):
@@ -64,7 +92,33 @@ class LocalFileJSONReader(AlbumFileReader):
                 else:
                     json_albums = data["result"]["albums_loop"]
 
-                return [json_to_album(json_album) for json_album in json_albums]
+                return json_to_albums(json_albums)
+        except FileNotFoundError as e:
+            logger.error(f"File not found: {path}")
+            raise e
+
+    def iter_read(self, path: Path) -> Iterator[Album]:
+        """
+        Reads albums from a JSON file incrementally.
+
+        The albums array (either the root list or the ``result.albums_loop`` of an LMS export) is
+        parsed item by item, so memory usage does not depend on the size of the file.
+
+        :param path: Path, the path to the JSON file
+        :return: Iterator[Album], the albums read from the JSON file, one at a time
+        """
+        logger.debug(f"Streaming albums from {path}")
+
+        try:
+            with open(path) as json_document:
+                first_char = json_document.read(1)
+                while first_char.isspace():
+                    first_char = json_document.read(1)
+                json_document.seek(0)
+
+                albums_path = () if first_char == "[" else LMS_ALBUMS_PATH
+                for json_album in iter_json_array(json_document, path=albums_path):
+                    yield json_to_album(json_album)
         except FileNotFoundError as e:
             logger.error(f"File not found: {path}")
             raise e
@@ -1,9 +1,13 @@
 import json
+import textwrap
+from collections.abc import Iterable
 from pathlib import Path
 
 from localllm.domain.multimedia import Album
 from localllm.domain.ports.persistence import AlbumFileStorage
 
+INDENT = 4
+
 
 class JSONAlbumFileStorage(AlbumFileStorage):
     """
@@ -12,13 +16,22 @@ class JSONAlbumFileStorage(AlbumFileStorage):
     This class is responsible for storing albums to a JSON file.
     """
 
-    def save(self, path: Path, albums: list[Album]) -> None:
+    def save(self, path: Path, albums: Iterable[Album]) -> None:
         """
         Saves albums to a JSON file.
 
+        Albums are written one at a time, so a stream of albums is never held in memory. The
+        file has the same layout as an indented ``json.dump`` of the whole list.
+
         :param path: Path, the path to the file
-        :param albums: list[Album], the albums to be saved
+        :param albums: Iterable[Album], the albums to be saved, either a list or a stream
         :return: None
         """
         with open(path, "w") as json_file:
-            json.dump([album.model_dump(mode="json") for album in albums], json_file, indent=4)
+            json_file.write("[")
+            separator = "\n"
+            for album in albums:
+                json_file.write(separator)
+                json_file.write(textwrap.indent(json.dumps(album.model_dump(mode="json"), indent=INDENT), " " * INDENT))
+                separator = ",\n"
+            json_file.write("\n]" if separator != "\n" else "]")
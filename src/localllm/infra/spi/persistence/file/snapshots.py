@@ -0,0 +1,146 @@
+import hashlib
+import mmap
+import os
+import pickle  # nosec B403 - snapshots are only written by this application
+import tempfile
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+import pydantic
+import structlog
+
+from localllm.domain.multimedia import Album
+from localllm.domain.ports.persistence import AlbumCatalogCache
+
+logger = structlog.getLogger()
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = ".snapshot"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class SourceFingerprint:
+    """
+    Identity of a source file at a given point in time.
+
+    Attributes:
+    - path: str, absolute path of the source file
+    - size: int, size of the file in bytes
+    - mtime_ns: int, last modification time in nanoseconds
+    - digest: str, hash of the file content.
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+@cache
+def _schema_digest() -> str:
+    """Hash of the Album schema, so snapshots are invalidated when the domain model changes."""
+    schema = str(Album.model_json_schema()).encode()
+    return hashlib.blake2b(schema, digest_size=16).hexdigest()
+
+
+def _content_digest(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as source:
+        while chunk := source.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(path: Path) -> SourceFingerprint:
+    stat = path.stat()
+    return SourceFingerprint(
+        path=str(path.absolute()), size=stat.st_size, mtime_ns=stat.st_mtime_ns, digest=_content_digest(path)
+    )
+
+
+def snapshot_path(source: Path) -> Path:
+    """
+    Returns the path of the snapshot associated to a source file.
+
+    :param source: Path, the source file
+    :return: Path, the snapshot file, next to the source file
+    """
+    return source.with_name(source.name + SNAPSHOT_SUFFIX)
+
+
+class PickleAlbumSnapshotCache(AlbumCatalogCache):
+    """
+    Binary snapshot of a validated album catalog.
+
+    The snapshot is stored next to the source file and holds a header (format version, Album
+    schema and source fingerprint) followed by the pickled albums, restored by pydantic without
+    validating them again. It is memory-mapped on load and only used when the source file still
+    matches the fingerprint.
+    """
+
+    def _metadata(self) -> dict:
+        return {"version": SNAPSHOT_VERSION, "pydantic": pydantic.VERSION, "schema": _schema_digest()}
+
+    def _is_valid(self, header: dict, source: Path) -> bool:
+        if not isinstance(header, dict) or header.get("metadata") != self._metadata():
+            return False
+
+        stored = header.get("source")
+        stat = source.stat()
+        if not isinstance(stored, SourceFingerprint) or (stored.path, stored.size, stored.mtime_ns) != (
+            str(source.absolute()),
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            return False
+        return stored.digest == _content_digest(source)
+
+    def load(self, source: Path) -> list[Album] | None:
+        """
+        Loads the albums of a source file from its snapshot.
+
+        :param source: Path, the source file
+        :return: list[Album], the albums or None if there is no valid snapshot
+        """
+        path = snapshot_path(source)
+        try:
+            with open(path, "rb") as snapshot, mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if not self._is_valid(pickle.load(data), source):  # nosec B301
+                    logger.info(f"Snapshot {path} is outdated")
+                    return None
+                albums = pickle.load(data)  # nosec B301
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, EOFError, AttributeError, pickle.UnpicklingError) as e:
+            logger.warning(f"Unable to read snapshot {path}: {e}")
+            return None
+
+        logger.info(f"{len(albums)} albums loaded from snapshot {path}")
+        return albums
+
+    def save(self, source: Path, albums: list[Album]) -> None:
+        """
+        Writes a snapshot of the albums read from a source file.
+
+        :param source: Path, the source file
+        :param albums: list[Album], the albums read from the source file
+        :return: None
+        """
+        path = snapshot_path(source)
+        header = {"metadata": self._metadata(), "source": _fingerprint(source)}
+        temporary_path = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, delete=False) as snapshot:
+                temporary_path = snapshot.name
+                pickle.dump(header, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(albums, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except OSError as e:
+            logger.warning(f"Unable to write snapshot {path}: {e}")
+            if temporary_path:
+                Path(temporary_path).unlink(missing_ok=True)
+            return
+
+        logger.info(f"Snapshot of {len(albums)} albums written to {path}")
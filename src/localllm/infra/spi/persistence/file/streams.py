@@ -0,0 +1,149 @@
+import json
+from collections.abc import Iterator
+from typing import TextIO
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+
+
+class JSONStreamError(ValueError):
+    """
+    Exception raised when a JSON stream does not have the expected structure.
+    """  # noqa: D200
+
+    pass
+
+
+class _JSONStreamScanner:
+    """
+    Minimal pull scanner over a JSON text stream.
+
+    It only keeps the current chunk (plus the value being decoded) in memory, so arbitrarily
+    large arrays can be walked item by item.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Returns the next non whitespace character without consuming it.
+
+        :return: str, the next character or an empty string at end of stream
+        """
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ""
+
+    def expect(self, token: str) -> None:
+        """
+        Consumes the given structural character.
+
+        :param token: str, the expected character
+        :raise JSONStreamError: if another character is found
+        """
+        current = self.peek()
+        if current != token:
+            raise JSONStreamError(f"Expected '{token}' but found '{current or 'EOF'}'")
+        self._position += 1
+
+    def value(self):
+        """
+        Decodes the next JSON value from the stream.
+
+        :return: the decoded value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError as e:
+                if not self._fill():
+                    raise JSONStreamError(f"Invalid JSON value: {e}") from e
+                continue
+            # A value ending exactly at the buffer boundary may be truncated (e.g. a number).
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+    def items(self) -> Iterator:
+        """
+        Iterates over the items of the array starting at the current position.
+
+        :return: Iterator, the decoded items
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.expect("]")
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.expect(",")
+                continue
+            self.expect("]")
+            return
+
+    def enter(self, key: str) -> bool:
+        """
+        Moves the scanner to the value of the given key in the object starting at the current position.
+
+        Values of other keys are decoded and discarded.
+
+        :param key: str, the key to look for
+        :return: bool, True if the key was found
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            return False
+        while True:
+            current_key = self.value()
+            self.expect(":")
+            if current_key == key:
+                return True
+            self.value()
+            if self.peek() != ",":
+                self.expect("}")
+                return False
+            self.expect(",")
+
+
+def iter_json_array(stream: TextIO, path: tuple[str, ...] = (), chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator:
+    """
+    Iterates over the items of a JSON array without loading the whole document.
+
+    :param stream: TextIO, the stream containing the JSON document
+    :param path: tuple[str, ...], keys leading to the array from the root object (empty if the
+        root is the array itself)
+    :param chunk_size: int, number of characters read at once from the stream
+    :return: Iterator, the decoded items of the array
+    :raise JSONStreamError: if the path does not lead to an array
+    """
+    scanner = _JSONStreamScanner(stream, chunk_size=chunk_size)
+    for key in path:
+        if scanner.peek() != "{" or not scanner.enter(key):
+            raise JSONStreamError(f"Key '{key}' not found in JSON document")
+    if scanner.peek() != "[":
+        raise JSONStreamError("JSON value is not an array")
+    yield from scanner.items()
@@ -1,16 +1,104 @@
+import hashlib
+import json
+import re
+from collections.abc import Iterable, Iterator
 from datetime import datetime
+from itertools import batched
+from types import ModuleType
 
 import structlog
+from sqlalchemy import (
+    Column,
+    Connection,
+    Engine,
+    Select,
+    String,
+    bindparam,
+    cast,
+    delete,
+    event,
+    func,
+    literal,
+    make_url,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine.interfaces import DBAPIConnection
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel, create_engine
+from sqlalchemy.orm import Session, aliased, joinedload, lazyload, selectinload, sessionmaker, subqueryload
+from sqlalchemy.pool import ConnectionPoolEntry
+from sqlmodel import create_engine
 
 from localllm.domain.multimedia import Album, Track
-from localllm.domain.ports.persistence import AlbumRepository
-from localllm.infra.spi.persistence.repository.models import AlbumEntity, TrackEntity
+from localllm.domain.ports.persistence import DEFAULT_BATCH_SIZE, AlbumRepository
+from localllm.infra.spi.persistence.repository.migrations import (
+    ALBUM_SEARCH_REFRESH,
+    ALBUM_SEARCH_TABLE,
+    ALBUM_SEARCH_TERMS_TABLE,
+    FACET_TABLE,
+    migrate,
+)
+from localllm.infra.spi.persistence.repository.models import (
+    COUNTRY,
+    DECADE,
+    GENRE,
+    LABEL,
+    STYLE,
+    AlbumEntity,
+    AlbumTagEntity,
+    TagEntity,
+    TrackEntity,
+)
 
 logger = structlog.getLogger(__name__)
 
+# Write-ahead log so that readers never wait for a writer, fsync at checkpoints only, reads through
+# memory-mapped I/O, and a 64 MiB page cache per connection (negative sizes are in KiB)
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+}
+# Columns of the full-text index searched by each field of a query, such as "artist:ange title:emile"
+SEARCH_FIELDS = {
+    "title": "title",
+    "artist": "artist",
+    "genre": "genres",
+    "genres": "genres",
+    "style": "styles",
+    "styles": "styles",
+    "label": "labels",
+    "labels": "labels",
+    "track": "tracks",
+    "tracks": "tracks",
+}
+# Metadata criteria looked up through tags, and through columns of the album table
+METADATA_TAGS = {"genres": GENRE, "styles": STYLE, "labels": LABEL}
+METADATA_FIELDS = ("artist", "country", "year")
+SEARCH_FIELD_PATTERN = re.compile(rf"\b({'|'.join([*SEARCH_FIELDS, 'year'])}):", re.IGNORECASE)
+# BM25 weights of the title, artist, genres, styles, labels and tracks columns
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0, 1.0, 1.0, 2.0)
+SEARCH_QUERY = (
+    f"SELECT rowid AS id, bm25({ALBUM_SEARCH_TABLE}, {', '.join(map(str, SEARCH_WEIGHTS))}) AS rank "
+    f"FROM {ALBUM_SEARCH_TABLE} WHERE {ALBUM_SEARCH_TABLE} MATCH :match"
+)
+# Words held by more albums than this share of the catalog, such as "the", barely change the BM25
+# ranking while reading their long lists of albums takes most of the lookup, so they are left out of
+# the free text searched unless the query has no other words
+COMMON_TERM_SHARE = 0.01
+COMMON_TERM_MIN_ALBUMS = 1_000
+COMMON_TERMS_QUERY = f"SELECT term FROM {ALBUM_SEARCH_TERMS_TABLE} WHERE doc > :albums"
+INDEX_SEARCH_QUERY = f"{ALBUM_SEARCH_REFRESH} WHERE rowid IN :ids"
+# Ways of loading the tracklist of albums: along with a list of albums by a second statement, in the
+# same statement as the albums, or album by album when first read
+LOADING_STRATEGIES = {"selectin": selectinload, "joined": joinedload, "subquery": subqueryload, "lazy": lazyload}
+# Facets of albums, by the kind of their values
+FACETS = {GENRE: "genres", STYLE: "styles", LABEL: "labels", DECADE: "decades", COUNTRY: "countries"}
+FACET_QUERY = f"SELECT kind, value, count FROM {FACET_TABLE} WHERE count > 0"
+
 
 class AlbumNotFoundError(Exception):
     """
@@ -36,34 +124,98 @@ class AlbumUpdateError(Exception):
     pass
 
 
-# Adapter to transform Album from domain model to entities model
-def _domain_to_entity(domain_album: Album) -> AlbumEntity:
-    return AlbumEntity(
-        id=None,  # Assuming the ID is auto-generated
-        album_id=domain_album.album_id,
-        title=domain_album.title,
-        artist=domain_album.artist,
-        year=domain_album.year,
-        genres=domain_album.genres,
-        styles=domain_album.styles,
-        labels=domain_album.labels,
-        country=domain_album.country,
-        tracklist=[_domain_to_entity_track(track) for track in domain_album.tracklist],
-        credits=domain_album.credits,
-        external_urls=domain_album.external_urls,
-        external_ids=domain_album.external_ids,
-    )
+# Hash of the album content stored in database, tracks included
+def _content_hash(domain_album: Album) -> str:
+    content = [
+        domain_album.album_id,
+        domain_album.title,
+        domain_album.artist,
+        domain_album.year,
+        domain_album.genres,
+        domain_album.styles,
+        domain_album.labels,
+        domain_album.country,
+        domain_album.credits,
+        {key: str(value) for key, value in domain_album.external_urls.items()},
+        domain_album.external_ids,
+        [[track.position, track.title, track.duration] for track in domain_album.tracklist],
+    ]
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+# Adapter to transform Album from domain model to a row of the album table, for bulk inserts
+def _domain_to_album_row(domain_album: Album, now: datetime) -> dict:
+    return {
+        "album_id": domain_album.album_id,
+        "title": domain_album.title,
+        "artist": domain_album.artist,
+        "year": domain_album.year,
+        "country": domain_album.country,
+        "credits": domain_album.credits,
+        "external_urls": json.dumps({key: str(value) for key, value in domain_album.external_urls.items()}),
+        "external_ids": json.dumps(domain_album.external_ids),
+        "content_hash": _content_hash(domain_album),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+# Adapter to transform the genres, styles and labels of an Album from domain model to tags, in their order
+def _domain_to_tags(domain_album: Album) -> list[tuple[str, str, int]]:
+    return [
+        (kind, name, position)
+        for kind, names in ((GENRE, domain_album.genres), (STYLE, domain_album.styles), (LABEL, domain_album.labels))
+        for position, name in enumerate(dict.fromkeys(names))
+    ]
+
+
+# Adapter to transform the tracks of an Album from domain model to rows of the track table, for bulk inserts
+def _domain_to_track_rows(domain_album: Album, album_id: int, now: datetime) -> list[dict]:
+    return [
+        {
+            "position": track.position,
+            "title": track.title,
+            "duration": track.duration,
+            "album_id": album_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for track in domain_album.tracklist
+    ]
+
+
+def _match_terms(value: str, column: str | None = None, common_terms: frozenset[str] = frozenset()) -> list[str]:
+    # Each word is quoted so that it cannot be read as an FTS5 operator. Words are not matched as
+    # prefixes, as short prefixes expand to most of the index.
+    words = list(dict.fromkeys(re.findall(r"\w+", value.lower())))
+    words = [word for word in words if word not in common_terms] or words
+    terms = [f'"{word}"' for word in words]
+    return [f"{column} : {term}" for term in terms] if column else terms
+
+
+def _parse_search_query(query: str, common_terms: frozenset[str] = frozenset()) -> tuple[str, int | None]:
+    """
+    Translates a search query into an FTS5 expression and a release year.
 
+    Words before any field are searched in every column, words after a field such as ``artist:``
+    in its column only, up to the next field. A query made of a year alone searches that year.
 
-# Adapter to transform Track from domain model to entities model
-def _domain_to_entity_track(domain_track: Track) -> TrackEntity:
-    return TrackEntity(
-        id=None,  # Assuming the ID is auto-generated
-        position=domain_track.position,
-        title=domain_track.title,
-        duration=domain_track.duration,
-        album_id=None,  # This will be set when the album is saved
-    )
+    :param query: the search query, e.g. "artist:artist_name title:album_title".
+    :param common_terms: the words left out of the words searched in every column, unless they are
+        all common.
+    :return: the FTS5 expression, empty if no words are searched, and the year searched if any.
+    """
+    text_query, *fields = SEARCH_FIELD_PATTERN.split(str(query))
+    if not fields and re.fullmatch(r"\s*\d{4}\s*", text_query):
+        return "", int(text_query)
+    terms = _match_terms(text_query, common_terms=common_terms)
+    year = None
+    for field, value in zip(fields[::2], fields[1::2], strict=True):
+        if field.lower() == "year":
+            year = int(digits.group()) if (digits := re.search(r"\d+", value)) else None
+        else:
+            terms += _match_terms(value, SEARCH_FIELDS[field.lower()])
+    return " AND ".join(terms), year
 
 
 # Adapter to transform Album from entities model to domain model
@@ -93,40 +245,195 @@ def _entity_to_domain_track(entity_track: TrackEntity) -> Track:
     )
 
 
+def _apply_pragmas(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    @event.listens_for(engine, "connect")
+    def set_pragmas(connection: DBAPIConnection, _: ConnectionPoolEntry) -> None:
+        cursor = connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
 class DatabaseAlbumPersistence(AlbumRepository):
-    def __init__(self, db_url: str):
+    def __init__(
+        self,
+        db_url: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        sqlite_pragmas: dict[str, str | int] | None = None,
+        list_loading: str = "selectin",
+        single_loading: str = "joined",
+    ):
+        """
+        Initializes the repository, with one engine and one session factory for all its methods.
+
+        :param db_url: the URL of the database.
+        :param pool_size: the number of connections kept open.
+        :param max_overflow: the number of connections opened beyond the pool size under load.
+        :param pool_timeout: the number of seconds to wait for a connection when all are busy.
+        :param sqlite_pragmas: the pragmas set on each new SQLite connection, the default ones when None.
+        :param list_loading: the way tracklists are loaded along albums listed, one of the LOADING_STRATEGIES.
+        :param single_loading: the way the tracklist of an album looked up alone is loaded, one of the
+            LOADING_STRATEGIES.
+        :raise ValueError: if a loading strategy is unknown.
+        """
+        if unknown := {list_loading, single_loading} - set(LOADING_STRATEGIES):
+            raise ValueError(f"Unknown loading strategy: {', '.join(sorted(unknown))}")
+        self._list_loading = LOADING_STRATEGIES[list_loading](AlbumEntity.tracklist)
+        self._single_loading = LOADING_STRATEGIES[single_loading](AlbumEntity.tracklist)
         logger.info(f"Connecting to database: {db_url}")
-        self._engine = create_engine(db_url, echo=False)
+        url = make_url(db_url)
+        pool_options = {}
+        # In-memory SQLite databases live in a single connection, they cannot be pooled
+        if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+            pool_options = {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout}
+        self._engine = create_engine(url, echo=False, **pool_options)
+        if url.get_backend_name() == "sqlite":
+            _apply_pragmas(self._engine, DEFAULT_SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas)
+        self._session_class = sessionmaker(self._engine)
+        self._common_terms: frozenset[str] | None = None
 
     def initialize(self) -> None:
         """
-        Initializes the database by creating all tables.
+        Initializes the database by applying the pending schema migrations, keeping stored albums.
 
         :return: None
         """
         logger.info("Initializing the database")
-        SQLModel.metadata.drop_all(self._engine, checkfirst=True)
-        SQLModel.metadata.create_all(self._engine, checkfirst=True)
+        version = migrate(self._engine)
+        logger.info(f"Database schema at version {version}")
+
+    def _upsert(self, connection: Connection, albums: Iterable[Album]) -> dict[str, int]:
+        """
+        Inserts albums with their tracks and tags, or replaces the stored ones when their content changed.
+
+        Albums are identified by their album_id. A stored album whose content hash did not change
+        is left untouched, along with its tracks and tags.
+
+        :param connection: the connection of the transaction.
+        :param albums: the albums to save.
+        :return: the database ID of the albums written, by album_id.
+        """
+        album_table, track_table = AlbumEntity.__table__, TrackEntity.__table__
+        now = datetime.utcnow()
+        # A statement cannot write the same row twice, the last version of an album wins
+        latest = {album.album_id: album for album in albums}
+        rows = [_domain_to_album_row(album, now) for album in latest.values()]
+        dialect = postgresql if self._engine.dialect.name == "postgresql" else sqlite
+        upsert = dialect.insert(album_table)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[album_table.c.album_id],
+            set_={
+                column.name: upsert.excluded[column.name]
+                for column in album_table.columns
+                if column.name not in ("id", "album_id", "created_at")
+            },
+            where=album_table.c.content_hash.is_distinct_from(upsert.excluded.content_hash),
+        ).returning(album_table.c.album_id, album_table.c.id)
+        written = dict(connection.execute(upsert, rows).all()) if rows else {}
+        if written:
+            written_albums = [album for album_id, album in latest.items() if album_id in written]
+            connection.execute(delete(track_table).where(track_table.c.album_id.in_(written.values())))
+            track_rows = [
+                row for album in written_albums for row in _domain_to_track_rows(album, written[album.album_id], now)
+            ]
+            if track_rows:
+                connection.execute(track_table.insert(), track_rows)
+            self._write_tags(connection, dialect, written_albums, written)
+            self._index_search(connection, written.values())
+            self._common_terms = None
+        return written
+
+    def _write_tags(
+        self, connection: Connection, dialect: ModuleType, albums: list[Album], album_ids: dict[str, int]
+    ) -> None:
+        """
+        Replaces the genres, styles and labels of albums, adding the tags not stored yet.
+
+        :param connection: the connection of the transaction.
+        :param dialect: the SQLAlchemy dialect of the database.
+        :param albums: the albums.
+        :param album_ids: the database ID of the albums, by album_id.
+        """
+        tag_table, album_tag_table = TagEntity.__table__, AlbumTagEntity.__table__
+        connection.execute(delete(album_tag_table).where(album_tag_table.c.album_id.in_(album_ids.values())))
+        album_tags = [(album, _domain_to_tags(album)) for album in albums]
+        tags = {(kind, name) for _, tags in album_tags for kind, name, _ in tags}
+        if not tags:
+            return
+        connection.execute(
+            dialect.insert(tag_table).on_conflict_do_nothing(index_elements=[tag_table.c.kind, tag_table.c.name]),
+            [{"kind": kind, "name": name} for kind, name in tags],
+        )
+        query = select(tag_table.c.id, tag_table.c.kind, tag_table.c.name).where(
+            tag_table.c.name.in_({name for _, name in tags})
+        )
+        tag_ids = {(kind, name): tag_id for tag_id, kind, name in connection.execute(query)}
+        connection.execute(
+            album_tag_table.insert(),
+            [
+                {"album_id": album_ids[album.album_id], "tag_id": tag_ids[kind, name], "position": position}
+                for album, tags in album_tags
+                for kind, name, position in tags
+            ],
+        )
+
+    def _index_search(self, connection: Connection, album_ids: Iterable[int]) -> None:
+        """
+        Indexes the tags and the track titles of albums for full-text search, once they are written.
+
+        :param connection: the connection of the transaction.
+        :param album_ids: the database ID of the albums.
+        """
+        if self._engine.dialect.name == "sqlite":
+            query = text(INDEX_SEARCH_QUERY).bindparams(bindparam("ids", expanding=True))
+            connection.execute(query, {"ids": list(album_ids)})
 
     def add_album(self, album: Album) -> (str, Album):
         """
-        Saves an album to the database.
+        Saves an album to the database, replacing the stored one with the same album_id if any.
 
         :param album: Album, the album to be saved
-        :return: None
+        :return: the database ID of the album and the album saved
         """
         logger.info(f"Saving album: {album.title} by {album.artist} into SQLite database")
-        session_class = sessionmaker(self._engine)
-        with session_class() as session:
-            try:
-                entity = _domain_to_entity(domain_album=album)
-                session.add(entity)
-                session.commit()
-                return entity.id, _entity_to_domain(entity)
-            except SQLAlchemyError as e:
-                session.rollback()
-                logger.error(f"Error when saving album: {e}")
-                raise AlbumSaveError("Failed to save album") from e
+        try:
+            with self._engine.begin() as connection:
+                if album.album_id not in (written := self._upsert(connection, [album])):
+                    logger.debug(f"Album {album.album_id} unchanged, nothing to save")
+                    album_table = AlbumEntity.__table__
+                    query = select(album_table.c.id).where(album_table.c.album_id == album.album_id)
+                    return connection.execute(query).scalar_one(), album
+                return written[album.album_id], album
+        except SQLAlchemyError as e:
+            logger.error(f"Error when saving album: {e}")
+            raise AlbumSaveError("Failed to save album") from e
+
+    def add_albums(self, albums: Iterable[Album], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Saves albums and their tracks to the database, in a single transaction.
+
+        Albums are upserted by batches, each batch with one multi-row statement for the albums and
+        one for their tracks, instead of one statement and one commit per album. Albums already
+        stored are replaced only when their content changed, so saving an unchanged catalog again
+        writes no row.
+
+        :param albums: Album to save, either a list or a stream.
+        :param batch_size: the number of albums written by each statement.
+        :return: int, the number of albums inserted or replaced
+        :raise AlbumSaveError: if an album could not be saved, in which case none of them is saved.
+        """
+        saved = 0
+        try:
+            with self._engine.begin() as connection:
+                for batch in batched(albums, batch_size):
+                    saved += len(self._upsert(connection, batch))
+        except SQLAlchemyError as e:
+            logger.error(f"Error when saving albums: {e}")
+            raise AlbumSaveError("Failed to save albums") from e
+        logger.info(f"Saved {saved} new or changed albums into database")
+        return saved
 
     def get_number_albums(self) -> int:
         """
@@ -135,10 +442,8 @@ class DatabaseAlbumPersistence(AlbumRepository):
         :return: int, number of albums present in database
         """
         logger.info("Getting number of albums")
-        session_class = sessionmaker(self._engine)
-        with session_class() as session:
-            results = session.query(AlbumEntity)
-            return len(results.all())
+        with self._session_class() as session:
+            return session.scalar(select(func.count()).select_from(AlbumEntity))
 
     def get_albums(self) -> list[Album]:
         """
@@ -147,10 +452,37 @@ class DatabaseAlbumPersistence(AlbumRepository):
         :return: list[Album], the list of all albums
         """
         logger.info("Retrieving all albums")
-        session_class = sessionmaker(self._engine)
-        with session_class() as session:
-            results = session.query(AlbumEntity)
-            return [_entity_to_domain(entity_album=entity) for entity in results.all()]
+        return list(self.iter_albums())
+
+    def iter_albums(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Album]:
+        """
+        Streams all albums from the database, in the order they were stored.
+
+        Albums are read by batches, each one with its own short-lived session, starting after the
+        last album of the previous batch through the primary key index rather than with an offset.
+        Only one batch is held in memory at a time, whatever the number of albums, and no
+        transaction stays open between batches while the albums are consumed.
+
+        :param batch_size: int, the number of albums read at once
+        :return: Iterator[Album], the albums
+        """
+        logger.info(f"Streaming all albums by batches of {batch_size}")
+        last_id = 0
+        while True:
+            with self._session_class() as session:
+                query = (
+                    select(AlbumEntity)
+                    .where(AlbumEntity.id > last_id)
+                    .order_by(AlbumEntity.id)
+                    .limit(batch_size)
+                    .options(self._list_loading)
+                )
+                entities = session.scalars(query).unique().all()
+                albums = [_entity_to_domain(entity_album=entity) for entity in entities]
+            yield from albums
+            if len(entities) < batch_size:
+                return
+            last_id = entities[-1].id
 
     def get_album_by_id(self, album_id: str) -> Album:
         """
@@ -160,9 +492,13 @@ class DatabaseAlbumPersistence(AlbumRepository):
         :return: Album, the album with the specified ID or None if not found
         """
         logger.info(f"Retrieving album with ID: {album_id}")
-        session_class = sessionmaker(self._engine)
-        with session_class() as session:
-            result = session.query(AlbumEntity).filter(AlbumEntity.album_id == album_id).first()
+        with self._session_class() as session:
+            result = (
+                session.query(AlbumEntity)
+                .options(self._single_loading)
+                .filter(AlbumEntity.album_id == album_id)
+                .first()
+            )
             if result:
                 return _entity_to_domain(result)
 
@@ -171,17 +507,184 @@ class DatabaseAlbumPersistence(AlbumRepository):
 
     def search_albums(self, query: str, top_k: int = 3) -> list[Album]:
         """
-        Searches for relevant albums based on a query.
+        Searches for relevant albums based on a query, the best BM25 matches first.
 
-        :param query: str, the search query on title or artist name (or both).
+        :param query: str, the search query, either free text searched in titles, artists, genres,
+            styles, labels and track titles, or words qualified by a field.
+            Example: "artist:artist_name title:album_title"
         :param top_k: int, maximum number of albums to return
         :return: list[Album], the most relevant albums
         """
         logger.info(f"Searching albums with query: {query}")
-        session_class = sessionmaker(self._engine)
-        with session_class() as session:
+        if self._engine.dialect.name != "sqlite":
+            return self._search_albums_by_pattern(str(query), top_k)
+
+        with self._session_class() as session:
+            match, year = _parse_search_query(query, self._common_search_terms(session))
+            if not match:
+                if year is None:
+                    return []
+                results = session.query(AlbumEntity).options(self._list_loading).filter(AlbumEntity.year == year)
+                results = results.order_by(AlbumEntity.id).limit(top_k)
+                return [_entity_to_domain(entity_album=entity) for entity in results]
+
+            # Only the best matches are ranked out of the index, before any album is read
+            ranked = SEARCH_QUERY + (" AND rowid IN (SELECT id FROM album WHERE year = :year)" if year else "")
+            ranked += " ORDER BY rank, id LIMIT :top_k"
+            ids = session.execute(text(ranked), {"match": match, "year": year, "top_k": top_k}).scalars().all()
+            query = select(AlbumEntity).options(self._list_loading).where(AlbumEntity.id.in_(ids))
+            entities = {entity.id: entity for entity in session.scalars(query).unique()}
+            return [_entity_to_domain(entity_album=entities[album_id]) for album_id in ids]
+
+    def _common_search_terms(self, session: Session) -> frozenset[str]:
+        """
+        Finds the words held by too many albums to be worth searching, once until albums are written.
+
+        :param session: the session of the search.
+        :return: the common words of the full-text index.
+        """
+        if self._common_terms is None:
+            albums = session.execute(select(func.count()).select_from(AlbumEntity)).scalar_one()
+            limit = max(COMMON_TERM_MIN_ALBUMS, int(albums * COMMON_TERM_SHARE))
+            terms = session.execute(text(COMMON_TERMS_QUERY), {"albums": limit}).scalars() if albums > limit else ()
+            self._common_terms = frozenset(terms)
+        return self._common_terms
+
+    def _select_by_metadata(self, session: Session, query: Select, metadata: dict) -> tuple[Select, Column] | None:
+        """
+        Restricts a query on albums to the albums matching all the metadata criteria.
+
+        The first tag searched drives the query through its index, each album found being checked
+        against the other tags through the index of album tags, then against the other criteria.
+
+        :param session: the session of the query.
+        :param query: the query selecting from the album table.
+        :param metadata: the criteria, as searched by search_albums_by_metadata.
+        :return: the restricted query and the column ordering albums as stored, None if no album can match.
+        :raise ValueError: if a criterion is unknown.
+        """
+        if unknown := set(metadata) - {*METADATA_TAGS, *METADATA_FIELDS}:
+            raise ValueError(f"Unknown album metadata: {', '.join(sorted(unknown))}")
+        tags = list(
+            dict.fromkeys(
+                (METADATA_TAGS[key], name)
+                for key, value in metadata.items()
+                if key in METADATA_TAGS
+                for name in ([value] if isinstance(value, str) else value)
+            )
+        )
+        order = AlbumEntity.id
+        if tags:
+            tag_query = select(TagEntity.kind, TagEntity.name, TagEntity.id).where(
+                TagEntity.name.in_({name for _, name in tags})
+            )
+            tag_ids = {(kind, name): tag_id for kind, name, tag_id in session.execute(tag_query)}
+            if any(tag not in tag_ids for tag in tags):
+                return None
+            first, *others = (aliased(AlbumTagEntity) for _ in tags)
+            query = query.join(first, first.album_id == AlbumEntity.id).where(first.tag_id == tag_ids[tags[0]])
+            for album_tag, tag in zip(others, tags[1:], strict=True):
+                query = query.join(
+                    album_tag, (album_tag.album_id == first.album_id) & (album_tag.tag_id == tag_ids[tag])
+                )
+            order = first.album_id
+        for key, value in metadata.items():
+            if key == "year" and isinstance(value, tuple | list):
+                earliest, latest = value
+                if earliest is not None:
+                    query = query.where(AlbumEntity.year >= earliest)
+                if latest is not None:
+                    query = query.where(AlbumEntity.year <= latest)
+            elif key in METADATA_FIELDS:
+                query = query.where(getattr(AlbumEntity, key) == value)
+        return query, order
+
+    def search_albums_by_metadata(self, metadata: dict, top_k: int = 3) -> list[Album]:
+        """
+        Searches for albums matching all the metadata criteria.
+
+        Albums are read in order from the index of the first tag searched, each one checked against
+        the other tags through the index of album tags, until enough albums match. Albums are never
+        decoded unless they match.
+
+        :param metadata: dict, the criteria: "genres", "styles" and "labels", a name or a list of
+            names the album must all have, "artist" and "country", the exact value, and "year", a year
+            or a (first, last) range where None leaves a bound open.
+            Example: {"genres": "Rock", "styles": ["Prog Rock"], "year": (1970, 1979)}
+        :param top_k: int, maximum number of albums to return
+        :return: list[Album], the matching albums, in the order they were stored
+        :raise ValueError: if a criterion is unknown.
+        """
+        logger.info(f"Searching albums with metadata: {metadata}")
+        with self._session_class() as session:
+            if (selected := self._select_by_metadata(session, select(AlbumEntity), metadata)) is None:
+                return []
+            query, order = selected
+            results = session.scalars(query.options(self._list_loading).order_by(order).limit(top_k)).unique()
+            return [_entity_to_domain(entity_album=entity) for entity in results]
+
+    def get_facets(self, metadata: dict | None = None) -> dict[str, dict[str, int]]:
+        """
+        Counts albums by genre, style, label, decade and country, in a single query.
+
+        Without criteria, the counts are read from the album_facet table, which SQLite triggers keep
+        up to date as albums and their tags are written. With criteria, the albums matching them are
+        counted through the indexes of the album and tag tables, as are all albums on databases other
+        than SQLite.
+
+        :param metadata: dict, the criteria the albums counted must match, as searched by
+            search_albums_by_metadata, all albums when None.
+            Example: {"genres": "Rock", "year": (1970, 1979)}
+        :return: dict, the number of albums of each value of the "genres", "styles", "labels",
+            "decades" and "countries" facets, the most common values first.
+            Example: {"genres": {"Rock": 1131, "Jazz": 141}, "decades": {"1970s": 237}, ...}
+        :raise ValueError: if a criterion is unknown.
+        """
+        logger.info(f"Counting albums by facet with metadata: {metadata}")
+        facets: dict[str, dict[str, int]] = {name: {} for name in FACETS.values()}
+        with self._session_class() as session:
+            if not metadata and self._engine.dialect.name == "sqlite":
+                counts = session.execute(text(FACET_QUERY)).all()
+            else:
+                query = select(AlbumEntity.id, AlbumEntity.year, AlbumEntity.country)
+                if (selected := self._select_by_metadata(session, query, metadata or {})) is None:
+                    return facets
+                albums = selected[0].cte("albums")
+                # Tags are counted by ID, their names are only read once counted
+                tag_counts = (
+                    select(AlbumTagEntity.tag_id, func.count().label("count"))
+                    .join(albums, albums.c.id == AlbumTagEntity.album_id)
+                    .group_by(AlbumTagEntity.tag_id)
+                    .subquery()
+                )
+                decade = cast(albums.c.year // 10 * 10, String).concat("s")
+                counts = session.execute(
+                    union_all(
+                        select(TagEntity.kind, TagEntity.name, tag_counts.c.count).join(
+                            tag_counts, tag_counts.c.tag_id == TagEntity.id
+                        ),
+                        select(literal(DECADE), decade, func.count()).where(albums.c.year > 0).group_by(decade),
+                        select(literal(COUNTRY), albums.c.country, func.count())
+                        .where(albums.c.country.is_not(None))
+                        .group_by(albums.c.country),
+                    )
+                ).all()
+        for kind, value, count in sorted(counts, key=lambda facet: (-facet[2], facet[1])):
+            facets[FACETS[kind]][value] = count
+        return facets
+
+    def _search_albums_by_pattern(self, query: str, top_k: int) -> list[Album]:
+        """
+        Searches for albums whose title, artist or year contains a query, without full-text index.
+
+        :param query: str, the search query.
+        :param top_k: int, maximum number of albums to return
+        :return: list[Album], the albums found
+        """
+        with self._session_class() as session:
             results = (
                 session.query(AlbumEntity)
+                .options(self._list_loading)
                 .filter(
                     AlbumEntity.title.ilike(f"%{query}%")
                     | AlbumEntity.artist.ilike(f"%{query}%")
@@ -192,37 +695,24 @@ class DatabaseAlbumPersistence(AlbumRepository):
             )
             return [_entity_to_domain(entity_album=entity) for entity in results]
 
-    def update_album(self, album_id: int, updated_album: Album) -> Album | None:
+    def update_album(self, album_id: str, updated_album: Album) -> Album | None:
         """
         Updates an existing album in the database.
 
-        :param album_id: int, the ID of the album to be updated
+        :param album_id: str, the ID of the album in our local library
         :param updated_album: Album, the updated album data
         :return: Album, the updated album or None if not found
         """
         logger.info(f"Updating album with ID: {album_id}")
-        session_class = sessionmaker(self._engine)
-        with session_class() as session:
-            try:
-                album = session.query(AlbumEntity).filter(AlbumEntity.id == album_id).first()
-                if album:
-                    album.title = updated_album.title
-                    album.artist = updated_album.artist
-                    album.year = updated_album.year
-                    album.genres = updated_album.genres
-                    album.styles = updated_album.styles
-                    album.labels = updated_album.labels
-                    album.country = updated_album.country
-                    album.tracklist = updated_album.tracklist
-                    album.credits = updated_album.credits
-                    album.external_urls = updated_album.external_urls
-                    album.external_ids = updated_album.external_ids
-                    album.updated_at = datetime.now(datetime.UTC)
-                    session.add(album)
-                    session.commit()
-                    session.refresh(album)
-                return album
-            except SQLAlchemyError as e:
-                session.rollback()
-                logger.error(f"Error updating album: {e}")
-                raise AlbumUpdateError("Failed to update album") from e
+        album_table = AlbumEntity.__table__
+        try:
+            with self._engine.begin() as connection:
+                query = select(album_table.c.id).where(album_table.c.album_id == album_id)
+                if connection.execute(query).first() is None:
+                    logger.error("Album not found")
+                    return None
+                self._upsert(connection, [updated_album.model_copy(update={"album_id": album_id})])
+        except SQLAlchemyError as e:
+            logger.error(f"Error updating album: {e}")
+            raise AlbumUpdateError("Failed to update album") from e
+        return self.get_album_by_id(album_id)
@@ -0,0 +1,369 @@
+import json
+from collections.abc import Callable
+from itertools import batched
+from typing import NamedTuple
+
+import structlog
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Engine,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+)
+
+from localllm.infra.spi.persistence.repository.models import (
+    COUNTRY,
+    DECADE,
+    GENRE,
+    LABEL,
+    STYLE,
+    SchemaVersionEntity,
+)
+
+logger = structlog.getLogger(__name__)
+
+ALBUM_SEARCH_TABLE = "album_search"
+# Number of albums holding each word of the full-text index, read from the index itself
+ALBUM_SEARCH_TERMS_TABLE = "album_search_terms"
+# Full-text index of albums, its rowid being the id of the album. Accents and case are folded, so
+# that "beyonce" finds "Beyoncé". Triggers keep it in sync with the album table. Track titles are
+# indexed by the repository once all the tracks of an album are written, as a trigger per track
+# would rewrite the indexed album once per track.
+ALBUM_SEARCH_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {ALBUM_SEARCH_TABLE} USING fts5(
+        title, artist, genres, styles, labels, tracks, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_search_album_insert AFTER INSERT ON album BEGIN
+        INSERT INTO {ALBUM_SEARCH_TABLE} (rowid, title, artist, genres, styles, labels, tracks)
+        VALUES (new.id, new.title, new.artist, new.genres, new.styles, new.labels, '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_search_album_update AFTER UPDATE ON album BEGIN
+        UPDATE {ALBUM_SEARCH_TABLE}
+        SET title = new.title, artist = new.artist, genres = new.genres, styles = new.styles, labels = new.labels
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_search_album_delete AFTER DELETE ON album BEGIN
+        DELETE FROM {ALBUM_SEARCH_TABLE} WHERE rowid = old.id;
+    END
+    """,
+]
+# Titles of the tracks of an album, in the tracks column of the full-text index
+ALBUM_SEARCH_TRACKS = (
+    "(SELECT coalesce(group_concat(track.title, ' '), '') FROM track WHERE track.album_id = {album_id})"
+)
+# Names of the tags of an album of a kind, in the genres, styles and labels columns of the full-text index
+ALBUM_SEARCH_TAGS = (
+    "(SELECT coalesce(group_concat(tag.name, ' '), '') FROM album_tag JOIN tag ON tag.id = album_tag.tag_id "
+    "WHERE album_tag.album_id = {album_id} AND tag.kind = '{kind}')"
+)
+# Indexes the tags and the tracks of albums, once they are written
+ALBUM_SEARCH_REFRESH = (
+    f"UPDATE {ALBUM_SEARCH_TABLE} SET "
+    + ", ".join(
+        f"{column} = {ALBUM_SEARCH_TAGS.format(album_id=f'{ALBUM_SEARCH_TABLE}.rowid', kind=kind)}"
+        for column, kind in (("genres", GENRE), ("styles", STYLE), ("labels", LABEL))
+    )
+    + f", tracks = {ALBUM_SEARCH_TRACKS.format(album_id=f'{ALBUM_SEARCH_TABLE}.rowid')}"
+)
+# Genres, styles and labels are no longer columns of the album table, triggers only index its own columns
+ALBUM_SEARCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER album_search_album_insert AFTER INSERT ON album BEGIN
+        INSERT INTO {ALBUM_SEARCH_TABLE} (rowid, title, artist, genres, styles, labels, tracks)
+        VALUES (new.id, new.title, new.artist, '', '', '', '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER album_search_album_update AFTER UPDATE ON album BEGIN
+        UPDATE {ALBUM_SEARCH_TABLE} SET title = new.title, artist = new.artist WHERE rowid = new.id;
+    END
+    """,
+]
+JSON_TAG_COLUMNS = {"genres": GENRE, "styles": STYLE, "labels": LABEL}
+
+FACET_TABLE = "album_facet"
+# Decade of an album, such as "1970s", unknown for the year 0
+FACET_DECADE = "({album}.year / 10 * 10) || 's'"
+# Number of albums by genre, style, label, decade and country. Triggers keep the counts up to date in
+# the transaction writing the albums and their tags, so that they stay right whatever the way albums
+# are written. A count dropping to zero is kept, for the value is likely to be counted again.
+FACET_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {FACET_TABLE} (
+        kind VARCHAR NOT NULL, value VARCHAR NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (kind, value)
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_facet_tag_insert AFTER INSERT ON album_tag BEGIN
+        INSERT INTO {FACET_TABLE} (kind, value, count) SELECT kind, name, 1 FROM tag WHERE id = new.tag_id
+        ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_facet_tag_delete AFTER DELETE ON album_tag BEGIN
+        UPDATE {FACET_TABLE} SET count = count - 1
+        WHERE (kind, value) = (SELECT kind, name FROM tag WHERE id = old.tag_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_facet_album_insert AFTER INSERT ON album BEGIN
+        INSERT INTO {FACET_TABLE} (kind, value, count) SELECT '{DECADE}', {FACET_DECADE.format(album="new")}, 1
+        WHERE new.year > 0 ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+        INSERT INTO {FACET_TABLE} (kind, value, count) SELECT '{COUNTRY}', new.country, 1
+        WHERE new.country IS NOT NULL ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_facet_album_update AFTER UPDATE OF year, country ON album
+    WHEN old.year IS NOT new.year OR old.country IS NOT new.country BEGIN
+        UPDATE {FACET_TABLE} SET count = count - 1
+        WHERE kind = '{DECADE}' AND value = {FACET_DECADE.format(album="old")};
+        UPDATE {FACET_TABLE} SET count = count - 1 WHERE kind = '{COUNTRY}' AND value = old.country;
+        INSERT INTO {FACET_TABLE} (kind, value, count) SELECT '{DECADE}', {FACET_DECADE.format(album="new")}, 1
+        WHERE new.year > 0 ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+        INSERT INTO {FACET_TABLE} (kind, value, count) SELECT '{COUNTRY}', new.country, 1
+        WHERE new.country IS NOT NULL ON CONFLICT (kind, value) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS album_facet_album_delete AFTER DELETE ON album BEGIN
+        UPDATE {FACET_TABLE} SET count = count - 1
+        WHERE kind = '{DECADE}' AND value = {FACET_DECADE.format(album="old")};
+        UPDATE {FACET_TABLE} SET count = count - 1 WHERE kind = '{COUNTRY}' AND value = old.country;
+    END
+    """,
+]
+
+# Tables as each migration creates them, whatever the later changes of the entities
+_V1 = MetaData()
+Table(
+    "album",
+    _V1,
+    Column("id", Integer, primary_key=True),
+    Column("album_id", String, nullable=False, index=True, unique=True),
+    Column("title", String, nullable=False, index=True),
+    Column("artist", String, nullable=False, index=True),
+    Column("year", Integer, nullable=False),
+    Column("genres", String, nullable=False, index=True),
+    Column("styles", String, nullable=False),
+    Column("labels", String, nullable=False),
+    Column("country", String),
+    Column("credits", String),
+    Column("external_urls", String, nullable=False),
+    Column("external_ids", String, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+Table(
+    "track",
+    _V1,
+    Column("id", Integer, primary_key=True),
+    Column("position", String, nullable=False),
+    Column("title", String, nullable=False, index=True),
+    Column("duration", String, nullable=False),
+    Column("album_id", Integer, ForeignKey("album.id")),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+_V5 = MetaData()
+Table("album", _V5, Column("id", Integer, primary_key=True))
+_V5_TAG = Table(
+    "tag",
+    _V5,
+    Column("id", Integer, primary_key=True),
+    Column("kind", String, nullable=False),
+    Column("name", String, nullable=False),
+    Index("ix_tag_kind_name", "kind", "name", unique=True),
+)
+_V5_ALBUM_TAG = Table(
+    "album_tag",
+    _V5,
+    Column("album_id", Integer, ForeignKey("album.id"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tag.id"), primary_key=True),
+    Column("position", Integer, nullable=False),
+    Index("ix_album_tag_tag_id", "tag_id", "album_id"),
+)
+
+
+class Migration(NamedTuple):
+    """A change of the database schema, applied once and recorded in the schema_version table."""
+
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _has_column(connection: Connection, table: str, column: str) -> bool:
+    return any(existing["name"] == column for existing in inspect(connection).get_columns(table))
+
+
+# Migrations must also accept databases created before the schema was versioned, which already
+# hold some of the tables and columns they create.
+def _create_album_tables(connection: Connection) -> None:
+    _V1.create_all(connection, checkfirst=True)
+
+
+def _add_album_content_hash(connection: Connection) -> None:
+    if not _has_column(connection, "album", "content_hash"):
+        connection.execute(text("ALTER TABLE album ADD COLUMN content_hash VARCHAR"))
+
+
+def _index_album_tracks(connection: Connection) -> None:
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_track_album_id ON track (album_id)"))
+
+
+def _create_album_search(connection: Connection) -> None:
+    # FTS5 is specific to SQLite, other databases search albums without a full-text index
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in ALBUM_SEARCH_SCHEMA:
+        connection.execute(text(statement))
+    connection.execute(text(f"DELETE FROM {ALBUM_SEARCH_TABLE}"))
+    connection.execute(
+        text(
+            f"""
+            INSERT INTO {ALBUM_SEARCH_TABLE} (rowid, title, artist, genres, styles, labels, tracks)
+            SELECT album.id, album.title, album.artist, album.genres, album.styles, album.labels,
+                {ALBUM_SEARCH_TRACKS.format(album_id="album.id")}
+            FROM album
+            """
+        )
+    )
+
+
+def _normalize_album_tags(connection: Connection) -> None:
+    _V5.create_all(connection, tables=[_V5_TAG, _V5_ALBUM_TAG], checkfirst=True)
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_album_year ON album (year)"))
+    if not _has_column(connection, "album", "genres"):
+        return
+
+    # Tags are moved out of the JSON columns of each album, in their order
+    album_tags = [
+        (album_id, kind, name)
+        for album_id, *columns in connection.execute(text("SELECT id, genres, styles, labels FROM album"))
+        for kind, column in zip(JSON_TAG_COLUMNS.values(), columns, strict=True)
+        for name in dict.fromkeys(json.loads(column or "[]"))
+    ]
+    tags = list(dict.fromkeys((kind, name) for _, kind, name in album_tags))
+    if tags:
+        connection.execute(insert(_V5_TAG), [{"kind": kind, "name": name} for kind, name in tags])
+        tag_ids = {(kind, name): tag_id for tag_id, kind, name in connection.execute(select(_V5_TAG))}
+        positions: dict[tuple[int, str], int] = {}
+        links = []
+        for album_id, kind, name in album_tags:
+            position = positions[album_id, kind] = positions.get((album_id, kind), -1) + 1
+            links.append({"album_id": album_id, "tag_id": tag_ids[kind, name], "position": position})
+        for batch in batched(links, 10_000):
+            connection.execute(insert(_V5_ALBUM_TAG), list(batch))
+
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TRIGGER IF EXISTS album_search_album_insert"))
+        connection.execute(text("DROP TRIGGER IF EXISTS album_search_album_update"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_album_genres"))
+    for column in JSON_TAG_COLUMNS:
+        connection.execute(text(f"ALTER TABLE album DROP COLUMN {column}"))
+    if connection.dialect.name == "sqlite":
+        for statement in ALBUM_SEARCH_TRIGGERS:
+            connection.execute(text(statement))
+        connection.execute(text(ALBUM_SEARCH_REFRESH))
+
+
+def _count_album_facets(connection: Connection) -> None:
+    # Facet counts are maintained by SQLite triggers, other databases count albums on each request
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in FACET_SCHEMA:
+        connection.execute(text(statement))
+    connection.execute(text(f"DELETE FROM {FACET_TABLE}"))
+    connection.execute(
+        text(
+            f"""
+            INSERT INTO {FACET_TABLE} (kind, value, count)
+            SELECT tag.kind, tag.name, count(*) FROM album_tag JOIN tag ON tag.id = album_tag.tag_id
+            GROUP BY tag.kind, tag.name
+            UNION ALL
+            SELECT '{DECADE}', {FACET_DECADE.format(album="album")}, count(*) FROM album WHERE year > 0 GROUP BY 2
+            UNION ALL
+            SELECT '{COUNTRY}', country, count(*) FROM album WHERE country IS NOT NULL GROUP BY country
+            """
+        )
+    )
+
+
+def _count_album_search_terms(connection: Connection) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {ALBUM_SEARCH_TERMS_TABLE} "
+            f"USING fts5vocab({ALBUM_SEARCH_TABLE}, 'row')"
+        )
+    )
+
+
+MIGRATIONS = [
+    Migration(1, "Create the album and track tables", _create_album_tables),
+    Migration(2, "Add the content hash of albums", _add_album_content_hash),
+    Migration(3, "Index tracks by album", _index_album_tracks),
+    Migration(4, "Index albums for full-text search", _create_album_search),
+    Migration(5, "Move genres, styles and labels to tag tables", _normalize_album_tags),
+    Migration(6, "Count albums by genre, style, label, decade and country", _count_album_facets),
+    Migration(7, "Count the albums of each full-text search term", _count_album_search_terms),
+]
+
+
+def schema_version(connection: Connection) -> int:
+    """
+    Reads the version of the database schema.
+
+    :param connection: the connection to the database.
+    :return: the version of the last migration applied, 0 if none was.
+    """
+    SchemaVersionEntity.__table__.create(connection, checkfirst=True)
+    return connection.execute(select(func.max(SchemaVersionEntity.version))).scalar() or 0
+
+
+def migrate(engine: Engine, migrations: list[Migration] = MIGRATIONS) -> int:
+    """
+    Brings the database schema up to date, keeping the data already stored.
+
+    Each pending migration is applied in its own transaction along with its record in the
+    schema_version table, so an interrupted upgrade resumes from the last migration applied.
+
+    :param engine: the engine of the database.
+    :param migrations: the migrations of the schema, by increasing version.
+    :return: the version of the schema.
+    """
+    with engine.begin() as connection:
+        version = schema_version(connection)
+    for migration in migrations:
+        if migration.version <= version:
+            continue
+        logger.info(f"Migrating database schema to version {migration.version}: {migration.description}")
+        with engine.begin() as connection:
+            migration.apply(connection)
+            connection.execute(
+                insert(SchemaVersionEntity.__table__).values(
+                    version=migration.version, description=migration.description
+                )
+            )
+        version = migration.version
+    return version
@@ -2,8 +2,17 @@ import json
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
+# Kinds of the tags of albums
+GENRE = "genre"
+STYLE = "style"
+LABEL = "label"
+# Facets of albums counted for browsing, besides the kinds of their tags
+DECADE = "decade"
+COUNTRY = "country"
+
 
 class TrackEntity(SQLModel, table=True):
     __tablename__ = "track"
@@ -12,12 +21,31 @@ class TrackEntity(SQLModel, table=True):
     position: str
     title: str = Field(index=True)
     duration: str
-    album_id: int | None = Field(default=None, foreign_key="album.id")
+    album_id: int | None = Field(default=None, foreign_key="album.id", index=True)
     album: Optional["AlbumEntity"] = Relationship(back_populates="tracklist")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class TagEntity(SQLModel, table=True):
+    __tablename__ = "tag"
+    __table_args__ = (Index("ix_tag_kind_name", "kind", "name", unique=True),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    kind: str
+    name: str
+
+
+class AlbumTagEntity(SQLModel, table=True):
+    __tablename__ = "album_tag"
+    __table_args__ = (Index("ix_album_tag_tag_id", "tag_id", "album_id"),)
+
+    album_id: int = Field(foreign_key="album.id", primary_key=True)
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True)
+    position: int
+    tag: TagEntity = Relationship(sa_relationship_kwargs={"lazy": "joined"})
+
+
 class AlbumEntity(SQLModel, table=True):
     __tablename__ = "album"
 
@@ -25,10 +53,15 @@ class AlbumEntity(SQLModel, table=True):
     album_id: str = Field(index=True, unique=True)
     title: str = Field(index=True, unique=False)
     artist: str = Field(index=True, unique=False)
-    year: int
-    genres: str = Field(default="[]", index=True, unique=False)
-    styles: str = Field(default="[]")
-    labels: str = Field(default="[]")
+    year: int = Field(index=True)
+    # Genres, styles and labels of the album, in their order
+    tags: list[AlbumTagEntity] = Relationship(
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "lazy": "selectin",
+            "order_by": "AlbumTagEntity.position",
+        }
+    )
     country: str | None = None
     tracklist: list[TrackEntity] = Relationship(
         back_populates="album", sa_relationship_kwargs={"cascade": "all, delete-orphan"}
@@ -36,17 +69,13 @@ class AlbumEntity(SQLModel, table=True):
     credits: str | None = None
     external_urls: str = Field(default="{}")
     external_ids: str = Field(default="{}")
+    # Hash of the stored content, so that saving an unchanged album again does not rewrite it
+    content_hash: str | None = None
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     def __init__(self, **data):
-        if "genres" in data and isinstance(data["genres"], list):
-            data["genres"] = json.dumps(data["genres"])
-        if "styles" in data and isinstance(data["styles"], list):
-            data["styles"] = json.dumps(data["styles"])
-        if "labels" in data and isinstance(data["labels"], list):
-            data["labels"] = json.dumps(data["labels"])
         if "external_urls" in data and isinstance(data["external_urls"], dict):
             data["external_urls"] = json.dumps(self._convert_urls_to_str(data["external_urls"]))
         if "external_ids" in data and isinstance(data["external_ids"], dict):
@@ -56,30 +85,21 @@ class AlbumEntity(SQLModel, table=True):
     def _convert_urls_to_str(self, urls: dict) -> dict:
         return {key: str(value) for key, value in urls.items()}
 
+    def _tag_names(self, kind: str) -> list[str]:
+        return [album_tag.tag.name for album_tag in self.tags if album_tag.tag.kind == kind]
+
     # Getters et setters pour les listes/dicts
     @property
     def genres_list(self) -> list[str]:
-        return json.loads(self.genres)
-
-    @genres_list.setter
-    def genres_list(self, value: list[str]):
-        self.genres = json.dumps(value)
+        return self._tag_names(GENRE)
 
     @property
     def styles_list(self) -> list[str]:
-        return json.loads(self.styles)
-
-    @styles_list.setter
-    def styles_list(self, value: list[str]):
-        self.styles = json.dumps(value)
+        return self._tag_names(STYLE)
 
     @property
     def labels_list(self) -> list[str]:
-        return json.loads(self.labels)
-
-    @labels_list.setter
-    def labels_list(self, value: list[str]):
-        self.labels = json.dumps(value)
+        return self._tag_names(LABEL)
 
     @property
     def external_urls_dict(self) -> dict:
@@ -96,3 +116,11 @@ class AlbumEntity(SQLModel, table=True):
     @external_ids_dict.setter
     def external_ids_dict(self, value: dict):
         self.external_ids = json.dumps(value)
+
+
+class SchemaVersionEntity(SQLModel, table=True):
+    __tablename__ = "schema_version"
+
+    version: int = Field(primary_key=True)
+    description: str
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
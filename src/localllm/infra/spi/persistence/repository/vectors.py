@@ -1,4 +1,4 @@
-from uuid import uuid4
+from uuid import NAMESPACE_URL, uuid5
 
 import structlog
 from langchain.text_splitter import CharacterTextSplitter
@@ -14,6 +14,8 @@ from localllm.domain.ports.persistence import AlbumVectorRepository
 
 logger = structlog.getLogger()
 
+ALBUM_NAMESPACE = uuid5(NAMESPACE_URL, "localllm:album")
+
 
 def _album_to_text(album: Album) -> str:
     return (
@@ -98,7 +100,8 @@ class QdrantAlbumRepository(AlbumVectorRepository):
         )
 
     def index_album(self, album: Album) -> (str, Album):
-        current_id = uuid4()
+        # The point ID derives from the album ID, so indexing an album again replaces its point
+        current_id = uuid5(ALBUM_NAMESPACE, album.album_id)
         document = _album_to_document(album)
 
         self.langchain_qdrant.add_documents(documents=[document], ids=[str(current_id)])
@@ -3,7 +3,7 @@ from abc import ABC, abstractmethod
 
 import structlog
 
-from localllm.domain.multimedia import Album, Track
+from localllm.domain.multimedia import Album, Artist, Track
 
 logger = structlog.getLogger()
 
@@ -25,18 +25,71 @@ class AlbumAdapter(ABC):
 
 
 class DiscogsAlbumAdapter(AlbumAdapter):
+    """
+    Converts Discogs metadata to Album objects.
+
+    Both search results, whose title is "Artist - Album", and full releases fetched by ID, which
+    list their artists, labels and tracks as objects, are supported.
+    """
+
     def _parse_title(self, title: str) -> tuple[str | None, str]:
         if " - " in title:
             artist, album = title.split(" - ", 1)
             return artist, album
         return None, title
 
+    def _parse_artist(self, artists: list[dict]) -> str | None:
+        if not artists:
+            return None
+        # Discogs suffixes homonyms with a number, e.g. "Ayreon (2)"
+        return re.sub(r" \(\d+\)$", "", artists[0].get("name", "")) or None
+
+    def _parse_duration(self, duration: str | None) -> int | None:
+        if not duration:
+            return None
+        try:
+            seconds = 0
+            for part in duration.split(":"):
+                seconds = seconds * 60 + int(part)
+            return seconds
+        except ValueError:
+            return None
+
+    def _create_release_tracks(self, track_data: list[dict]) -> list[Track]:
+        tracks = [track for track in track_data if track.get("type_", "track") == "track"]
+        return [
+            Track(position=position, title=track.get("title", ""), duration=self._parse_duration(track.get("duration")))
+            for position, track in enumerate(tracks, start=1)
+        ]
+
+    def _to_release_album(self, metadata: dict) -> Album:
+        external_urls = {}
+        if discogs_url := metadata.get("resource_url"):
+            external_urls["discogs"] = discogs_url
+
+        return Album(
+            album_id=f"discogs_{metadata.get('id')}",
+            title=metadata.get("title"),
+            artist=self._parse_artist(metadata.get("artists", [])),
+            year=int(metadata.get("year") or 0),
+            genres=metadata.get("genres", []),
+            styles=metadata.get("styles", []),
+            labels=[label["name"] for label in metadata.get("labels", []) if label.get("name")],
+            country=metadata.get("country"),
+            tracklist=self._create_release_tracks(metadata.get("tracklist", [])),
+            external_urls=external_urls,
+            external_ids={"discogs": str(metadata.get("id"))},
+        )
+
     def to_album(self, metadata: dict) -> Album | None:
         if not metadata:
             return None
 
         logger.debug("Converting Discogs metadata to Album object", metadata=metadata)
         try:
+            if "artists" in metadata:
+                return self._to_release_album(metadata)
+
             title = metadata.get("title", "")
             artist, album_title = self._parse_title(title) if title is not None else (None, None)
 
@@ -98,6 +151,27 @@ class SpotifyAlbumAdapter(AlbumAdapter):
         except (ValueError, AttributeError):
             return 0
 
+    def _create_album_tracks(self, tracks: dict | list) -> list[Track]:
+        """
+        Extrait les pistes d'un album complet, dont la durée est donnée en millisecondes.
+
+        Args:
+            tracks: Pistes de l'album, paginées dans "items" pour un album récupéré par ID
+
+        Returns:
+            list[Track]: Pistes de l'album
+        """
+        if not isinstance(tracks, dict):
+            return self._create_tracks(tracks)
+        return [
+            Track(
+                position=track.get("track_number", position),
+                title=track.get("name", ""),
+                duration=track["duration_ms"] // 1000 if track.get("duration_ms") is not None else None,
+            )
+            for position, track in enumerate(tracks.get("items", []), start=1)
+        ]
+
     def to_album(self, metadata: dict) -> Album | None:
         if not metadata:
             return None
@@ -116,7 +190,7 @@ class SpotifyAlbumAdapter(AlbumAdapter):
                 year=self._parse_year(metadata.get("release_date", "0")),
                 genres=metadata.get("genres", []),
                 labels=[metadata.get("label")] if metadata.get("label") else set(),
-                tracklist=self._create_tracks(metadata.get("tracks", [])),
+                tracklist=self._create_album_tracks(metadata.get("tracks", [])),
                 popularity=metadata.get("popularity"),
                 external_urls=external_urls,
                 external_ids={"spotify": release_id},
@@ -124,3 +198,26 @@ class SpotifyAlbumAdapter(AlbumAdapter):
         except (KeyError, ValueError) as e:
             logger.error("Error when getting metadata from Spotify", error=str(e))
             return None
+
+    def to_artist(self, metadata: dict) -> Artist | None:
+        """
+        Convertit les métadonnées d'un artiste Spotify en objet Artist.
+
+        Args:
+            metadata: Métadonnées de l'artiste
+
+        Returns:
+            Optional[Artist]: Artiste ou None si les métadonnées sont invalides
+        """
+        if not metadata:
+            return None
+
+        try:
+            return Artist(
+                name=metadata["name"],
+                genres=metadata.get("genres", []),
+                external_ids={"spotify": metadata.get("id", "")},
+            )
+        except (KeyError, ValueError) as e:
+            logger.error("Error when getting artist metadata from Spotify", error=str(e))
+            return None
@@ -0,0 +1,81 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import structlog
+
+logger = structlog.getLogger()
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_BATCH_DELAY = 0.05
+
+
+class MicroBatcher:
+    """
+    Groups concurrent lookups by key into batch requests.
+
+    Lookups are queued until ``max_size`` distinct keys are waiting or ``max_delay`` seconds have
+    passed since the first of them, then resolved by a single call to the batch function.
+    Identical keys waiting at the same time share the same result.
+    """
+
+    def __init__(
+        self,
+        fetch_batch: Callable[[list[str]], Awaitable[dict[str, dict | None]]],
+        max_size: int = DEFAULT_BATCH_SIZE,
+        max_delay: float = DEFAULT_BATCH_DELAY,
+    ):
+        """
+        Initializes the batcher.
+
+        :param fetch_batch: coroutine function resolving a list of keys to their values, missing keys
+            resolve to None
+        :param max_size: maximum number of keys sent in a single batch
+        :param max_delay: maximum time in seconds a lookup waits for the batch to fill up
+        """
+        self.fetch_batch = fetch_batch
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self._pending: dict[str, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(self, key: str) -> dict | None:
+        """
+        Looks up a key as part of the next batch.
+
+        :param key: the key to look up
+        :return: the value of the key, or None if it was not found
+        """
+        if (future := self._pending.get(key)) is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_delay, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self.batches += 1
+            task = asyncio.get_running_loop().create_task(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: dict[str, asyncio.Future]) -> None:
+        logger.debug(f"Looking up a batch of {len(batch)} keys")
+        try:
+            values = await self.fetch_batch(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key))
@@ -0,0 +1,88 @@
+import time
+from collections.abc import Callable
+
+import structlog
+
+from localllm.domain.ports.enrichers import ProviderUnavailableError
+
+logger = structlog.getLogger()
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN = 60.0
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after repeated failures.
+
+    The breaker is closed while the provider answers. After ``failure_threshold`` consecutive
+    failures it opens and calls are refused right away with a ProviderUnavailableError. Once
+    ``cooldown`` seconds have passed, a single probe call is let through: the breaker closes if it
+    succeeds and opens for another cooldown if it fails.
+
+    The breaker is not thread safe, it is meant to be used from the event loop.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown: float = DEFAULT_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initializes a closed breaker.
+
+        :param name: the name of the provider, used in logs and errors.
+        :param failure_threshold: the number of consecutive failures opening the breaker.
+        :param cooldown: the time in seconds to wait before probing the provider again.
+        :param clock: the function returning the current time in seconds.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+
+    def before_call(self) -> None:
+        """
+        Checks that the provider can be called.
+
+        :raises ProviderUnavailableError: if the breaker is open, or half-open with a probe running.
+        """
+        if self.state == self.OPEN and self.clock() - self._opened_at >= self.cooldown:
+            logger.info(f"Probing {self.name} after {self.cooldown:.0f}s of cooldown")
+            self.state = self.HALF_OPEN
+            return
+        if self.state != self.CLOSED:
+            self.rejected += 1
+            raise ProviderUnavailableError(f"{self.name} is unavailable, circuit breaker is {self.state}")
+
+    def record_success(self) -> None:
+        """Closes the breaker after a successful call."""
+        if self.state != self.CLOSED:
+            logger.info(f"{self.name} is available again, closing circuit breaker")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_cancelled(self) -> None:
+        """Forgets a call cancelled before the provider answered, a cancelled probe lets the next call probe."""
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+
+    def record_failure(self) -> None:
+        """Counts a failed call, opening the breaker when the threshold is reached or a probe failed."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            logger.warning(
+                f"{self.name} failed {self.failures} times, opening circuit breaker for {self.cooldown:.0f}s"
+            )
+            self.state = self.OPEN
+            self._opened_at = self.clock()
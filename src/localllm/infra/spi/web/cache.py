@@ -0,0 +1,140 @@
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import structlog
+
+logger = structlog.getLogger()
+
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_NEGATIVE_TTL = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS provider_responses (
+    provider TEXT NOT NULL,
+    query TEXT NOT NULL,
+    payload TEXT,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (provider, query)
+) WITHOUT ROWID
+"""
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """
+    Provider response read from the cache.
+
+    Attributes:
+    - payload: dict | None, the raw provider payload, None when the provider found nothing
+    - fetched_at: float, the time the provider was queried, in seconds since the epoch.
+    """
+
+    payload: dict | None
+    fetched_at: float
+
+
+def normalize_query(artist: str, title: str) -> str:
+    """
+    Normalizes an artist and album title so that equivalent searches share a cache entry.
+
+    :param artist: str, the artist name
+    :param title: str, the album title
+    :return: str, the normalized query
+    """
+
+    def normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+    return f"{normalize(artist)}\x1f{normalize(title)}"
+
+
+class SQLiteResponseCache:
+    """
+    Disk cache of raw provider responses, stored in a SQLite database.
+
+    Entries are keyed by provider and normalized query. Their freshness is checked on read
+    against the time-to-live of their provider, so changing a TTL applies to existing entries.
+    Searches that found nothing are cached too, with their own, usually shorter, TTL.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Opens the cache database, creating it if needed.
+
+        :param path: Path, the SQLite database file
+        :param ttls: dict[str, float], time-to-live in seconds of the responses of each provider
+        :param default_ttl: float, time-to-live in seconds of providers without a specific TTL
+        :param negative_ttl: float, time-to-live in seconds of searches that found nothing
+        :param clock: Callable, returns the current time in seconds since the epoch
+        """
+        self.path = path
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+
+    def get(self, provider: str, query: str) -> CachedResponse | None:
+        """
+        Reads a fresh response from the cache.
+
+        :param provider: str, the name of the provider
+        :param query: str, the normalized query
+        :return: CachedResponse, the cached response or None if it is missing or expired
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload, fetched_at FROM provider_responses WHERE provider = ? AND query = ?",
+                (provider, query),
+            ).fetchone()
+        if row is None:
+            return None
+
+        payload, fetched_at = row
+        ttl = self.ttls.get(provider, self.default_ttl) if payload is not None else self.negative_ttl
+        if self.clock() - fetched_at > ttl:
+            return None
+        try:
+            return CachedResponse(payload=json.loads(payload) if payload is not None else None, fetched_at=fetched_at)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ignoring unreadable cached response of {provider} for {query!r}: {e}")
+            return None
+
+    def set(self, provider: str, query: str, payload: dict | None) -> None:
+        """
+        Stores a provider response in the cache.
+
+        :param provider: str, the name of the provider
+        :param query: str, the normalized query
+        :param payload: dict | None, the raw provider payload or None if the provider found nothing
+        :return: None
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO provider_responses (provider, query, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                (provider, query, json.dumps(payload) if payload is not None else None, self.clock()),
+            )
+
+    def close(self) -> None:
+        """Closes the cache database."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,324 @@
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from localllm.infra.spi.web.connections import PooledHTTPAdapter
+
+logger = structlog.getLogger()
+
+TOO_MANY_REQUESTS = 429
+REDACTED_FIELDS = ("access_token", "refresh_token")
+REDACTED_VALUE = "redacted"
+RATE_LIMIT_HEADERS = ("x-discogs-ratelimit", "x-ratelimit", "retry-after")
+# Response headers describing the connection rather than the content are not replayed
+SKIPPED_HEADERS = ("connection", "content-encoding", "content-length", "date", "keep-alive", "transfer-encoding")
+# Query parameter of the requests fetching several items at once, such as Spotify albums?ids=a,b,c
+BATCH_PARAMETER = "ids"
+
+
+class CassetteMissError(requests.ConnectionError):
+    """
+    Exception raised when a replayed request was not recorded in the cassette.
+    """  # noqa: D200
+
+    pass
+
+
+def build_response(
+    request: requests.PreparedRequest, status: int, headers: dict[str, str], content: bytes
+) -> requests.Response:
+    """
+    Builds the response of a request without sending it.
+
+    :param request: the request answered.
+    :param status: the HTTP status of the response.
+    :param headers: the HTTP headers of the response.
+    :param content: the body of the response.
+    :return: the response.
+    """
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    response.reason = "Too Many Requests" if status == TOO_MANY_REQUESTS else "OK"
+    return response
+
+
+class Cassette:
+    """
+    Provider responses recorded in a JSON lines file, one interaction per line.
+
+    Interactions are identified by the method, the URL with its query parameters sorted, and the
+    body of the request. Request headers are never recorded, so neither are the credentials they
+    carry, and tokens found in JSON response bodies are redacted.
+
+    Batches of items requested with an ``ids`` parameter are recorded one item at a time and
+    answered from the items recorded, so a replay does not depend on how the items were grouped
+    in batches, which changes with the timing of the requests.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initializes the cassette, loading the interactions already recorded in the file if any.
+
+        :param path: the JSON lines file of the cassette.
+        """
+        self.path = path
+        self._interactions: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            with open(path) as cassette:
+                for line in cassette:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self._interactions.setdefault(interaction["key"], interaction)
+        logger.debug(f"Cassette {path} holds {len(self._interactions)} interactions")
+
+    def __len__(self) -> int:
+        return len(self._interactions)
+
+    @staticmethod
+    def key(request: requests.PreparedRequest, item_id: str | None = None) -> str:
+        """
+        Identifies a request, whatever the order of its query parameters.
+
+        :param request: the request.
+        :param item_id: the item of a batch request to identify, as if it was requested alone.
+        :return: the key of the request.
+        """
+        url = urlsplit(request.url)
+        parameters = parse_qsl(url.query, keep_blank_values=True)
+        if item_id is not None:
+            parameters = [(name, item_id if name == BATCH_PARAMETER else value) for name, value in parameters]
+        query = urlencode(sorted(parameters))
+        key = f"{request.method} {urlunsplit((url.scheme, url.netloc, url.path, query, ''))}"
+        if body := request.body:
+            digest = hashlib.sha256(body if isinstance(body, bytes) else body.encode()).hexdigest()
+            key += f" {digest[:16]}"
+        return key
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Finds the interaction recorded for a request.
+
+        :param key: the key of the request.
+        :return: the interaction, or None if the request was not recorded.
+        """
+        return self._interactions.get(key)
+
+    def find(self, request: requests.PreparedRequest) -> dict[str, Any] | None:
+        """
+        Finds the interaction answering a request, assembling batch requests from their items.
+
+        :param request: the request.
+        :return: the interaction, or None if the request or one of its items was not recorded.
+        """
+        if (item_ids := _batch_ids(request)) is None:
+            return self.get(Cassette.key(request))
+        items = [self.get(Cassette.key(request, item_id)) for item_id in item_ids]
+        if not all(items):
+            return None
+        field, values = None, []
+        for item in items:
+            field, [value] = next(iter(json.loads(item["body"]).items()))
+            values.append(value)
+        return {
+            "key": Cassette.key(request),
+            "status": items[0]["status"],
+            "headers": items[0]["headers"],
+            "body": json.dumps({field: values}),
+        }
+
+    def record_request(self, request: requests.PreparedRequest, response: requests.Response) -> None:
+        """
+        Records the response of a request, item by item for successful batch requests.
+
+        :param request: the request.
+        :param response: the response of the provider.
+        """
+        if (item_ids := _batch_ids(request)) is None or not response.ok:
+            self.record(Cassette.key(request), response)
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        # A batch response holds a single list, with one value per item in the order of the request
+        field, values = next(iter(body.items())) if isinstance(body, dict) and len(body) == 1 else (None, None)
+        if not isinstance(values, list) or len(values) != len(item_ids):
+            self.record(Cassette.key(request), response)
+            return
+        for item_id, value in zip(item_ids, values, strict=True):
+            self.record(Cassette.key(request, item_id), response, json.dumps({field: [value]}).encode())
+
+    def record(self, key: str, response: requests.Response, content: bytes | None = None) -> None:
+        """
+        Records the response of a request, unless the request was already recorded.
+
+        :param key: the key of the request.
+        :param response: the response of the provider.
+        :param content: the body to record instead of the body of the response.
+        """
+        interaction = {
+            "key": key,
+            "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS},
+            "body": _redact(response.content if content is None else content).decode("utf-8", errors="replace"),
+        }
+        with self._lock:
+            if key in self._interactions:
+                return
+            self._interactions[key] = interaction
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as cassette:
+                cassette.write(json.dumps(interaction) + "\n")
+
+
+def _batch_ids(request: requests.PreparedRequest) -> list[str] | None:
+    if request.method != "GET":
+        return None
+    parameters = dict(parse_qsl(urlsplit(request.url).query))
+    return parameters[BATCH_PARAMETER].split(",") if parameters.get(BATCH_PARAMETER) else None
+
+
+def _redact(content: bytes) -> bytes:
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(body, dict) or not any(field in body for field in REDACTED_FIELDS):
+        return content
+    return json.dumps(
+        {name: REDACTED_VALUE if name in REDACTED_FIELDS else value for name, value in body.items()}
+    ).encode()
+
+
+class RecordingHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter sending requests through another adapter and recording the responses in a cassette.
+
+    Rejected requests are not recorded, rate limits are injected when replaying instead. Batch
+    requests are recorded item by item.
+    """
+
+    def __init__(self, cassette: Cassette, adapter: HTTPAdapter | None = None):
+        """
+        Initializes the adapter.
+
+        :param cassette: the cassette recording the responses.
+        :param adapter: the adapter sending the requests, a pooled one when None.
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter or PooledHTTPAdapter()
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        response = self.adapter.send(request, *args, **kwargs)
+        if response.status_code != TOO_MANY_REQUESTS:
+            self.cassette.record_request(request, response)
+        return response
+
+    def close(self) -> None:
+        self.adapter.close()
+
+
+class ReplayHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter answering requests from a cassette, without any network access.
+
+    Each response is delayed by ``latency`` seconds plus up to ``jitter`` seconds, and a share
+    ``rate_limited`` of the requests is rejected with a 429 status and a ``Retry-After`` header.
+    Delays and rejections are drawn from a hash of the request and of its number of attempts, so
+    a run replays the same delays and rejections whatever the order the requests are sent in.
+
+    The requests answered are counted in ``requests``, ``handshakes`` stays at zero as no
+    connection is ever opened.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limited: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+        rate_limit_headers: bool = True,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initializes the adapter.
+
+        :param cassette: the cassette holding the recorded responses.
+        :param latency: the minimum delay of a response in seconds.
+        :param jitter: the maximum delay in seconds added to the latency.
+        :param rate_limited: the share of requests rejected for exceeding the rate limit, from 0 to 1.
+        :param retry_after: the delay in seconds announced by rejected requests.
+        :param seed: the seed of the delays and rejections, another seed draws other ones.
+        :param rate_limit_headers: replay the rate limit headers recorded, False to leave the pace of
+            the requests to the injected rejections only.
+        :param sleep: the function waiting for a number of seconds.
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.seed = seed
+        self.rate_limit_headers = rate_limit_headers
+        self.sleep = sleep
+        self.requests = 0
+        self.handshakes = 0
+        self.throttled = 0
+        self.misses = 0
+        self._attempts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def _draw(self, key: str, attempt: int, purpose: str) -> float:
+        digest = hashlib.sha256(f"{self.seed}:{purpose}:{attempt}:{key}".encode()).digest()
+        return int.from_bytes(digest[:8], "big") / 2**64
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        key = Cassette.key(request)
+        with self._lock:
+            self.requests += 1
+            attempt = self._attempts[key]
+            self._attempts[key] += 1
+        delay = self.latency + self.jitter * self._draw(key, attempt, "latency")
+        if delay:
+            self.sleep(delay)
+
+        if self._draw(key, attempt, "rate_limited") < self.rate_limited:
+            with self._lock:
+                self.throttled += 1
+            body = json.dumps({"message": "You are making requests too quickly."}).encode()
+            return build_response(request, TOO_MANY_REQUESTS, {"Retry-After": f"{self.retry_after:g}"}, body)
+
+        if (interaction := self.cassette.find(request)) is None:
+            with self._lock:
+                self.misses += 1
+            raise CassetteMissError(f"Request not recorded in {self.cassette.path}: {key}", request=request)
+        headers = interaction["headers"]
+        if not self.rate_limit_headers:
+            headers = {
+                name: value for name, value in headers.items() if not name.lower().startswith(RATE_LIMIT_HEADERS)
+            }
+        return build_response(request, interaction["status"], headers, interaction["body"].encode())
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,111 @@
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from spotipy.cache_handler import CacheFileHandler
+from urllib3 import PoolManager
+from urllib3.connectionpool import HTTPConnectionPool
+
+DEFAULT_POOL_HOSTS = 4
+DEFAULT_POOL_SIZE = 8
+PRIVATE_FILE_MODE = 0o600
+
+
+class _CountingPoolManager(PoolManager):
+    """Pool manager reporting every new connection, and so every TCP and TLS handshake."""
+
+    def __init__(self, *args: Any, on_connection: Callable[[], None], **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.on_connection = on_connection
+
+    def _new_pool(
+        self, scheme: str, host: str, port: int, request_context: dict[str, Any] | None = None
+    ) -> HTTPConnectionPool:
+        pool = super()._new_pool(scheme, host, port, request_context)
+        new_connection = pool._new_conn
+
+        def counted_connection() -> Any:
+            self.on_connection()
+            return new_connection()
+
+        pool._new_conn = counted_connection
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter keeping a bounded number of keep-alive connections per host, shared by sessions.
+
+    Mounting the same adapter on several sessions makes them share its connection pools, so a
+    connection opened for a provider is reused by every later request to that provider. The pools
+    are blocking: when all the connections to a host are busy, a request waits for one to be
+    released instead of opening a connection that would be thrown away after the request.
+
+    The number of connections opened, each one costing a TCP and a TLS handshake, is counted in
+    ``handshakes``, and the number of requests sent in ``requests``.
+    """
+
+    def __init__(self, pool_hosts: int = DEFAULT_POOL_HOSTS, pool_size: int = DEFAULT_POOL_SIZE):
+        """
+        Initializes the adapter.
+
+        :param pool_hosts: the number of hosts whose connections are kept.
+        :param pool_size: the number of connections kept per host, at least the number of threads
+            sending requests to the same host to avoid waiting for a connection.
+        """
+        self.handshakes = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        super().__init__(pool_connections=pool_hosts, pool_maxsize=pool_size, pool_block=True)
+
+    def init_poolmanager(self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any) -> None:
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _CountingPoolManager(
+            num_pools=connections, maxsize=maxsize, block=block, on_connection=self._count_handshake, **pool_kwargs
+        )
+
+    def _count_handshake(self) -> None:
+        with self._lock:
+            self.handshakes += 1
+
+    def send(self, request: requests.PreparedRequest, *args: Any, **kwargs: Any) -> requests.Response:
+        with self._lock:
+            self.requests += 1
+        return super().send(request, *args, **kwargs)
+
+
+def mount_adapter(session: requests.Session, adapter: HTTPAdapter) -> requests.Session:
+    """
+    Mounts an adapter on a session, for every HTTP and HTTPS request.
+
+    :param session: the session to mount the adapter on.
+    :param adapter: the adapter sending the requests, with its connection pools.
+    :return: the session.
+    """
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class PrivateCacheFileHandler(CacheFileHandler):
+    """Spotify token cache writing the token to a file readable by its owner only."""
+
+    def __init__(self, cache_path: Path):
+        """
+        Initializes the token cache.
+
+        :param cache_path: the file holding the token, its folder is created if needed.
+        """
+        super().__init__(cache_path=str(cache_path))
+
+    def save_token_to_cache(self, token_info: dict[str, Any]) -> None:
+        path = Path(self.cache_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch(mode=PRIVATE_FILE_MODE, exist_ok=True)
+        path.chmod(PRIVATE_FILE_MODE)
+        super().save_token_to_cache(token_info)
@@ -1,8 +1,17 @@
+import asyncio
 import logging
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any
 
 import discogs_client
+import requests
 import spotipy
 import structlog
+from requests.adapters import HTTPAdapter
+from spotipy.cache_handler import MemoryCacheHandler
 from spotipy.oauth2 import SpotifyClientCredentials
 from tenacity import (
     before_sleep_log,
@@ -12,9 +21,14 @@ from tenacity import (
     wait_exponential,
 )
 
-from localllm.domain.multimedia import Album
-from localllm.domain.ports.enrichers import AlbumEnricher
+from localllm.domain.multimedia import Album, Artist
+from localllm.domain.ports.enrichers import AlbumEnricher, ArtistEnricher
 from localllm.infra.spi.web.adapters import DiscogsAlbumAdapter, SpotifyAlbumAdapter
+from localllm.infra.spi.web.batching import DEFAULT_BATCH_DELAY, DEFAULT_BATCH_SIZE, MicroBatcher
+from localllm.infra.spi.web.breaker import CircuitBreaker
+from localllm.infra.spi.web.cache import SQLiteResponseCache, normalize_query
+from localllm.infra.spi.web.connections import PooledHTTPAdapter, PrivateCacheFileHandler, mount_adapter
+from localllm.infra.spi.web.pacing import GovernedDiscogsFetcher, GovernedSession, RateGovernor
 
 logger = structlog.getLogger()
 DISCOGS_USER_AGENT = "Localllm/0.1"
@@ -23,7 +37,15 @@ RETRY_MIN = 4
 RETRY_MAX = 30
 RETRY_ATTEMPTS = 5
 RATE_LIMIT_STATUS_CODE = "429"
+RATE_LIMIT_HTTP_STATUS = 429
+NOT_FOUND_HTTP_STATUS = 404
 RATE_LIMIT_MESSAGE = "rate limit"
+DEFAULT_MAX_WORKERS = 4
+# Discogs allows 60 requests per minute to authenticated clients and declares it in its headers,
+# Spotify does not publish its limit, so its rate is probed up to a maximum.
+DISCOGS_RATE = 1.0
+SPOTIFY_RATE = 5.0
+SPOTIFY_MAX_RATE = 20.0
 
 
 class RateLimitException(Exception):
@@ -53,7 +75,138 @@ class SpotifyRateLimitException(RateLimitException):
 class BaseAlbumEnricher(AlbumEnricher):
     """
     Base class for album enrichers with common functionality.
-    """  # noqa: D200
+
+    Provider clients are synchronous, so their calls are run on a bounded thread pool to keep the
+    event loop free and let requests for different albums run at the same time. Raw provider
+    responses, including searches that found nothing, can be kept in a cache so that unchanged
+    albums are not searched again. Albums already carrying an ID of the provider are fetched by
+    ID instead of being searched.
+
+    Every provider call goes through a circuit breaker: once the provider failed too many times in
+    a row, calls are refused with a ProviderUnavailableError until a probe call succeeds, instead
+    of waiting for each album to exhaust its retries. Requests are paced by a rate governor
+    adapting to the rate limit headers of the provider, so that they are rarely rejected. They are
+    sent through a pooled HTTP adapter, which can be shared by the enrichers, keeping connections
+    alive from one request to the next.
+    """
+
+    name: str
+
+    def __init__(
+        self,
+        governor: RateGovernor,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache: SQLiteResponseCache | None = None,
+        breaker: CircuitBreaker | None = None,
+        http_adapter: HTTPAdapter | None = None,
+    ):
+        """
+        Initializes the thread pool used to call the provider.
+
+        :param governor: The rate governor pacing the requests sent to the provider.
+        :param max_workers: The maximum number of provider calls running at the same time.
+        :param cache: The cache of provider responses, or None to always query the provider.
+        :param breaker: The circuit breaker of the provider, a default one is used when None.
+        :param http_adapter: The adapter holding the connections to the provider, a default one
+            keeping a connection per worker is used when None.
+        """
+        self.governor = governor
+        self.http_adapter = http_adapter or PooledHTTPAdapter(pool_size=max_workers)
+        self.max_workers = max_workers
+        self.cache = cache
+        self.breaker = breaker or CircuitBreaker(self.name)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=type(self).__name__)
+
+    def _query(self, artist: str, album: str) -> str:
+        """
+        Builds the provider search query of an album.
+
+        :param artist: The artist name.
+        :param album: The album name.
+        :return: The search query.
+        """
+        raise NotImplementedError
+
+    async def _search_with_retry(self, query: str) -> dict | None:
+        """
+        Searches for a release on the provider.
+
+        :param query: The search query.
+        :return: The raw payload of the first search result, or None if no results are found.
+        """
+        raise NotImplementedError
+
+    async def _fetch_by_id(self, release_id: str) -> dict | None:
+        """
+        Fetches a release by its provider ID.
+
+        :param release_id: The provider ID of the release.
+        :return: The raw payload of the release, or None if it does not exist.
+        """
+        return None
+
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[dict | None]]) -> dict | None:
+        """
+        Reads a raw provider payload from the cache, fetching and caching it when it is missing.
+
+        :param key: The cache key of the payload.
+        :param fetch: The coroutine function fetching the payload from the provider.
+        :return: The raw payload, or None if the provider has none.
+        """
+        if self.cache is None:
+            return await fetch()
+
+        if cached := self.cache.get(self.name, key):
+            logger.debug(f"Using cached {self.name} response for {key!r}")
+            return cached.payload
+
+        payload = await fetch()
+        self.cache.set(self.name, key, payload)
+        return payload
+
+    async def _find_release(self, artist: str, album: str, external_ids: dict[str, str] | None = None) -> dict | None:
+        """
+        Finds the raw provider payload of an album, by ID when it is known and by search otherwise.
+
+        :param artist: The artist name.
+        :param album: The album name.
+        :param external_ids: The IDs of the album on external services.
+        :return: The raw payload of the release, or None if no results are found.
+        """
+        if release_id := (external_ids or {}).get(self.name):
+            release = await self._cached(f"id:{release_id}", partial(self._fetch_by_id, release_id))
+            if release:
+                return release
+            logger.info(f"No {self.name} release with ID {release_id}, searching for {album} by {artist}")
+
+        query = self._query(artist, album)
+        return await self._cached(normalize_query(artist, album), partial(self._search_with_retry, query))
+
+    async def _run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a blocking provider call on the thread pool, through the circuit breaker.
+
+        :param func: The blocking function to call.
+        :param args: The arguments of the function.
+        :return: The result of the function.
+        :raises ProviderUnavailableError: if the circuit breaker is open.
+        """
+        self.breaker.before_call()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, *args))
+        except asyncio.CancelledError:
+            # A cancelled call says nothing of the health of the provider
+            self.breaker.record_cancelled()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def close(self) -> None:
+        """Releases the thread pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
     def _is_rate_limit_exception(self, exception: Exception) -> bool:
         """
@@ -62,17 +215,75 @@ class BaseAlbumEnricher(AlbumEnricher):
         :param exception: The exception to check.
         :return: True if the exception is a rate limit exception, False otherwise.
         """
+        if RATE_LIMIT_HTTP_STATUS in (getattr(exception, "status_code", None), getattr(exception, "http_status", None)):
+            return True
         return RATE_LIMIT_STATUS_CODE in str(exception) or RATE_LIMIT_MESSAGE in str(exception).lower()
 
 
 class DiscogsAlbumEnricher(BaseAlbumEnricher):
-    def __init__(self, discogs_token: str):
+    name = "discogs"
+
+    def __init__(
+        self,
+        discogs_token: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache: SQLiteResponseCache | None = None,
+        breaker: CircuitBreaker | None = None,
+        governor: RateGovernor | None = None,
+        http_adapter: HTTPAdapter | None = None,
+    ):
         """
         Initializes the DiscogsAlbumEnricher with the given Discogs token.
 
         :param discogs_token: The Discogs API token.
+        :param max_workers: The maximum number of Discogs requests running at the same time.
+        :param cache: The cache of Discogs responses, or None to always query Discogs.
+        :param breaker: The circuit breaker of Discogs, a default one is used when None.
+        :param governor: The rate governor of Discogs, a default one is used when None.
+        :param http_adapter: The adapter holding the connections to Discogs, a default one is used when None.
         """
+        super().__init__(
+            governor=governor or RateGovernor(self.name, rate=DISCOGS_RATE),
+            max_workers=max_workers,
+            cache=cache,
+            breaker=breaker,
+            http_adapter=http_adapter,
+        )
         self.discogs = discogs_client.Client(DISCOGS_USER_AGENT, user_token=discogs_token)
+        self.discogs._fetcher = GovernedDiscogsFetcher(
+            discogs_token, GovernedSession(self.governor, adapter=self.http_adapter)
+        )
+
+    def _query(self, artist: str, album: str) -> str:
+        return f"{artist} {album}"
+
+    def _search(self, query: str) -> dict | None:
+        """
+        Searches for a release on Discogs. This call is blocking.
+
+        :param query: The search query.
+        :return: The raw data of the first search result, or None if no results are found.
+        """
+        search_results = self.discogs.search(query, type="release")
+        if not search_results:
+            return None
+        return search_results[0].data
+
+    def _release(self, release_id: str) -> dict | None:
+        """
+        Fetches a release from Discogs by its ID. This call is blocking.
+
+        :param release_id: The Discogs ID of the release.
+        :return: The raw data of the release, or None if it does not exist.
+        """
+        try:
+            release = self.discogs.release(int(release_id))
+            release.refresh()
+        except discogs_client.exceptions.HTTPError as e:
+            if e.status_code == NOT_FOUND_HTTP_STATUS:
+                return None
+            raise
+        return release.data
 
     @retry(
         retry=retry_if_exception_type(DiscogsRateLimitException),
@@ -81,52 +292,151 @@ class DiscogsAlbumEnricher(BaseAlbumEnricher):
         before_sleep=before_sleep_log(logger, log_level=logging.INFO),
         reraise=True,
     )
-    async def _search_with_retry(self, query: str) -> discogs_client.models.Release | None:
+    async def _call_with_retry(self, func: Callable[..., Any], *args: Any) -> Any:
         """
-        Searches for a release on Discogs, with rate limit handling.
+        Calls Discogs on the thread pool, with rate limit handling.
 
-        :param query: The search query.
-        :return: The first search result, or None if no results are found.
+        :param func: The blocking function calling Discogs.
+        :param args: The arguments of the function.
+        :return: The result of the function.
         """
         try:
-            search_results = self.discogs.search(query, type="release")
-            if not search_results:
-                return None
-            return search_results[0]
+            return await self._run_blocking(func, *args)
         except Exception as e:
             if self._is_rate_limit_exception(e):
                 raise DiscogsRateLimitException("Rate limit reached") from e
             raise
 
-    async def get_album_metadata(self, artist: str, album: str) -> Album | None:
+    async def _search_with_retry(self, query: str) -> dict | None:
+        """
+        Searches for a release on Discogs, with rate limit handling.
+
+        :param query: The search query.
+        :return: The raw data of the first search result, or None if no results are found.
+        """
+        return await self._call_with_retry(self._search, query)
+
+    async def _fetch_by_id(self, release_id: str) -> dict | None:
+        """
+        Fetches a release from Discogs by its ID, with rate limit handling.
+
+        :param release_id: The Discogs ID of the release.
+        :return: The raw data of the release, or None if it does not exist.
+        """
+        return await self._call_with_retry(self._release, release_id)
+
+    async def get_album_metadata(
+        self, artist: str, album: str, external_ids: dict[str, str] | None = None
+    ) -> Album | None:
         """
         Retrieves album metadata from Discogs.
 
         :param artist: The artist name.
         :param album: The album name.
+        :param external_ids: The IDs of the album on external services, used to fetch the release
+            directly when its Discogs ID is known.
         :return: The album metadata, or None if no results are found.
         """
         logger.debug(f"Retrieving metadata for {album} by {artist} on Discogs")
-        release = await self._search_with_retry(f"{artist} {album}")
+        release = await self._find_release(artist, album, external_ids)
         if not release:
             logger.warning(f"No results found for {album} by {artist}")
             return None
         logger.debug(f"Album data: {release}")
-        return DiscogsAlbumAdapter().to_album(metadata=release.data)
+        return DiscogsAlbumAdapter().to_album(metadata=release)
 
 
-class SpotifyAlbumEnricher(BaseAlbumEnricher):
-    def __init__(self, client_id: str, client_secret: str):
+class SpotifyAlbumEnricher(BaseAlbumEnricher, ArtistEnricher):
+    name = "spotify"
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache: SQLiteResponseCache | None = None,
+        breaker: CircuitBreaker | None = None,
+        governor: RateGovernor | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_delay: float = DEFAULT_BATCH_DELAY,
+        http_adapter: HTTPAdapter | None = None,
+        token_cache_path: Path | None = None,
+    ):
         """
         Initializes the SpotifyAlbumEnricher with the given Spotify client credentials.
 
         :param client_id: The Spotify client ID.
         :param client_secret: The Spotify client secret.
+        :param max_workers: The maximum number of Spotify requests running at the same time.
+        :param cache: The cache of Spotify responses, or None to always query Spotify.
+        :param breaker: The circuit breaker of Spotify, a default one is used when None.
+        :param governor: The rate governor of Spotify, a default one is used when None.
+        :param batch_size: The maximum number of albums fetched by ID in a single request, 20 at most.
+        :param batch_delay: The maximum time in seconds an album waits for its batch to fill up.
+        :param http_adapter: The adapter holding the connections to Spotify, a default one is used when None.
+        :param token_cache_path: The file keeping the access token until it expires, so that later runs
+            reuse it, or None to keep it in memory for this run only.
         """
+        super().__init__(
+            governor=governor or RateGovernor(self.name, rate=SPOTIFY_RATE, max_rate=SPOTIFY_MAX_RATE),
+            max_workers=max_workers,
+            cache=cache,
+            breaker=breaker,
+            http_adapter=http_adapter,
+        )
         self.spotify = spotipy.Spotify(
-            auth_manager=SpotifyClientCredentials(client_id=client_id, client_secret=client_secret)
+            auth_manager=SpotifyClientCredentials(
+                client_id=client_id,
+                client_secret=client_secret,
+                # Token requests are not paced, they only happen when the token expires
+                requests_session=mount_adapter(requests.Session(), self.http_adapter),
+                cache_handler=PrivateCacheFileHandler(token_cache_path) if token_cache_path else MemoryCacheHandler(),
+            ),
+            requests_session=GovernedSession(self.governor, adapter=self.http_adapter),
+        )
+        self.albums_batcher = MicroBatcher(self._albums_with_retry, max_size=batch_size, max_delay=batch_delay)
+
+    def _query(self, artist: str, album: str) -> str:
+        return f"artist:{artist} album:{album}"
+
+    def _search(self, query: str) -> dict | None:
+        """
+        Searches for a release on Spotify. This call is blocking.
+
+        :param query: The search query.
+        :return: The first search result, or None if no results are found.
+        """
+        search_results = self.spotify.search(q=query, type="album")
+        if not search_results["albums"]["items"]:
+            return None
+        return search_results["albums"]["items"][0]
+
+    def _search_artist(self, artist: str) -> dict | None:
+        """
+        Searches for an artist on Spotify. This call is blocking.
+
+        Search results are fuzzy, only an artist with the same name, whatever its case and spacing,
+        is accepted.
+
+        :param artist: The artist name.
+        :return: The first search result named as the artist, or None if no such result is found.
+        """
+        search_results = self.spotify.search(q=f"artist:{artist}", type="artist")
+        name = normalize_query(artist, "")
+        return next(
+            (item for item in search_results["artists"]["items"] if normalize_query(item["name"], "") == name), None
         )
 
+    def _albums(self, album_ids: list[str]) -> dict[str, dict | None]:
+        """
+        Fetches several albums from Spotify by their IDs in a single request. This call is blocking.
+
+        :param album_ids: The Spotify IDs of the albums.
+        :return: The albums by ID, None for unknown IDs.
+        """
+        albums = self.spotify.albums(album_ids)["albums"]
+        return dict(zip(album_ids, albums, strict=True))
+
     @retry(
         retry=retry_if_exception_type(SpotifyRateLimitException),
         wait=wait_exponential(multiplier=RETRY_MULTIPLIER, min=RETRY_MIN, max=RETRY_MAX),
@@ -134,35 +444,74 @@ class SpotifyAlbumEnricher(BaseAlbumEnricher):
         before_sleep=before_sleep_log(logger, log_level=logging.INFO),
         reraise=True,
     )
-    async def _search_with_retry(self, query: str) -> dict | None:
+    async def _call_with_retry(self, func: Callable[..., Any], *args: Any) -> Any:
         """
-        Searches for a release on Spotify, with rate limit handling.
+        Calls Spotify on the thread pool, with rate limit handling.
 
-        :param query: The search query.
-        :return: The first search result, or None if no results are found.
+        :param func: The blocking function calling Spotify.
+        :param args: The arguments of the function.
+        :return: The result of the function.
         """
         try:
-            search_results = self.spotify.search(q=query, type="album")
-            if not search_results["albums"]["items"]:
-                return None
-            return search_results["albums"]["items"][0]
+            return await self._run_blocking(func, *args)
         except Exception as e:
             if self._is_rate_limit_exception(e):
                 raise SpotifyRateLimitException("Rate limit reached") from e
             raise
 
-    async def get_album_metadata(self, artist: str, album: str) -> Album | None:
+    async def _search_with_retry(self, query: str) -> dict | None:
+        """
+        Searches for a release on Spotify, with rate limit handling.
+
+        :param query: The search query.
+        :return: The first search result, or None if no results are found.
+        """
+        return await self._call_with_retry(self._search, query)
+
+    async def _albums_with_retry(self, album_ids: list[str]) -> dict[str, dict | None]:
+        return await self._call_with_retry(self._albums, album_ids)
+
+    async def _fetch_by_id(self, release_id: str) -> dict | None:
+        """
+        Fetches an album from Spotify by its ID, batched with the other albums fetched meanwhile.
+
+        :param release_id: The Spotify ID of the album.
+        :return: The album, or None if it does not exist.
+        """
+        return await self.albums_batcher.get(release_id)
+
+    async def get_album_metadata(
+        self, artist: str, album: str, external_ids: dict[str, str] | None = None
+    ) -> Album | None:
         """
         Retrieves album metadata from Spotify.
 
         :param artist: The artist name.
         :param album: The album name.
+        :param external_ids: The IDs of the album on external services, used to fetch the album
+            directly when its Spotify ID is known.
         :return: The album metadata, or None if no results are found.
         """
         logger.debug(f"Retrieving metadata for {album} by {artist} on Spotify")
-        release = await self._search_with_retry(f"artist:{artist} album:{album}")
+        release = await self._find_release(artist, album, external_ids)
         if not release:
             logger.warning(f"No results found for {album} by {artist}")
             return None
         logger.debug(f"Album data: {release}")
         return SpotifyAlbumAdapter().to_album(metadata=release)
+
+    async def get_artist_metadata(self, artist: str) -> Artist | None:
+        """
+        Retrieves artist metadata from Spotify, which holds the genres that its albums lack.
+
+        :param artist: The artist name.
+        :return: The artist metadata, or None if no results are found.
+        """
+        logger.debug(f"Retrieving metadata for artist {artist} on Spotify")
+        metadata = await self._cached(
+            f"artist:{normalize_query(artist, '')}", partial(self._call_with_retry, self._search_artist, artist)
+        )
+        if not metadata:
+            logger.warning(f"No results found for artist {artist}")
+            return None
+        return SpotifyAlbumAdapter().to_artist(metadata=metadata)
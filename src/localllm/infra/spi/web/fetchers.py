@@ -0,0 +1,128 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from itertools import islice
+
+import httpx
+import structlog
+
+from localllm.domain.multimedia import Album
+from localllm.domain.ports.fetchers import AlbumLibraryReader
+from localllm.infra.spi.persistence.file.fetchers import json_to_albums
+
+logger = structlog.getLogger()
+
+LMS_JSONRPC_PATH = "/jsonrpc.js"
+LMS_ALBUM_TAGS = "tags:aaly"
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 30.0
+
+
+class LMSRequestError(Exception):
+    """
+    Exception raised when the LMS JSON-RPC endpoint returns an invalid response.
+    """  # noqa: D200
+
+    pass
+
+
+def _albums_request(start: int, count: int) -> dict:
+    return {"id": 1, "method": "slim.request", "params": ["-", ["albums", str(start), count, LMS_ALBUM_TAGS]]}
+
+
+class LMSAlbumReader(AlbumLibraryReader):
+    """
+    Reads albums from the JSON-RPC endpoint of a Lyrion Music Server (LMS).
+
+    Albums are requested page by page with ``slim.request``. Pages are fetched concurrently over a
+    pool of keep-alive connections and albums are yielded in library order as soon as their page
+    has arrived.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        client: httpx.AsyncClient | None = None,
+    ):
+        """
+        Initializes the LMSAlbumReader.
+
+        :param url: The base URL of the LMS server (e.g. http://nas:9000).
+        :param page_size: The number of albums requested per page.
+        :param max_concurrency: The maximum number of pages fetched at the same time.
+        :param timeout: The timeout of a page request, in seconds.
+        :param client: An HTTP client to use instead of a dedicated one.
+        """
+        self.url = url.rstrip("/") + LMS_JSONRPC_PATH
+        self.page_size = page_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client = client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+        )
+
+    async def _fetch_page(self, client: httpx.AsyncClient, start: int) -> tuple[list[dict], int]:
+        """
+        Fetches a page of albums.
+
+        :param client: The HTTP client.
+        :param start: The index of the first album of the page.
+        :return: The albums of the page and the total number of albums in the library.
+        """
+        logger.debug(f"Fetching albums {start} to {start + self.page_size} from {self.url}")
+        response = await client.post(self.url, json=_albums_request(start, self.page_size))
+        response.raise_for_status()
+        try:
+            result = response.json()["result"]
+            return result.get("albums_loop", []), int(result.get("count", 0))
+        except (ValueError, KeyError, TypeError) as e:
+            raise LMSRequestError(f"Invalid response from {self.url}") from e
+
+    async def iter_read(self) -> AsyncIterator[Album]:
+        """
+        Reads albums from the LMS server as pages are received.
+
+        :return: AsyncIterator[Album], the albums of the library, in library order
+        """
+        client = self._client or self._create_client()
+        pending: deque[asyncio.Task] = deque()
+        try:
+            first_page, total = await self._fetch_page(client, 0)
+            logger.info(f"{total} albums available on {self.url}")
+
+            starts = iter(range(self.page_size, total, self.page_size))
+            pending.extend(
+                asyncio.create_task(self._fetch_page(client, start)) for start in islice(starts, self.max_concurrency)
+            )
+            for album in json_to_albums(first_page):
+                yield album
+
+            while pending:
+                page, _ = await pending.popleft()
+                if (start := next(starts, None)) is not None:
+                    pending.append(asyncio.create_task(self._fetch_page(client, start)))
+                for album in json_to_albums(page):
+                    yield album
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if client is not self._client:
+                await client.aclose()
+
+    async def read(self) -> list[Album]:
+        """
+        Reads all albums from the LMS server.
+
+        :return: list[Album], the albums of the library
+        """
+        return [album async for album in self.iter_read()]
@@ -0,0 +1,218 @@
+import threading
+import time
+from collections.abc import Callable, Mapping
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import requests
+import structlog
+from discogs_client.fetchers import UserTokenRequestsFetcher
+from requests.adapters import HTTPAdapter
+
+from localllm.infra.spi.web.connections import mount_adapter
+
+logger = structlog.getLogger()
+
+TOO_MANY_REQUESTS = 429
+DISCOGS_LIMIT_HEADER = "X-Discogs-Ratelimit"
+DISCOGS_USED_HEADER = "X-Discogs-Ratelimit-Used"
+DISCOGS_REMAINING_HEADER = "X-Discogs-Ratelimit-Remaining"
+RETRY_AFTER_HEADER = "Retry-After"
+DISCOGS_WINDOW = 60.0
+DECLARED_RATE_MARGIN = 0.9
+DEFAULT_INCREASE = 0.1
+MIN_RATE = 0.05
+
+
+class RateGovernor:
+    """
+    Paces the requests sent to a provider so that they are not rejected for exceeding its rate limit.
+
+    Requests take a token from a bucket refilled at ``rate`` tokens per second. The rate adapts to
+    the provider responses:
+
+    - a limit declared by the provider headers sets the rate, with a safety margin, and a declared
+      remaining quota caps the tokens available right away;
+    - without a declared limit, a successful response raises the rate by ``increase`` up to
+      ``max_rate``, probing for the highest rate the provider accepts;
+    - a rejected response halves the rate and holds every request until its ``Retry-After`` delay.
+
+    The governor is thread safe, requests wait on the thread sending them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        max_rate: float | None = None,
+        burst: int = 1,
+        increase: float = DEFAULT_INCREASE,
+        window: float = DISCOGS_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initializes the governor.
+
+        :param name: the name of the provider, used in logs.
+        :param rate: the initial number of requests per second.
+        :param max_rate: the highest number of requests per second, until the provider declares its limit.
+        :param burst: the number of requests that can be sent at once after an idle period.
+        :param increase: the number of requests per second added after each successful response.
+        :param window: the length in seconds of the window of a limit declared by the provider.
+        :param clock: the function returning the current time in seconds.
+        :param sleep: the function waiting for a number of seconds.
+        """
+        self.name = name
+        self.rate = rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.burst = burst
+        self.increase = increase
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self) -> float:
+        """
+        Waits until a request can be sent.
+
+        :return: the time in seconds spent waiting.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens -= 1
+            delay = max(-self._tokens / self.rate, self._blocked_until - now, 0.0)
+            self.requests += 1
+            self.waited += delay
+        if delay:
+            self.sleep(delay)
+        return delay
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """
+        Adapts the pace of the requests to a provider response.
+
+        :param status_code: the HTTP status of the response.
+        :param headers: the HTTP headers of the response.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if limit := _int_header(headers, DISCOGS_LIMIT_HEADER):
+                self.max_rate = limit / self.window * DECLARED_RATE_MARGIN
+            remaining = _int_header(headers, DISCOGS_REMAINING_HEADER)
+            if remaining is None and limit and (used := _int_header(headers, DISCOGS_USED_HEADER)) is not None:
+                remaining = limit - used
+            if remaining is not None:
+                self._tokens = min(self._tokens, float(remaining))
+
+            if status_code == TOO_MANY_REQUESTS:
+                self.throttled += 1
+                self.rate = max(MIN_RATE, self.rate / 2)
+                retry_after = _retry_after(headers)
+                self._blocked_until = max(self._blocked_until, now + (retry_after or 1 / self.rate))
+                self._tokens = min(self._tokens, 0.0)
+                logger.info(f"{self.name} rejected a request, slowing down to {self.rate:.2f} requests/s")
+            elif limit:
+                self.rate = self.max_rate
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> int | None:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _retry_after(headers: Mapping[str, str]) -> float | None:
+    """
+    Reads the delay of a Retry-After header, given either in seconds or as an HTTP date.
+
+    :param headers: the HTTP headers of the response.
+    :return: the delay in seconds, or None if the header is missing or invalid.
+    """
+    value = headers.get(RETRY_AFTER_HEADER)
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class GovernedSession(requests.Session):
+    """HTTP session pacing its requests with a rate governor."""
+
+    def __init__(self, governor: RateGovernor, adapter: HTTPAdapter | None = None):
+        """
+        Initializes the session.
+
+        :param governor: the governor pacing the requests of the session.
+        :param adapter: the adapter sending the requests of the session, the default one when None.
+        """
+        super().__init__()
+        self.governor = governor
+        if adapter:
+            mount_adapter(self, adapter)
+
+    def request(self, method: str | bytes, url: str | bytes, *args: Any, **kwargs: Any) -> requests.Response:
+        """
+        Sends a request once the governor allows it, and reports the response to the governor.
+
+        :return: the response.
+        """
+        self.governor.acquire()
+        response = super().request(method, url, *args, **kwargs)
+        self.governor.observe(response.status_code, response.headers)
+        return response
+
+
+class GovernedDiscogsFetcher(UserTokenRequestsFetcher):
+    """
+    Discogs fetcher sending its requests through a governed session.
+
+    The exponential backoff of the Discogs client is disabled, rejected requests are reported to
+    the caller instead of being retried blindly.
+    """
+
+    backoff_enabled = False
+
+    def __init__(self, user_token: str, session: GovernedSession):
+        """
+        Initializes the fetcher.
+
+        :param user_token: the Discogs API token.
+        :param session: the session sending the requests.
+        """
+        super().__init__(user_token)
+        self.session = session
+
+    def request(
+        self, method: str, url: str, data: Any, headers: dict[str, str] | None, params: dict | None = None
+    ) -> requests.Response:
+        return self.session.request(
+            method=method,
+            url=url,
+            data=data,
+            headers=headers,
+            params=params,
+            timeout=(self.connect_timeout, self.read_timeout),
+        )
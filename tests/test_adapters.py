@@ -402,3 +402,49 @@ def test_spotify_empty_metadata(spotify_adapter):
 def test_track_conversion(spotify_adapter, valid_spotify_metadata):
     album = spotify_adapter.to_album(valid_spotify_metadata)
     assert len(album.tracklist) == 0
+
+
+def test_discogs_release_conversion(discogs_adapter):
+    release = {
+        "id": 715896,
+        "title": "Symphony X",
+        "artists": [{"name": "Symphony X", "id": 289374}],
+        "year": 1996,
+        "genres": ["Rock"],
+        "styles": ["Heavy Metal", "Prog Rock"],
+        "labels": [{"name": "Zero Corporation", "catno": "XRCN-1240"}, {"name": "Inside Out Music"}],
+        "country": "Japan",
+        "tracklist": [
+            {"position": "", "type_": "heading", "title": "Side A", "duration": ""},
+            {"position": "A1", "type_": "track", "title": "Into The Dementia", "duration": "1:03"},
+            {"position": "A2", "type_": "track", "title": "The Raging Season", "duration": ""},
+        ],
+        "resource_url": "https://api.discogs.com/releases/715896",
+    }
+
+    album = discogs_adapter.to_album(release)
+
+    assert (album.title, album.artist, album.year) == ("Symphony X", "Symphony X", 1996)
+    assert album.labels == ["Zero Corporation", "Inside Out Music"]
+    assert [(track.position, track.title, track.duration) for track in album.tracklist] == [
+        (1, "Into The Dementia", 63),
+        (2, "The Raging Season", None),
+    ]
+    assert album.external_ids == {"discogs": "715896"}
+
+
+def test_spotify_full_album_conversion(spotify_adapter, valid_spotify_metadata):
+    metadata = {
+        **valid_spotify_metadata,
+        "label": "Inside Out Music",
+        "popularity": 42,
+        "tracks": {"items": [{"track_number": 1, "name": "Smoke and Mirrors", "duration_ms": 369333}]},
+    }
+
+    album = spotify_adapter.to_album(metadata)
+
+    assert album.labels == ["Inside Out Music"]
+    assert album.popularity == 42
+    assert [(track.position, track.title, track.duration) for track in album.tracklist] == [
+        (1, "Smoke and Mirrors", 369)
+    ]
@@ -0,0 +1,134 @@
+import json
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from localllm.application.use_cases.enrich_albums import EnrichAlbums
+from localllm.domain.multimedia import Album
+from localllm.infra.spi.web.cassettes import (
+    Cassette,
+    CassetteMissError,
+    RecordingHTTPAdapter,
+    ReplayHTTPAdapter,
+    build_response,
+)
+from localllm.infra.spi.web.connections import mount_adapter
+from localllm.infra.spi.web.enrichers import DiscogsAlbumEnricher
+from localllm.infra.spi.web.pacing import RateGovernor
+
+
+class DiscogsUpstream(HTTPAdapter):
+    """Adapter answering Discogs searches as the live API would, counting the requests it receives."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+
+    def send(self, request, *args, **kwargs):
+        self.requests += 1
+        release = {"id": 575009, "type": "release", "title": "Ayreon - The Final Experiment", "year": "1995"}
+        body = {"pagination": {"page": 1, "pages": 1, "per_page": 50, "items": 1}, "results": [release]}
+        headers = {"Content-Type": "application/json", "X-Discogs-Ratelimit": "60", "Connection": "keep-alive"}
+        return build_response(request, 200, headers, json.dumps(body).encode())
+
+
+def discogs_enricher(adapter: HTTPAdapter) -> DiscogsAlbumEnricher:
+    return DiscogsAlbumEnricher(
+        discogs_token="token", governor=RateGovernor("discogs", rate=1000.0), http_adapter=adapter
+    )
+
+
+@pytest.fixture()
+def catalog():
+    return [Album(album_id=str(i), title="The Final Experiment", artist="Ayreon", year=1995) for i in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_enrichment_replayed_from_cassette_should_match_recorded_one(tmp_path, catalog):
+    # Given an enrichment recorded in a cassette
+    path = tmp_path / "discogs.jsonl"
+    upstream = DiscogsUpstream()
+    enricher = discogs_enricher(RecordingHTTPAdapter(Cassette(path), upstream))
+    recorded_albums = await EnrichAlbums([enricher]).enrich_albums(catalog)
+    enricher.close()
+
+    # When replaying the enrichment from the cassette
+    replayer = ReplayHTTPAdapter(Cassette(path))
+    enricher = discogs_enricher(replayer)
+    replayed_albums = await EnrichAlbums([enricher]).enrich_albums(catalog)
+    enricher.close()
+
+    # Then the albums should be enriched the same way, without reaching the provider
+    assert replayed_albums == recorded_albums
+    assert recorded_albums[0].external_ids == {"discogs": "575009"}
+    assert upstream.requests == replayer.requests
+    assert (replayer.misses, replayer.throttled) == (0, 0)
+
+
+def test_cassette_should_not_record_credentials(tmp_path):
+    path = tmp_path / "spotify.jsonl"
+    request = requests.Request("POST", "https://accounts.spotify.com/api/token", data={"grant_type": "x"}).prepare()
+    response = build_response(request, 200, {}, json.dumps({"access_token": "secret", "expires_in": 3600}).encode())
+
+    Cassette(path).record(Cassette.key(request), response)
+
+    assert "secret" not in path.read_text()
+    assert json.loads(Cassette(path).get(Cassette.key(request))["body"])["expires_in"] == 3600
+
+
+def test_cassette_key_should_ignore_query_parameters_order():
+    first = requests.Request("GET", "https://api.discogs.com/database/search?q=a&type=release").prepare()
+    second = requests.Request("GET", "https://api.discogs.com/database/search?type=release&q=a").prepare()
+
+    assert Cassette.key(first) == Cassette.key(second)
+
+
+def test_replay_should_inject_the_same_latency_and_rate_limits_on_every_run(tmp_path):
+    # Given a cassette of 200 recorded requests
+    cassette = Cassette(tmp_path / "cassette.jsonl")
+    urls = [f"https://api.spotify.com/v1/albums/{i}" for i in range(200)]
+    for url in urls:
+        request = requests.Request("GET", url).prepare()
+        cassette.record(Cassette.key(request), build_response(request, 200, {}, b"{}"))
+
+    def run() -> tuple[list[int], list[float]]:
+        delays = []
+        adapter = ReplayHTTPAdapter(cassette, latency=0.01, jitter=0.02, rate_limited=0.1, sleep=delays.append)
+        session = mount_adapter(requests.Session(), adapter)
+        return [session.get(url).status_code for url in reversed(urls)], delays
+
+    # When replaying the requests twice
+    first_statuses, first_delays = run()
+    second_statuses, second_delays = run()
+
+    # Then the same requests should be rejected and delayed the same way
+    assert first_statuses == second_statuses
+    assert 10 <= first_statuses.count(429) <= 30
+    assert sorted(first_delays) == sorted(second_delays)
+    assert all(0.01 <= delay <= 0.03 for delay in first_delays)
+
+
+def test_replay_should_fail_on_requests_not_recorded(tmp_path):
+    session = mount_adapter(requests.Session(), ReplayHTTPAdapter(Cassette(tmp_path / "empty.jsonl")))
+
+    with pytest.raises(CassetteMissError):
+        session.get("https://api.discogs.com/releases/1")
+
+
+def test_replay_should_answer_batches_grouped_differently_from_the_recording(tmp_path):
+    # Given Spotify albums recorded in two batches
+    cassette = Cassette(tmp_path / "spotify.jsonl")
+    for ids in (["a", "b"], ["c"]):
+        request = requests.Request("GET", "https://api.spotify.com/v1/albums", params={"ids": ",".join(ids)}).prepare()
+        body = {"albums": [{"id": album_id, "name": album_id.upper()} for album_id in ids]}
+        cassette.record_request(request, build_response(request, 200, {}, json.dumps(body).encode()))
+
+    # When replaying the albums in other batches
+    session = mount_adapter(requests.Session(), ReplayHTTPAdapter(Cassette(tmp_path / "spotify.jsonl")))
+    response = session.get("https://api.spotify.com/v1/albums", params={"ids": "c,a"})
+
+    # Then the batch should be answered from the albums recorded, in the order requested
+    assert [album["name"] for album in response.json()["albums"]] == ["C", "A"]
+    with pytest.raises(CassetteMissError):
+        session.get("https://api.spotify.com/v1/albums", params={"ids": "a,d"})
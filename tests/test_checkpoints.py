@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from localllm.application.use_cases.enrich_albums import EnrichAlbums
+from localllm.domain.multimedia import Album
+from localllm.infra.spi.persistence.file.checkpoints import JSONLAlbumCheckpoint
+from localllm.infra.spi.persistence.file.repository import JSONAlbumFileStorage
+
+
+class CountingEnricher:
+    name = "discogs"
+
+    def __init__(self):
+        self.titles = []
+
+    async def get_album_metadata(self, artist: str, album: str, external_ids: dict | None = None) -> Album | None:
+        self.titles.append(album)
+        return Album(album_id="discogs_1", title=album, artist=artist, year=2000, genres=["Rock"])
+
+
+@pytest.fixture()
+def checkpoint(tmp_path):
+    checkpoint = JSONLAlbumCheckpoint(tmp_path / "enriched_albums.jsonl")
+    yield checkpoint
+    checkpoint.close()
+
+
+def test_iter_albums_should_return_recorded_albums_in_order(checkpoint, enriched_albums):
+    for album in enriched_albums:
+        checkpoint.append(album)
+
+    assert list(checkpoint.iter_albums()) == enriched_albums
+    assert checkpoint.album_ids() == {album.album_id for album in enriched_albums}
+
+
+def test_iter_albums_should_be_empty_when_checkpoint_does_not_exist(checkpoint):
+    assert list(checkpoint.iter_albums()) == []
+
+
+def test_append_should_drop_partial_line_left_by_interrupted_run(checkpoint, albums):
+    # Given a checkpoint whose last line was cut by a crash
+    checkpoint.path.write_text(albums[0].model_dump_json() + "\n" + albums[1].model_dump_json()[:20])
+
+    # When reading it, then recording another album
+    read_before = list(checkpoint.iter_albums())
+    checkpoint.append(albums[2])
+
+    # Then the incomplete album should be ignored and replaced
+    assert read_before == [albums[0]]
+    assert list(checkpoint.iter_albums()) == [albums[0], albums[2]]
+
+
+@pytest.mark.asyncio
+async def test_enrich_albums_should_resume_after_interrupted_run(checkpoint, albums):
+    # Given a run interrupted after two albums
+    use_case = EnrichAlbums([CountingEnricher()], workers=1, queue_size=1, checkpoint=checkpoint)
+    enriched_albums = use_case.iter_enrich(albums)
+    await anext(enriched_albums)
+    await anext(enriched_albums)
+    await enriched_albums.aclose()
+
+    # When resuming the run
+    enricher = CountingEnricher()
+    resumed = await EnrichAlbums([enricher], workers=1, checkpoint=checkpoint).enrich_albums(albums, resume=True)
+
+    # Then only the remaining album should be enriched and the checkpoint should hold all albums
+    assert enricher.titles == [albums[2].title]
+    assert [album.album_id for album in resumed] == [albums[2].album_id]
+    assert [album.album_id for album in use_case.iter_enriched()] == [album.album_id for album in albums]
+
+
+@pytest.mark.asyncio
+async def test_enrich_albums_should_backfill_albums_skipped_by_unavailable_provider(checkpoint, albums):
+    # Given a run which could not query Discogs for the second album
+    checkpoint.append(albums[0])
+    checkpoint.append(albums[1].model_copy(update={"genres": ["Pop"], "pending_sources": ["discogs"]}))
+
+    # When resuming the run
+    enricher = CountingEnricher()
+    use_case = EnrichAlbums([enricher], workers=1, checkpoint=checkpoint)
+    resumed = await use_case.enrich_albums(albums, resume=True)
+
+    # Then Discogs should be queried for the skipped and remaining albums only
+    assert enricher.titles == [albums[1].title, albums[2].title]
+    assert sorted(resumed[0].genres) == ["Pop", "Rock"]
+    assert resumed[0].pending_sources == []
+    assert list(use_case.iter_enriched()) == [albums[0], *resumed]
+
+
+def test_iter_albums_should_only_return_last_record_of_an_album(checkpoint, albums):
+    checkpoint.append(albums[0].model_copy(update={"pending_sources": ["spotify"]}))
+    checkpoint.append(albums[1])
+    checkpoint.append(albums[0])
+
+    assert list(checkpoint.iter_albums()) == [albums[1], albums[0]]
+
+
+@pytest.mark.asyncio
+async def test_enrich_albums_should_start_over_without_resume(checkpoint, albums):
+    use_case = EnrichAlbums([CountingEnricher()], checkpoint=checkpoint)
+    await use_case.enrich_albums(albums)
+
+    await use_case.enrich_albums(albums[:1])
+
+    assert [album.album_id for album in use_case.iter_enriched()] == [albums[0].album_id]
+
+
+def test_save_should_stream_albums_with_json_dump_layout(tmp_path, checkpoint, enriched_albums):
+    # Given enriched albums recorded in a checkpoint
+    for album in enriched_albums:
+        checkpoint.append(album)
+    path = tmp_path / "enriched_albums.json"
+
+    # When saving the checkpoint to a JSON file
+    JSONAlbumFileStorage().save(path, checkpoint.iter_albums())
+
+    # Then the file should be the same as a dump of the whole list
+    assert path.read_text() == json.dumps([album.model_dump(mode="json") for album in enriched_albums], indent=4)
+
+
+def test_save_should_write_empty_list(tmp_path):
+    path = tmp_path / "enriched_albums.json"
+
+    JSONAlbumFileStorage().save(path, iter(()))
+
+    assert json.loads(path.read_text()) == []
@@ -0,0 +1,22 @@
+import pytest
+from typer.testing import CliRunner
+
+from localllm.infra.api import cli
+
+
+@pytest.mark.parametrize("command", ["ingest", "sync"])
+def test_reading_the_library_should_fail_when_the_lms_server_is_not_configured(command, monkeypatch):
+    # Given settings without any LMS server
+    for name in ["DISCOGS_USER_TOKEN", "SPOTIFY_CLIENT_ID", "SPOTIFY_CLIENT_SECRET"]:
+        monkeypatch.setenv(name, "secret")
+    monkeypatch.setenv("DATABASE_MODEL_URL", "sqlite:///:memory:")
+    monkeypatch.setenv("VECTOR_MODEL_URL", "http://localhost:6333")
+    monkeypatch.setenv("LMS_URL", "")
+    monkeypatch.setattr(cli, "create_multimedia_service", lambda: pytest.fail("No album should be read"))
+
+    # When reading albums from the LMS server
+    result = CliRunner().invoke(cli.app, [command, "--lms"])
+
+    # Then the command should fail, naming the missing setting
+    assert result.exit_code == 2
+    assert "LMS_URL" in result.output
@@ -0,0 +1,87 @@
+import json
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from localllm.infra.spi.web.connections import PooledHTTPAdapter, PrivateCacheFileHandler, mount_adapter
+from localllm.infra.spi.web.enrichers import SpotifyAlbumEnricher
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        content = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_pooled_adapter_should_reuse_connections_across_sessions(server):
+    # Given two sessions sharing an adapter keeping 4 connections per host
+    adapter = PooledHTTPAdapter(pool_size=4)
+    sessions = [mount_adapter(requests.Session(), adapter) for _ in range(2)]
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    # When sending requests from more threads than connections
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda i: sessions[i % 2].get(url), range(80)))
+
+    # Then every request should be served by one of the pooled connections
+    assert all(response.status_code == 200 for response in responses)
+    assert adapter.requests == 80
+    assert 1 <= adapter.handshakes <= 4
+    assert server.connections == adapter.handshakes
+
+
+def test_private_cache_file_handler_should_write_token_for_owner_only(tmp_path):
+    path = tmp_path / "tokens" / "spotify_token.json"
+
+    PrivateCacheFileHandler(path).save_token_to_cache({"access_token": "token", "expires_at": 0})
+
+    assert json.loads(path.read_text())["access_token"] == "token"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_spotify_enricher_should_reuse_cached_token_until_it_expires(tmp_path):
+    # Given a token cached by a previous run, still valid for an hour
+    path = tmp_path / "spotify_token.json"
+    token = {"access_token": "cached", "token_type": "Bearer", "expires_in": 3600, "expires_at": time.time() + 3600}
+    path.write_text(json.dumps(token))
+
+    # When a new enricher needs a token
+    enricher = SpotifyAlbumEnricher(client_id="id", client_secret="secret", token_cache_path=path)
+    access_token = enricher.spotify.auth_manager.get_access_token(as_dict=False)
+    enricher.close()
+
+    # Then the cached token should be used without requesting a new one
+    assert access_token == "cached"
+    assert enricher.http_adapter.requests == 0
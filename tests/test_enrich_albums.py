@@ -0,0 +1,351 @@
+import asyncio
+import time
+
+import pytest
+
+from localllm.application.use_cases.enrich_albums import EnrichAlbums
+from localllm.domain.multimedia import Album, Artist
+from localllm.domain.ports.enrichers import ProviderUnavailableError
+
+
+class FakeEnricher:
+    """Async enricher recording how many requests it serves at the same time."""
+
+    def __init__(
+        self,
+        name: str,
+        delays: dict[str, float] | None = None,
+        failing: set[str] | None = None,
+        unavailable: bool = False,
+    ):
+        self.name = name
+        self.delays = delays or {}
+        self.failing = failing or set()
+        self.unavailable = unavailable
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def get_album_metadata(self, artist: str, album: str, external_ids: dict | None = None) -> Album | None:
+        if self.unavailable:
+            raise ProviderUnavailableError(f"{self.name} is unavailable")
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(album, 0.01))
+            if album in self.failing:
+                raise RuntimeError(f"{self.name} is down")
+            return Album(album_id=f"{self.name}_{album}", title=album, artist=artist, year=2000, genres=[self.name])
+        finally:
+            self.in_flight -= 1
+
+
+class FakeArtistEnricher(FakeEnricher):
+    """Async enricher also providing artist metadata."""
+
+    def __init__(
+        self,
+        name: str,
+        failing_artists: set[str] | None = None,
+        artist_delay: float = 0.01,
+        renamed_artists: dict[str, str] | None = None,
+    ):
+        super().__init__(name)
+        self.failing_artists = failing_artists or set()
+        self.renamed_artists = renamed_artists or {}
+        self.artist_delay = artist_delay
+        self.artist_calls = []
+
+    async def get_artist_metadata(self, artist: str) -> Artist | None:
+        self.artist_calls.append(artist)
+        await asyncio.sleep(self.artist_delay)
+        if artist in self.failing_artists:
+            raise RuntimeError(f"{self.name} is down")
+        name = self.renamed_artists.get(artist, artist.strip().title())
+        return Artist(name=name, genres=["Progressive Metal"], styles=["Rock Opera"])
+
+
+class CountingConnections:
+    """Counters of a transport shared by enrichers."""
+
+    def __init__(self, requests: int = 0, handshakes: int = 0):
+        self.requests = requests
+        self.handshakes = handshakes
+
+
+class ConnectedEnricher(FakeEnricher):
+    """Async enricher sending its requests through a shared transport."""
+
+    def __init__(self, name: str, connections: CountingConnections):
+        super().__init__(name)
+        self.connections = connections
+
+    async def get_album_metadata(self, artist: str, album: str, external_ids: dict | None = None) -> Album | None:
+        if not self.calls:
+            self.connections.handshakes += 1
+        self.connections.requests += 1
+        return await super().get_album_metadata(artist, album, external_ids)
+
+
+@pytest.fixture()
+def catalog():
+    return [Album(album_id=str(i), title=f"Album {i}", artist="Artist Name", year=2000) for i in range(20)]
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_keep_album_order(catalog):
+    # Given albums whose enrichment finishes in reverse order
+    delays = {album.title: 0.001 * (len(catalog) - i) for i, album in enumerate(catalog)}
+    use_case = EnrichAlbums([FakeEnricher("discogs", delays), FakeEnricher("spotify")], workers=5)
+
+    # When enriching the albums
+    enriched_albums = [album async for album in use_case.iter_enrich(catalog)]
+
+    # Then albums should be handed back in their original order, with merged metadata
+    assert [album.album_id for album in enriched_albums] == [album.album_id for album in catalog]
+    assert sorted(enriched_albums[0].genres) == ["discogs", "spotify"]
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_limit_concurrent_requests_per_provider(catalog):
+    discogs, spotify = FakeEnricher("discogs"), FakeEnricher("spotify")
+    use_case = EnrichAlbums([discogs, spotify], workers=6, provider_limits={"discogs": 2})
+
+    assert len(await use_case.enrich_albums(catalog)) == len(catalog)
+    assert discogs.max_in_flight == 2
+    assert spotify.max_in_flight == 6
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_not_read_albums_ahead_of_the_queue(catalog):
+    # Given a stream of albums recording how many albums were read
+    read = []
+
+    async def stream():
+        for album in catalog:
+            read.append(album)
+            yield album
+
+    use_case = EnrichAlbums([FakeEnricher("discogs")], workers=2, queue_size=4)
+
+    # When the consumer stops after the first album while workers keep going
+    enriched_albums = use_case.iter_enrich(stream())
+    await anext(enriched_albums)
+    await asyncio.sleep(0.1)
+    read_ahead = len(read)
+    await enriched_albums.aclose()
+
+    # Then only the queued albums should have been read
+    assert read_ahead <= 1 + 4 + 2
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_keep_albums_whose_provider_failed(catalog):
+    # Given an enricher raising an error for one album
+    use_case = EnrichAlbums([FakeEnricher("discogs", failing={"Album 3"}), FakeEnricher("spotify")], workers=4)
+
+    # When enriching albums
+    enriched_albums = await use_case.enrich_albums(catalog)
+
+    # Then the album should be enriched from the other enricher and wait for the failed one
+    assert len(enriched_albums) == len(catalog)
+    assert enriched_albums[3].genres == ["spotify"]
+    assert enriched_albums[3].pending_sources == ["discogs"]
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_raise_error_when_albums_cannot_be_read(catalog):
+    async def stream():
+        yield catalog[0]
+        raise OSError("library is unreachable")
+
+    use_case = EnrichAlbums([FakeEnricher("discogs")], workers=2)
+
+    with pytest.raises(OSError):
+        [album async for album in use_case.iter_enrich(stream())]
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_merge_identical_lookups_running_at_the_same_time():
+    # Given the same album listed several times, in different editions and spellings
+    catalog = [
+        Album(album_id="1", title="The Final Experiment", artist="Ayreon", year=1995),
+        Album(album_id="2", title="The Final Experiment (Special Edition)", artist="Ayreon", year=2005),
+        Album(album_id="3", title="the final experiment", artist="AYREON", year=1995),
+        Album(album_id="4", title="Actual Fantasy", artist="Ayreon", year=1996),
+    ]
+    discogs = FakeEnricher("discogs")
+    use_case = EnrichAlbums([discogs], workers=4)
+
+    # When enriching them concurrently
+    enriched_albums = await use_case.enrich_albums(catalog)
+
+    # Then a single request should be sent per distinct title, other editions keeping their own
+    assert discogs.calls == 3
+    assert [album.album_id for album in enriched_albums] == ["1", "2", "3", "4"]
+    assert enriched_albums[1].title == "The Final Experiment (Special Edition)"
+    assert all(album.genres == ["discogs"] for album in enriched_albums)
+    assert (use_case.stats.requested, use_case.stats.issued, use_case.stats.saved) == (4, 3, 1)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_look_up_each_artist_once_per_run(catalog):
+    # Given albums of two artists and a source providing artist metadata
+    catalog[5:] = [album.model_copy(update={"artist": "symphony x"}) for album in catalog[5:]]
+    spotify = FakeArtistEnricher("spotify")
+    use_case = EnrichAlbums([FakeEnricher("discogs"), spotify], workers=4, artist_lookups=True)
+
+    # When enriching the albums
+    enriched_albums = await use_case.enrich_albums(catalog)
+
+    # Then each artist should be looked up once and shared by all of its albums
+    assert sorted(spotify.artist_calls) == ["Artist Name", "symphony x"]
+    assert {album.artist for album in enriched_albums[5:]} == {"symphony x"}
+    assert all("Progressive Metal" in album.genres and album.styles == ["Rock Opera"] for album in enriched_albums)
+    assert use_case.stats.artist_lookups.shared == len(catalog) - 2
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_keep_albums_when_artist_lookup_failed(catalog):
+    spotify = FakeArtistEnricher("spotify", failing_artists={"Artist Name"})
+
+    enriched_albums = await EnrichAlbums([spotify], workers=4, artist_lookups=True).enrich_albums(catalog)
+
+    assert len(enriched_albums) == len(catalog)
+    assert all(album.genres == ["spotify"] for album in enriched_albums)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_ignore_artists_found_with_another_name(catalog):
+    spotify = FakeArtistEnricher("spotify", renamed_artists={"Artist Name": "Artist Name Tribute Band"})
+
+    enriched_albums = await EnrichAlbums([spotify], workers=4, artist_lookups=True).enrich_albums(catalog)
+
+    assert all(album.artist == "Artist Name" and album.genres == ["spotify"] for album in enriched_albums)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_fall_back_on_other_enrichers_when_provider_is_unavailable(catalog):
+    # Given Discogs refusing every lookup while Spotify answers
+    use_case = EnrichAlbums([FakeEnricher("discogs", unavailable=True), FakeEnricher("spotify")], workers=4)
+
+    # When enriching the albums
+    enriched_albums = await use_case.enrich_albums(catalog)
+
+    # Then every album should be enriched by Spotify and marked for a Discogs backfill
+    assert len(enriched_albums) == len(catalog)
+    assert all(album.genres == ["spotify"] for album in enriched_albums)
+    assert all(album.pending_sources == ["discogs"] for album in enriched_albums)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_hand_albums_back_at_deadline_and_patch_them_later(catalog):
+    # Given a Spotify answering long after the deadline of each album
+    slow = {album.title: 0.3 for album in catalog}
+    use_case = EnrichAlbums([FakeEnricher("discogs"), FakeEnricher("spotify", slow)], workers=20, deadline=0.05)
+
+    # When enriching the albums
+    start = time.perf_counter()
+    versions = [(time.perf_counter() - start, album) async for album in use_case.iter_enrich(catalog)]
+
+    # Then every album should be handed back at its deadline with the Discogs metadata only
+    first_versions, patches = versions[: len(catalog)], versions[len(catalog) :]
+    assert [album.album_id for _, album in first_versions] == [album.album_id for album in catalog]
+    assert max(elapsed for elapsed, _ in first_versions) < 0.25
+    assert all(album.genres == ["discogs"] and album.pending_sources == ["spotify"] for _, album in first_versions)
+    # And be handed back again once Spotify answered, without pending sources
+    assert sorted(album.album_id for _, album in patches) == sorted(album.album_id for album in catalog)
+    assert all(sorted(album.genres) == ["discogs", "spotify"] and not album.pending_sources for _, album in patches)
+    assert (use_case.stats.late, use_case.stats.backfilled) == (len(catalog), len(catalog))
+
+
+@pytest.mark.asyncio
+async def test_enrich_albums_should_return_latest_version_of_late_albums(catalog):
+    slow = {catalog[0].title: 0.2}
+    use_case = EnrichAlbums([FakeEnricher("discogs", slow, failing={catalog[0].title})], deadline=0.05)
+
+    enriched_albums = await use_case.enrich_albums(catalog[:3])
+
+    # The late lookup failed, so the album keeps its pending source for a resumed run
+    assert [album.album_id for album in enriched_albums] == ["0", "1", "2"]
+    assert enriched_albums[0].pending_sources == ["discogs"]
+    assert (use_case.stats.late, use_case.stats.backfilled) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_backfill_albums_sharing_a_late_lookup_with_a_failed_album(catalog):
+    # Given albums of the same artist, the first one failing on Discogs while the artist lookup they
+    # share on Spotify misses the deadline
+    spotify = FakeArtistEnricher("spotify", artist_delay=0.2)
+    use_case = EnrichAlbums(
+        [FakeEnricher("discogs", failing={catalog[0].title}), spotify], workers=4, deadline=0.05, artist_lookups=True
+    )
+
+    # When enriching the albums
+    versions = await asyncio.wait_for(collect(use_case.iter_enrich(catalog[:4])), timeout=2)
+
+    # Then the failed album should not cancel the lookup shared by the others, which should be patched
+    assert [album.album_id for album in versions] == ["0", "1", "2", "3", "0", "1", "2", "3"]
+    assert all("Progressive Metal" in album.genres for album in versions[4:])
+    assert [album.pending_sources for album in versions[4:]] == [["discogs"], [], [], []]
+    assert spotify.artist_calls == ["Artist Name"]
+
+
+async def collect(albums):
+    return [album async for album in albums]
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_not_look_up_artists_unless_enabled(catalog):
+    spotify = FakeArtistEnricher("spotify")
+    use_case = EnrichAlbums([spotify], workers=4)
+
+    await use_case.enrich_albums(catalog)
+
+    assert spotify.artist_calls == []
+    assert (use_case.stats.requested, use_case.stats.issued, use_case.stats.saved) == (20, 20, 0)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_count_http_requests_and_handshakes_of_the_run(catalog):
+    # Given a transport shared by two enrichers, already used by a previous run
+    connections = CountingConnections(requests=100, handshakes=10)
+    enrichers = [ConnectedEnricher("discogs", connections), ConnectedEnricher("spotify", connections)]
+    use_case = EnrichAlbums(enrichers, connections=connections)
+
+    # When enriching albums
+    await collect(use_case.iter_enrich(catalog))
+
+    # Then only the requests and handshakes of the run should be counted
+    assert (use_case.stats.http_requests, use_case.stats.handshakes) == (2 * len(catalog), 2)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_not_count_the_time_waiting_for_a_busy_provider_in_the_deadline(catalog):
+    # Given a provider answering one request at a time, well within the deadline
+    slow = FakeEnricher("slow", delays={album.title: 0.01 for album in catalog})
+    use_case = EnrichAlbums([slow, FakeEnricher("fast")], provider_limits={"slow": 1}, deadline=0.05)
+
+    # When enriching more albums than the provider can answer before the deadline
+    albums = await collect(use_case.iter_enrich(catalog))
+
+    # Then no album should be late for having waited for the provider
+    assert use_case.stats.late == 0
+    assert len(albums) == len(catalog)
+    assert all(sorted(album.genres) == ["fast", "slow"] for album in albums)
+
+
+@pytest.mark.asyncio
+async def test_iter_enrich_should_wait_for_late_lookups_beyond_the_queue_size(catalog):
+    # Given an enricher always missing the deadline and room for two late lookups
+    slow = FakeEnricher("slow", delays={album.title: 0.05 for album in catalog})
+    use_case = EnrichAlbums([slow], workers=4, queue_size=2, deadline=0.001)
+
+    # When enriching four albums at the same time
+    albums = await collect(use_case.iter_enrich(catalog[:4]))
+
+    # Then only two albums should be handed back before being enriched, then patched
+    assert use_case.stats.late == 2
+    assert [album.pending_sources for album in albums].count(["slow"]) == 2
+    assert len(albums) == 6
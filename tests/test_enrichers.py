@@ -0,0 +1,389 @@
+import asyncio
+import time
+
+import discogs_client
+import pytest
+from tenacity import wait_none
+
+from localllm.application.use_cases.enrich_albums import EnrichAlbums
+from localllm.domain.multimedia import Album
+from localllm.domain.ports.enrichers import ProviderUnavailableError
+from localllm.infra.spi.web.breaker import CircuitBreaker
+from localllm.infra.spi.web.cache import SQLiteResponseCache
+from localllm.infra.spi.web.enrichers import DiscogsAlbumEnricher, SpotifyAlbumEnricher, SpotifyRateLimitException
+
+LATENCY = 0.1
+
+
+class StubRelease:
+    def __init__(self, data: dict):
+        self.data = data
+
+    def refresh(self):
+        if self.data is None:
+            raise discogs_client.exceptions.HTTPError("Release not found.", 404)
+
+
+class StubDiscogsClient:
+    def __init__(self, latency: float = LATENCY, unknown: set[str] | None = None):
+        self.latency = latency
+        self.unknown = unknown or set()
+        self.down = False
+        self.queries = []
+        self.release_ids = []
+
+    def search(self, query: str, type: str):
+        self.queries.append(query)
+        time.sleep(self.latency)
+        if self.down:
+            raise ConnectionError("Discogs is down")
+        if query in self.unknown:
+            return []
+        release = {"id": 575009, "title": "Ayreon - The Final Experiment", "year": "1995", "genre": ["Rock"]}
+        return [StubRelease(release)]
+
+    def release(self, release_id: int):
+        self.release_ids.append(release_id)
+        if str(release_id) in self.unknown:
+            return StubRelease(None)
+        return StubRelease(
+            {
+                "id": release_id,
+                "title": "The Final Experiment",
+                "artists": [{"name": "Ayreon (2)"}],
+                "year": 1995,
+                "genres": ["Rock"],
+                "styles": ["Prog Rock"],
+                "labels": [{"name": "Transmission Records", "catno": "TM-001"}],
+                "tracklist": [{"position": "1", "type_": "track", "title": "Prologue", "duration": "3:54"}],
+            }
+        )
+
+
+class StubSpotifyClient:
+    def __init__(self, latency: float = LATENCY, failures: int = 0):
+        self.latency = latency
+        self.failures = failures
+        self.queries = []
+        self.artist_queries = []
+        self.batches = []
+
+    def search(self, q: str, type: str):
+        if type == "artist":
+            self.artist_queries.append(q)
+            items = [
+                {"id": "0Yyb6zvfKSnYVvKCcVvMc5", "name": "Ayreon Tribute", "genres": ["tribute"]},
+                {"id": "2RSApl0SXcVT8Yiy4UaPSt", "name": "Ayreon", "genres": ["prog"]},
+            ]
+            return {"artists": {"items": items}}
+        self.queries.append(q)
+        time.sleep(self.latency)
+        if len(self.queries) <= self.failures:
+            raise Exception("http status: 429, code: -1 - rate limit reached")
+        return {"albums": {"items": [{"id": "4uLU6hMCjMI75M1A2tKUQC", "name": "The Final Experiment"}]}}
+
+    def albums(self, albums: list[str]):
+        self.batches.append(albums)
+        time.sleep(self.latency)
+        return {
+            "albums": [
+                None
+                if album_id == "unknown"
+                else {
+                    "id": album_id,
+                    "name": f"Album {album_id}",
+                    "artists": [{"name": "Ayreon"}],
+                    "release_date": "1995-04-01",
+                    "tracks": {"items": [{"track_number": 1, "name": "Prologue", "duration_ms": 234000}]},
+                }
+                for album_id in albums
+            ]
+        }
+
+
+@pytest.fixture()
+def discogs_enricher():
+    enricher = DiscogsAlbumEnricher(discogs_token="token", max_workers=4)
+    enricher.discogs = StubDiscogsClient()
+    yield enricher
+    enricher.close()
+
+
+@pytest.fixture()
+def spotify_enricher():
+    enricher = SpotifyAlbumEnricher(client_id="id", client_secret="secret", max_workers=4)
+    enricher.spotify = StubSpotifyClient()
+    yield enricher
+    enricher.close()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    return Clock()
+
+
+@pytest.fixture()
+def response_cache(tmp_path, clock):
+    cache = SQLiteResponseCache(tmp_path / "cache.db", ttls={"discogs": 3600}, negative_ttl=60, clock=clock)
+    yield cache
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_convert_search_result(discogs_enricher, spotify_enricher):
+    discogs_album = await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+    spotify_album = await spotify_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+
+    assert discogs_album.external_ids == {"discogs": "575009"}
+    assert spotify_album.external_ids == {"spotify": "4uLU6hMCjMI75M1A2tKUQC"}
+    assert discogs_enricher.discogs.queries == ["Ayreon The Final Experiment"]
+    assert spotify_enricher.spotify.queries == ["artist:Ayreon album:The Final Experiment"]
+
+
+@pytest.mark.asyncio
+async def test_enrich_albums_should_run_provider_requests_concurrently(discogs_enricher, spotify_enricher, albums):
+    # Given 8 albums and two providers answering after a fixed latency with 4 workers each
+    catalog = [albums[i % len(albums)].model_copy(update={"album_id": str(i)}) for i in range(8)]
+    use_case = EnrichAlbums([discogs_enricher, spotify_enricher])
+
+    # When enriching the albums
+    start = time.perf_counter()
+    enriched_albums = await use_case.enrich_albums(catalog)
+    elapsed = time.perf_counter() - start
+
+    # Then the 16 requests should take about 2 latencies instead of 16
+    assert len(enriched_albums) == 8
+    assert elapsed < 8 * LATENCY
+
+
+@pytest.mark.asyncio
+async def test_search_should_retry_when_rate_limit_is_reached(spotify_enricher, monkeypatch):
+    spotify_enricher.spotify = StubSpotifyClient(latency=0, failures=2)
+    monkeypatch.setattr(SpotifyAlbumEnricher._call_with_retry.retry, "wait", wait_none())
+
+    album = await spotify_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+
+    assert album.title == "The Final Experiment"
+    assert len(spotify_enricher.spotify.queries) == 3
+
+
+@pytest.mark.asyncio
+async def test_search_should_raise_error_when_rate_limit_persists(spotify_enricher, monkeypatch):
+    spotify_enricher.spotify = StubSpotifyClient(latency=0, failures=10)
+    monkeypatch.setattr(SpotifyAlbumEnricher._call_with_retry.retry, "wait", wait_none())
+
+    with pytest.raises(SpotifyRateLimitException):
+        await spotify_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+
+
+@pytest.mark.asyncio
+async def test_enrich_albums_should_not_query_providers_again_on_unchanged_catalog(
+    discogs_enricher, spotify_enricher, response_cache, albums
+):
+    # Given enrichers sharing a response cache and a first enrichment run
+    discogs_enricher.cache = spotify_enricher.cache = response_cache
+    discogs_enricher.discogs.latency = spotify_enricher.spotify.latency = 0
+    use_case = EnrichAlbums([discogs_enricher, spotify_enricher])
+    first_run = await use_case.enrich_albums(albums)
+    calls = len(discogs_enricher.discogs.queries) + len(spotify_enricher.spotify.queries)
+
+    # When enriching the same albums again
+    second_run = await use_case.enrich_albums(albums)
+
+    # Then no provider should be queried and the result should be the same
+    assert calls == 2 * len(albums)
+    assert len(discogs_enricher.discogs.queries) + len(spotify_enricher.spotify.queries) == calls
+    assert second_run == first_run
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_share_cache_entry_between_equivalent_queries(discogs_enricher, response_cache):
+    discogs_enricher.cache = response_cache
+
+    await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+    await discogs_enricher.get_album_metadata(" AYREON ", "the  final experiment")
+
+    assert discogs_enricher.discogs.queries == ["Ayreon The Final Experiment"]
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_cache_missing_albums_with_negative_ttl(
+    discogs_enricher, response_cache, clock
+):
+    # Given an album unknown to Discogs
+    discogs_enricher.cache = response_cache
+    discogs_enricher.discogs.unknown = {"Ayreon Unknown"}
+
+    # When searching it twice within the negative TTL, then once after it expired
+    assert await discogs_enricher.get_album_metadata("Ayreon", "Unknown") is None
+    assert await discogs_enricher.get_album_metadata("Ayreon", "Unknown") is None
+    clock.now += 61
+    assert await discogs_enricher.get_album_metadata("Ayreon", "Unknown") is None
+
+    # Then Discogs should only be queried again once the negative entry expired
+    assert discogs_enricher.discogs.queries == ["Ayreon Unknown", "Ayreon Unknown"]
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_query_provider_when_cached_response_expired(
+    discogs_enricher, response_cache, clock
+):
+    discogs_enricher.cache = response_cache
+
+    await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+    clock.now += 3599
+    await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+    clock.now += 2
+    await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+
+    assert len(discogs_enricher.discogs.queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_enrich_albums_should_fetch_spotify_albums_by_id_in_batches(spotify_enricher):
+    # Given 45 albums whose Spotify ID is known
+    catalog = [
+        Album(album_id=str(i), title=f"Album {i}", artist="Ayreon", year=1995, external_ids={"spotify": f"id{i}"})
+        for i in range(45)
+    ]
+    spotify_enricher.spotify.latency = 0.01
+
+    # When enriching them
+    enriched_albums = await EnrichAlbums([spotify_enricher], workers=45).enrich_albums(catalog)
+
+    # Then Spotify should be called once per batch of 20 albums and never searched
+    assert [len(batch) for batch in spotify_enricher.spotify.batches] == [20, 20, 5]
+    assert spotify_enricher.spotify.queries == []
+    assert [album.external_ids["spotify"] for album in enriched_albums] == [f"id{i}" for i in range(45)]
+    assert enriched_albums[0].tracklist[0].duration == 234
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_fetch_discogs_release_by_id(discogs_enricher):
+    album = await discogs_enricher.get_album_metadata(
+        "Ayreon", "The Final Experiment", external_ids={"discogs": "575009", "spotify": "4uLU6hMCjMI75M1A2tKUQC"}
+    )
+
+    assert discogs_enricher.discogs.release_ids == [575009]
+    assert discogs_enricher.discogs.queries == []
+    assert (album.artist, album.labels, album.tracklist[0].duration) == ("Ayreon", ["Transmission Records"], 234)
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_search_when_id_is_unknown(discogs_enricher, spotify_enricher):
+    discogs_enricher.discogs.unknown = {"404"}
+
+    discogs_album = await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment", {"discogs": "404"})
+    spotify_album = await spotify_enricher.get_album_metadata("Ayreon", "The Final Experiment", {"spotify": "unknown"})
+
+    assert discogs_enricher.discogs.queries == ["Ayreon The Final Experiment"]
+    assert spotify_enricher.spotify.queries == ["artist:Ayreon album:The Final Experiment"]
+    assert discogs_album.external_ids == {"discogs": "575009"}
+    assert spotify_album.external_ids == {"spotify": "4uLU6hMCjMI75M1A2tKUQC"}
+
+
+@pytest.mark.asyncio
+async def test_get_artist_metadata_should_return_cached_spotify_artist(spotify_enricher, response_cache):
+    spotify_enricher.cache = response_cache
+
+    artist = await spotify_enricher.get_artist_metadata("Ayreon")
+    await spotify_enricher.get_artist_metadata("AYREON")
+
+    assert artist.name == "Ayreon"
+    assert artist.genres == ["prog"]
+    assert artist.external_ids == {"spotify": "2RSApl0SXcVT8Yiy4UaPSt"}
+    assert spotify_enricher.spotify.artist_queries == ["artist:Ayreon"]
+
+
+@pytest.mark.asyncio
+async def test_get_artist_metadata_should_ignore_artists_with_another_name(spotify_enricher):
+    assert await spotify_enricher.get_artist_metadata("Ayreo") is None
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_stop_calling_provider_while_breaker_is_open(discogs_enricher, clock):
+    # Given a failing Discogs and a breaker opening after two failures
+    discogs_enricher.discogs.latency = 0
+    discogs_enricher.discogs.down = True
+    discogs_enricher.breaker = CircuitBreaker("discogs", failure_threshold=2, cooldown=60, clock=clock)
+
+    # When albums are looked up during the failures and the cooldown
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+    with pytest.raises(ProviderUnavailableError):
+        await discogs_enricher.get_album_metadata("Ayreon", "Actual Fantasy")
+
+    # Then Discogs should not be called once the breaker opened
+    assert len(discogs_enricher.discogs.queries) == 2
+    assert discogs_enricher.breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_close_breaker_when_probe_succeeds(discogs_enricher, clock):
+    # Given an open breaker whose cooldown has passed, and a Discogs available again
+    discogs_enricher.discogs.latency = 0
+    discogs_enricher.breaker = CircuitBreaker("discogs", failure_threshold=1, cooldown=60, clock=clock)
+    discogs_enricher.breaker.record_failure()
+    clock.now += 61
+
+    # When an album is looked up
+    album = await discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment")
+
+    # Then the probe should go through and close the breaker
+    assert album.title == "The Final Experiment"
+    assert discogs_enricher.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_get_album_metadata_should_not_count_cancelled_calls_as_failures(discogs_enricher, clock):
+    # Given a breaker opening after a single failure, probing Discogs again after its cooldown
+    discogs_enricher.discogs.latency = 0.2
+    discogs_enricher.breaker = CircuitBreaker("discogs", failure_threshold=1, cooldown=60, clock=clock)
+
+    async def cancelled_lookup():
+        lookup = asyncio.create_task(discogs_enricher.get_album_metadata("Ayreon", "The Final Experiment"))
+        await asyncio.sleep(0.01)
+        lookup.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lookup
+
+    # When a lookup is cancelled before Discogs answers
+    await cancelled_lookup()
+
+    # Then it should not count as a failure
+    assert (discogs_enricher.breaker.state, discogs_enricher.breaker.failures) == (CircuitBreaker.CLOSED, 0)
+
+    # When a probe is cancelled once the breaker opened and cooled down
+    discogs_enricher.breaker.record_failure()
+    clock.now += 61
+    await cancelled_lookup()
+
+    # Then the breaker should let the next lookup probe Discogs
+    discogs_enricher.discogs.latency = 0
+    assert (await discogs_enricher.get_album_metadata("Ayreon", "Actual Fantasy")).title == "The Final Experiment"
+    assert discogs_enricher.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_should_let_a_single_probe_through_and_reopen_when_it_fails(clock):
+    breaker = CircuitBreaker("spotify", failure_threshold=3, cooldown=60, clock=clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 60
+
+    breaker.before_call()
+    with pytest.raises(ProviderUnavailableError):
+        breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(ProviderUnavailableError):
+        breaker.before_call()
@@ -0,0 +1,123 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from localllm.application.use_cases.load_albums import LoadAlbums
+from localllm.infra.spi.persistence.file.fetchers import LocalFileJSONReader, json_to_album, json_to_albums
+from localllm.infra.spi.persistence.file.streams import JSONStreamError, iter_json_array
+
+INPUTS_FOLDER = Path(__file__).parent.parent / "data" / "inputs"
+
+
+@pytest.fixture()
+def reader():
+    return LocalFileJSONReader()
+
+
+@pytest.fixture()
+def lms_file(tmp_path):
+    path = tmp_path / "albums.json"
+    path.write_text(
+        json.dumps(
+            {
+                "id": 1,
+                "method": "slim.request",
+                "params": ["-", ["albums", "0", 3, "tags:aaly"]],
+                "result": {
+                    "albums_loop": [
+                        {"id": 1234, "album": "Paint in the Sky", "year": 2021, "artist": "Artist Name"},
+                        {"id": 5678, "album": "Echoes of the see", "year": 2022, "artist": "Another Artist"},
+                        {"id": 9876, "album": "Echoes of the Forest", "year": 2022, "artist": "Another Artist"},
+                    ],
+                    "count": 3,
+                },
+            }
+        )
+    )
+    return path
+
+
+def test_iter_read_should_stream_albums_from_lms_export(reader, lms_file):
+    # When streaming albums from an LMS export
+    albums = reader.iter_read(lms_file)
+
+    # Then albums should be yielded one at a time, in file order
+    assert next(albums).album_id == "1234"
+    assert [album.album_id for album in albums] == ["5678", "9876"]
+
+
+def test_iter_read_should_stream_albums_from_top_level_list(reader, tmp_path, albums):
+    # Given a file containing a top level list of albums
+    path = tmp_path / "enriched_albums.json"
+    path.write_text(json.dumps([album.model_dump(mode="json") for album in albums], indent=4))
+
+    # When streaming albums
+    streamed_albums = list(reader.iter_read(path))
+
+    # Then all the albums should be read
+    assert streamed_albums == albums
+
+
+def test_iter_read_should_return_same_albums_as_read(reader):
+    path = INPUTS_FOLDER / "albums.json"
+
+    assert list(reader.iter_read(path)) == reader.read(path)
+
+
+def test_iter_read_should_raise_error_when_file_does_not_exist(reader, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        next(reader.iter_read(tmp_path / "missing.json"))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64])
+def test_iter_json_array_should_handle_values_split_across_chunks(chunk_size):
+    document = '{"count": 12345, "result": {"other": [1, {"a": "b"}], "albums_loop": [{"id": 1}, 12345, "x"]}}'
+
+    items = list(iter_json_array(io.StringIO(document), path=("result", "albums_loop"), chunk_size=chunk_size))
+
+    assert items == [{"id": 1}, 12345, "x"]
+
+
+def test_iter_json_array_should_raise_error_when_path_is_missing():
+    with pytest.raises(JSONStreamError):
+        list(iter_json_array(io.StringIO('{"result": {"count": 0}}'), path=("result", "albums_loop")))
+
+
+def test_load_albums_iter_albums_should_stream_from_fetcher(lms_file):
+    use_case = LoadAlbums(LocalFileJSONReader())
+
+    assert [album.album_id for album in use_case.iter_albums(lms_file)] == ["1234", "5678", "9876"]
+
+
+def test_load_albums_iter_albums_should_be_empty_without_fetcher(lms_file):
+    assert list(LoadAlbums().iter_albums(lms_file)) == []
+
+
+def test_json_to_albums_should_convert_like_json_to_album():
+    json_albums = [
+        {"id": 1234, "album": "Paint in the Sky", "year": 2021, "artist": "Artist Name"},
+        {"album_id": "5678", "title": "Echoes of the see", "year": 2022, "artist": "Another Artist", "genres": ["Pop"]},
+    ]
+
+    assert json_to_albums(json_albums) == [json_to_album(json_album) for json_album in json_albums]
+
+
+def test_json_to_albums_should_raise_error_when_an_album_is_invalid():
+    json_albums = [
+        {"id": 1234, "album": "Paint in the Sky", "year": 2021, "artist": "Artist Name"},
+        {"id": 5678, "album": "", "year": 2022, "artist": "Another Artist"},
+    ]
+
+    with pytest.raises(ValidationError):
+        json_to_albums(json_albums)
+
+
+def test_read_should_keep_enriched_metadata(reader, tmp_path, enriched_album):
+    path = tmp_path / "enriched_albums.json"
+    path.write_text(json.dumps([enriched_album.model_dump(mode="json")]))
+
+    assert reader.read(path) == [enriched_album]
+    assert next(reader.iter_read(path)).external_ids == {"spotify": "1234"}
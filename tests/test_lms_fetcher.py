@@ -0,0 +1,130 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from localllm.application.use_cases.load_albums import FetchAlbums
+from localllm.infra.spi.persistence.file.fetchers import LocalFileJSONReader
+from localllm.infra.spi.web.fetchers import LMSAlbumReader, LMSRequestError
+
+ALBUMS_FILE = Path(__file__).parent.parent / "data" / "inputs" / "albums.json"
+
+
+class LMSStandInServer(ThreadingHTTPServer):
+    """Serves the albums of the LMS export fixture in pages, like the slim.request endpoint."""
+
+    daemon_threads = True
+
+    def __init__(self, albums: list[dict]):
+        super().__init__(("127.0.0.1", 0), LMSRequestHandler)
+        self.albums = albums
+        self.requests = []
+        self.connections = set()
+        self.broken = False
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class LMSRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        command, start, count, tags = body["params"][1]
+        self.server.requests.append((command, int(start), count, tags))
+
+        if self.server.broken:
+            payload = b"not json"
+        else:
+            result = {"count": len(self.server.albums)}
+            if page := self.server.albums[int(start) : int(start) + count]:
+                result["albums_loop"] = page
+            payload = json.dumps({**body, "result": result}).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def lms_server():
+    albums = json.loads(ALBUMS_FILE.read_text())["result"]["albums_loop"]
+    server = LMSStandInServer(albums)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_read_should_fetch_all_albums_in_library_order(lms_server):
+    reader = LMSAlbumReader(url=lms_server.url, page_size=100, max_concurrency=4)
+
+    albums = await reader.read()
+
+    assert albums == LocalFileJSONReader().read(ALBUMS_FILE)
+    assert sorted(start for _, start, _, _ in lms_server.requests) == list(range(0, 1425, 100))
+    assert {(command, count, tags) for command, _, count, tags in lms_server.requests} == {("albums", 100, "tags:aaly")}
+
+
+@pytest.mark.asyncio
+async def test_read_should_reuse_pooled_connections(lms_server):
+    reader = LMSAlbumReader(url=lms_server.url, page_size=50, max_concurrency=3)
+
+    await reader.read()
+
+    assert len(lms_server.requests) == 29
+    assert len(lms_server.connections) <= 3
+
+
+@pytest.mark.asyncio
+async def test_iter_read_should_stream_first_albums_before_all_pages_are_fetched(lms_server):
+    reader = LMSAlbumReader(url=lms_server.url, page_size=100, max_concurrency=2)
+
+    albums = reader.iter_read()
+    first_album = await anext(albums)
+    requests_before_consumption = len(lms_server.requests)
+    await albums.aclose()
+
+    assert first_album.album_id == "9012"
+    assert requests_before_consumption < 15
+
+
+@pytest.mark.asyncio
+async def test_read_should_return_empty_list_when_library_is_empty(lms_server):
+    lms_server.albums = []
+
+    assert await LMSAlbumReader(url=lms_server.url).read() == []
+
+
+@pytest.mark.asyncio
+async def test_read_should_raise_error_when_response_is_invalid(lms_server):
+    lms_server.broken = True
+
+    with pytest.raises(LMSRequestError):
+        await LMSAlbumReader(url=lms_server.url).read()
+
+
+@pytest.mark.asyncio
+async def test_fetch_albums_should_return_albums_from_reader(lms_server):
+    use_case = FetchAlbums(LMSAlbumReader(url=lms_server.url, page_size=500))
+
+    albums = await use_case.fetch_albums()
+
+    assert len(albums) == 1425
+
+
+@pytest.mark.asyncio
+async def test_fetch_albums_should_return_empty_list_without_reader():
+    assert await FetchAlbums().fetch_albums() == []
@@ -0,0 +1,105 @@
+import pytest
+
+from localllm.application.use_cases.merging import FIRST, KEEP, AlbumMerger, ProviderResult
+from localllm.domain.multimedia import Album, Artist, Track
+
+
+@pytest.fixture()
+def discogs_album():
+    return Album(
+        album_id="discogs_1",
+        title="Paint in the Sky",
+        artist="artist name",
+        year=2020,
+        genres=["Rock", "Pop"],
+        labels=["Label 1"],
+        country="UK",
+        tracklist=[Track(position=1, title="Track 1")],
+        popularity=10,
+        external_urls={"discogs": "https://www.discogs.com/release/1"},
+        external_ids={"discogs": "1"},
+    )
+
+
+@pytest.fixture()
+def spotify_album():
+    return Album(
+        album_id="spotify_1",
+        title="Paint in the Sky",
+        artist="Artist Name",
+        year=2021,
+        genres=["Pop", "Indie"],
+        country="US",
+        tracklist=[Track(position=1, title="Track 1", duration=180)],
+        popularity=70,
+        external_urls={"spotify": "https://open.spotify.com/album/1"},
+        external_ids={"spotify": "1", "discogs": "2"},
+    )
+
+
+def test_merge_should_apply_the_policy_of_each_field(album, discogs_album, spotify_album):
+    # Given the results of two enrichers
+    results = [ProviderResult("discogs", discogs_album), ProviderResult("spotify", spotify_album)]
+
+    # When merging them into an album
+    merged_album = AlbumMerger().merge(album, results)
+
+    # Then lists should be united in order, without duplicates
+    assert merged_album.genres == ["Rock", "Pop", "Indie"]
+    assert merged_album.labels == ["Label 1"]
+    # And scalars should come from the first enricher, unless a provider has priority on them
+    assert (merged_album.title, merged_album.artist, merged_album.year) == ("Paint in the Sky", "artist name", 2020)
+    assert (merged_album.country, merged_album.popularity) == ("UK", 70)
+    # And dicts should be overlaid by the later enrichers
+    assert merged_album.external_ids == {"discogs": "2", "spotify": "1"}
+    assert set(merged_album.external_urls) == {"discogs", "spotify"}
+    # And the first tracklist should be kept, the album identifiers left untouched
+    assert merged_album.tracklist == discogs_album.tracklist
+    assert (merged_album.album_id, merged_album.pending_sources) == ("1234", [])
+
+
+def test_merge_should_give_the_same_album_whatever_the_run(album, discogs_album, spotify_album):
+    results = [ProviderResult("discogs", discogs_album), ProviderResult("spotify", spotify_album)]
+
+    assert (
+        AlbumMerger().merge(album, results).model_dump_json() == AlbumMerger().merge(album, results).model_dump_json()
+    )
+
+
+def test_merge_should_add_artist_genres_without_renaming_the_artist(album, discogs_album):
+    artist = Artist(name="ARTIST NAME", genres=["Progressive Metal", "Rock"], styles=["Rock Opera"])
+
+    merged_album = AlbumMerger().merge(
+        album, [ProviderResult("discogs", discogs_album), ProviderResult("spotify", None, artist)]
+    )
+
+    assert merged_album.artist == "artist name"
+    assert merged_album.genres == ["Rock", "Pop", "Progressive Metal"]
+    assert merged_album.styles == ["Rock Opera"]
+
+
+def test_merge_should_follow_custom_policies_and_priorities(enriched_album, discogs_album, spotify_album):
+    # Given a merger keeping the title, keeping the set country, and trusting Spotify first for the year
+    merger = AlbumMerger(policies={"title": KEEP, "country": FIRST}, priorities={"year": ["spotify"]})
+    results = [
+        ProviderResult("discogs", discogs_album.model_copy(update={"title": "Other"})),
+        ProviderResult("spotify", spotify_album),
+    ]
+
+    # When merging the results into an enriched album
+    merged_album = merger.merge(enriched_album, results, pending_sources=["lastfm"])
+
+    # Then each field should follow its policy
+    assert (merged_album.title, merged_album.country, merged_album.year) == ("Paint in the Sky", "US", 2021)
+    assert merged_album.pending_sources == ["lastfm"]
+
+
+def test_merge_should_return_the_album_itself_when_nothing_changed(enriched_album):
+    assert AlbumMerger().merge(enriched_album, [ProviderResult("discogs", enriched_album)]) is enriched_album
+
+
+def test_merger_should_reject_unknown_fields_and_policies():
+    with pytest.raises(ValueError, match="Unknown album fields: rating"):
+        AlbumMerger(policies={"rating": KEEP})
+    with pytest.raises(ValueError, match="Unknown merge policies: average"):
+        AlbumMerger(policies={"year": "average"})
@@ -65,7 +65,7 @@ async def test_enrich_albums(service, albums, mock_enrich_album_use_case):
 
     enriched_albums = await service.enrich_albums(albums)
 
-    mock_enrich_album_use_case.enrich_albums.assert_called_once_with(albums)
+    mock_enrich_album_use_case.enrich_albums.assert_called_once_with(albums, resume=False)
     assert enriched_albums == albums
 
 
@@ -107,3 +107,47 @@ def test_search_albums(service, album, mock_index_albums_use_case):
 
     mock_index_albums_use_case.search_albums.assert_called_once_with(query, top_k=top_k)
     assert search_results == albums
+
+
+def test_iter_albums(service, albums, mock_load_albums_use_case):
+    album_file_path = Path("/path/to/albums")
+    mock_load_albums_use_case.iter_albums.return_value = iter(albums)
+
+    streamed_albums = service.iter_albums(album_file_path)
+
+    mock_load_albums_use_case.iter_albums.assert_called_once_with(file_path=album_file_path)
+    assert list(streamed_albums) == albums
+
+
+@pytest.mark.asyncio
+async def test_fetch_albums(albums):
+    mock_fetch_albums_use_case = AsyncMock()
+    mock_fetch_albums_use_case.fetch_albums.return_value = albums
+    service = MultimediaIngesterService(
+        load_albums_use_case=Mock(),
+        enrich_album_use_case=AsyncMock(),
+        store_albums_use_case=AsyncMock(),
+        index_albums_use_case=Mock(),
+        fetch_albums_use_case=mock_fetch_albums_use_case,
+    )
+
+    fetched_albums = await service.fetch_albums()
+
+    mock_fetch_albums_use_case.fetch_albums.assert_called_once_with()
+    assert fetched_albums == albums
+
+
+@pytest.mark.asyncio
+async def test_sync_albums(mock_load_albums_use_case, albums):
+    sync_albums_use_case = AsyncMock()
+    service = MultimediaIngesterService(
+        load_albums_use_case=mock_load_albums_use_case,
+        enrich_album_use_case=AsyncMock(),
+        store_albums_use_case=Mock(),
+        index_albums_use_case=Mock(),
+        sync_albums_use_case=sync_albums_use_case,
+    )
+
+    await service.sync_albums(albums, enrich=False)
+
+    sync_albums_use_case.sync_albums.assert_called_once_with(albums, enrich=False)
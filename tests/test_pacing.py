@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from localllm.application.use_cases.enrich_albums import EnrichAlbums
+from localllm.domain.multimedia import Album
+from localllm.infra.spi.web.enrichers import DiscogsAlbumEnricher
+from localllm.infra.spi.web.pacing import GovernedSession, RateGovernor
+
+
+class RateLimitedServer(ThreadingHTTPServer):
+    """Local HTTP server rejecting the requests above a limit, with Discogs or Spotify headers."""
+
+    daemon_threads = True
+
+    def __init__(self, limit: int, window: float, moving: bool):
+        super().__init__(("127.0.0.1", 0), RateLimitedHandler)
+        self.limit = limit
+        self.window = window
+        self.moving = moving
+        self.lock = threading.Lock()
+        self.accepted = deque()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.log = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def admit(self) -> tuple[int, dict[str, str]]:
+        with self.lock:
+            now = time.monotonic()
+            if self.moving:
+                # Discogs counts requests over a moving window and declares the remaining quota
+                while self.accepted and self.accepted[0] <= now - self.window:
+                    self.accepted.popleft()
+                status = 429 if len(self.accepted) >= self.limit else 200
+                if status == 200:
+                    self.accepted.append(now)
+                headers = {
+                    "X-Discogs-Ratelimit": str(self.limit),
+                    "X-Discogs-Ratelimit-Used": str(len(self.accepted)),
+                    "X-Discogs-Ratelimit-Remaining": str(self.limit - len(self.accepted)),
+                }
+            else:
+                # Spotify counts requests over a fixed window and only answers Retry-After when it is exceeded
+                if now - self.window_start >= self.window:
+                    self.window_start, self.window_count = now, 0
+                self.window_count += 1
+                status = 429 if self.window_count > self.limit else 200
+                headers = {"Retry-After": "1"} if status == 429 else {}
+            self.log.append((now, status))
+            return status, headers
+
+    @property
+    def rejected(self) -> int:
+        return sum(1 for _, status in self.log if status == 429)
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, headers = self.server.admit()
+        if status == 429:
+            body = {"message": "You are making requests too quickly."}
+        else:
+            release = {"id": 575009, "type": "release", "title": "Ayreon - The Final Experiment", "year": "1995"}
+            body = {"pagination": {"page": 1, "pages": 1, "per_page": 50, "items": 1}, "results": [release]}
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in {**headers, "Content-Type": "application/json"}.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def server(request):
+    server = RateLimitedServer(**request.param)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+
+
+def test_acquire_should_space_requests_at_the_governor_rate():
+    clock = FakeClock()
+    governor = RateGovernor("discogs", rate=2.0, clock=clock, sleep=clock.sleep)
+
+    delays = [governor.acquire() for _ in range(3)]
+
+    assert delays == [0.0, 0.5, 1.0]
+
+
+def test_observe_should_follow_declared_limit_and_remaining_quota():
+    clock = FakeClock()
+    governor = RateGovernor("discogs", rate=5.0, burst=10, clock=clock, sleep=clock.sleep)
+
+    governor.observe(200, {"X-Discogs-Ratelimit": "60", "X-Discogs-Ratelimit-Used": "60"})
+
+    assert governor.rate == pytest.approx(60 / 60 * 0.9)
+    assert governor.acquire() == pytest.approx(1 / governor.rate)
+
+
+def test_observe_should_slow_down_and_hold_requests_until_retry_after():
+    clock = FakeClock()
+    governor = RateGovernor("spotify", rate=8.0, max_rate=20.0, clock=clock, sleep=clock.sleep)
+
+    governor.observe(429, {"Retry-After": "3"})
+
+    assert governor.rate == 4.0
+    assert governor.acquire() == 3.0
+
+
+@pytest.mark.parametrize("server", [{"limit": 20, "window": 1.0, "moving": True}], indirect=True)
+@pytest.mark.asyncio
+async def test_enrich_albums_should_follow_discogs_rate_limit_headers(server):
+    # Given a Discogs accepting 20 requests per moving second, and an enricher starting at that rate
+    enricher = DiscogsAlbumEnricher(
+        discogs_token="token", max_workers=4, governor=RateGovernor("discogs", rate=20.0, window=1.0)
+    )
+    enricher.discogs._base_url = server.url
+    catalog = [Album(album_id=str(i), title=f"Album {i}", artist="Ayreon", year=1995) for i in range(30)]
+
+    # When enriching albums with more workers than Discogs allows requests per second
+    enriched_albums = await EnrichAlbums([enricher], workers=8).enrich_albums(catalog)
+    enricher.close()
+
+    # Then no request should be rejected, at the declared rate minus a safety margin
+    assert len(enriched_albums) == len(catalog)
+    assert server.rejected == 0
+    assert enricher.governor.rate == pytest.approx(18.0)
+
+
+@pytest.mark.parametrize("server", [{"limit": 10, "window": 1.0, "moving": False}], indirect=True)
+def test_governed_session_should_wait_retry_after_when_spotify_rejects_requests(server):
+    # Given a Spotify accepting 10 requests per second, and a governor probing for its rate
+    governor = RateGovernor("spotify", rate=8.0, max_rate=50.0, increase=1.0)
+    session = GovernedSession(governor)
+
+    # When sending requests for a few seconds
+    for _ in range(40):
+        session.get(f"{server.url}/v1/albums")
+
+    # Then rejections should stay rare, and no request should be sent before Retry-After elapsed
+    assert 0 < server.rejected <= 4
+    assert governor.throttled == server.rejected
+    for (rejected_at, status), (next_at, _) in zip(server.log, server.log[1:], strict=False):
+        if status == 429:
+            assert next_at - rejected_at >= 1.0
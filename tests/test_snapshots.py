@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from localllm.application.use_cases.load_albums import LoadAlbums
+from localllm.infra.spi.persistence.file.fetchers import LocalFileJSONReader
+from localllm.infra.spi.persistence.file.snapshots import PickleAlbumSnapshotCache, snapshot_path
+
+
+@pytest.fixture()
+def source(tmp_path, enriched_albums):
+    path = tmp_path / "enriched_albums.json"
+    path.write_text(json.dumps([album.model_dump(mode="json") for album in enriched_albums]))
+    return path
+
+
+@pytest.fixture()
+def cache():
+    return PickleAlbumSnapshotCache()
+
+
+def test_load_should_return_none_when_no_snapshot_exists(cache, source):
+    assert cache.load(source) is None
+
+
+def test_load_should_return_saved_albums_when_source_is_unchanged(cache, source, enriched_albums):
+    # Given a snapshot of the source file
+    cache.save(source, enriched_albums)
+
+    # When loading the snapshot
+    albums = cache.load(source)
+
+    # Then the albums should be identical to the saved ones
+    assert snapshot_path(source).exists()
+    assert albums == enriched_albums
+    assert [album.model_fields_set for album in albums] == [album.model_fields_set for album in enriched_albums]
+
+
+def test_load_should_return_none_when_source_content_changed(cache, source, enriched_albums):
+    # Given a snapshot of the source file
+    cache.save(source, enriched_albums)
+    stat = source.stat()
+
+    # When the source file content changes while keeping its size and modification time
+    content = source.read_text()
+    source.write_text(content.replace("Rock", "Folk"))
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    # Then the snapshot should not be used
+    assert cache.load(source) is None
+
+
+def test_load_should_return_none_when_source_was_touched(cache, source, enriched_albums):
+    cache.save(source, enriched_albums)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.load(source) is None
+
+
+def test_load_should_return_none_when_snapshot_is_corrupted(cache, source, enriched_albums):
+    cache.save(source, enriched_albums)
+    snapshot_path(source).write_bytes(b"not a snapshot")
+
+    assert cache.load(source) is None
+
+
+def test_load_albums_should_use_snapshot_on_warm_load(source, enriched_albums, cache):
+    # Given a cold load that writes the snapshot
+    reader = LocalFileJSONReader()
+    cold_albums = LoadAlbums(reader, cache=cache).load_albums(source)
+
+    # When loading again with a reader that must not be called
+    class FailingReader:
+        def read(self, path):
+            raise AssertionError("source file should not be parsed again")
+
+    warm_albums = LoadAlbums(FailingReader(), cache=cache).load_albums(source)
+
+    # Then the albums should come from the snapshot
+    assert warm_albums == cold_albums == reader.read(source)
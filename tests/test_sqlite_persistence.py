@@ -1,11 +1,16 @@
 import pytest
+from sqlalchemy import event, text
 from sqlalchemy.orm import sessionmaker
+from sqlmodel import create_engine
 
+from localllm.domain.multimedia import Album, Track
+from localllm.infra.spi.persistence.repository import databases
 from localllm.infra.spi.persistence.repository.databases import (
     AlbumNotFoundError,
     AlbumSaveError,
     DatabaseAlbumPersistence,
 )
+from localllm.infra.spi.persistence.repository.migrations import MIGRATIONS, migrate, schema_version
 from localllm.infra.spi.persistence.repository.models import AlbumEntity, TrackEntity
 
 TEST_DATABASE_URL = "sqlite:///:memory:"  # In-memory database for testing
@@ -32,9 +37,6 @@ def prepare_database(repository, albums):
                 title=album.title,
                 artist=album.artist,
                 year=album.year,
-                genres=album.genres,
-                styles=album.styles,
-                labels=album.labels,
                 country=album.country,
                 tracklist=[
                     TrackEntity(
@@ -75,20 +77,26 @@ def test_create_album_with_album_domain_model_should_save_it_in_database(reposit
         assert saved_album.title == "Paint in the Sky"
         assert saved_album.artist == "Artist Name"
         assert saved_album.year == 2021
-        assert saved_album.genres == '["Rock", "Pop"]'
-        assert saved_album.styles == '["Indie", "Alternative"]'
-        assert saved_album.labels == '["Label 1", "Label 2"]'
+        assert saved_album.genres_list == ["Rock", "Pop"]
+        assert saved_album.styles_list == ["Indie", "Alternative"]
+        assert saved_album.labels_list == ["Label 1", "Label 2"]
         assert saved_album.country == "US"
         assert saved_album.credits == "Producer Name"
         assert saved_album.external_urls == '{"spotify": "https://open.spotify.com/album/1234"}'
         assert saved_album.external_ids == '{"spotify": "1234"}'
 
 
-def test_create_album_with_already_exist_album_should_raise_error(repository, prepare_database, album):
-    # Given an album to save
+def test_create_album_with_already_exist_album_should_replace_it(repository, prepare_database, enriched_album):
+    # Given a new version of a stored album
+    updated_album = enriched_album.model_copy(update={"album_id": "1234", "title": "Paint in the Sky (Remaster)"})
+
     # When saving the album
-    with pytest.raises(AlbumSaveError):
-        repository.add_album(album)
+    album_id, _ = repository.add_album(updated_album)
+
+    # Then the stored album should be replaced, keeping its database ID
+    assert repository.get_number_albums() == 3
+    assert repository.get_album_by_id("1234") == updated_album
+    assert repository.add_album(updated_album)[0] == album_id
 
 
 def test_get_number_albums_should_return_0_when_database_is_empty(repository):
@@ -130,6 +138,19 @@ def test_get_albums_should_return_all_albums(repository, prepare_database):
     assert albums[2].title == "Echoes of the Forest"
 
 
+def test_iter_albums_should_stream_albums_by_batches(repository, prepare_database, enriched_album):
+    # Given an iteration over the stored albums, by batches smaller than the number of albums
+    albums = repository.iter_albums(batch_size=2)
+    first_album = next(albums)
+
+    # When an album is stored while iterating
+    repository.add_album(enriched_album.model_copy(update={"album_id": "4321"}))
+
+    # Then the next batches should be read from where the previous one ended, including the new album
+    assert [first_album.album_id] + [album.album_id for album in albums] == ["1234", "5678", "9876", "4321"]
+    assert list(repository.iter_albums(batch_size=3)) == repository.get_albums()
+
+
 def test_get_albums_by_id_should_return_album_when_id_exists_in_database(repository, prepare_database):
     # Given multiple albums to save
     # When retrieving album id
@@ -233,3 +254,335 @@ def test_search_albums_by_year_should_return_no_albums_when_albums_does_not_exis
     assert albums is not None
     assert isinstance(albums, list)
     assert len(albums) == 0
+
+
+def test_update_album_should_replace_album_metadata(repository, prepare_database, enriched_album):
+    # Given an enriched version of a stored album
+    updated_album = enriched_album.model_copy(update={"album_id": "1234"})
+
+    # When updating the album
+    result = repository.update_album("1234", updated_album)
+
+    # Then the stored album should hold the enriched metadata
+    assert result == repository.get_album_by_id("1234")
+    assert result.genres == updated_album.genres
+    assert [track.title for track in result.tracklist] == [track.title for track in updated_album.tracklist]
+
+
+def test_update_album_should_return_none_when_album_does_not_exist(repository, enriched_album):
+    assert repository.update_album("unknown", enriched_album) is None
+
+
+def test_add_albums_should_save_albums_and_tracks_in_batches(repository, enriched_album):
+    # Given more albums than a batch, with their tracks
+    albums = [enriched_album.model_copy(update={"album_id": str(i)}) for i in range(5)]
+
+    # When saving them in batches of 2
+    saved = repository.add_albums(albums, batch_size=2)
+
+    # Then every album should be saved with its own tracks
+    assert saved == 5
+    assert repository.get_albums() == albums
+
+
+def test_add_albums_should_save_nothing_when_an_album_cannot_be_saved(repository, prepare_database, albums, album):
+    # Given a batch whose last album has no title
+    new_albums = [album.model_copy(update={"album_id": f"new_{i}"}) for i in range(3)]
+    new_albums.append(album.model_copy(update={"album_id": "new_3", "title": None}))
+
+    # When saving the batch
+    with pytest.raises(AlbumSaveError):
+        repository.add_albums(new_albums, batch_size=2)
+
+    # Then none of the new albums should be saved
+    assert repository.get_number_albums() == len(albums)
+
+
+def test_add_albums_should_keep_the_last_version_of_an_album_repeated_in_a_batch(repository, enriched_album):
+    # Given a batch holding two versions of the same album, with their tracks and tags
+    albums = [enriched_album, enriched_album.model_copy(update={"title": "T2"})]
+
+    # When saving the batch
+    saved = repository.add_albums(albums)
+
+    # Then only the last version should be saved, with its tracks once
+    assert saved == 1
+    assert repository.get_albums() == [albums[1]]
+
+
+def test_add_albums_should_write_nothing_when_catalog_is_unchanged(repository, enriched_album):
+    # Given a stored catalog
+    albums = [enriched_album.model_copy(update={"album_id": str(i)}) for i in range(5)]
+    repository.add_albums(albums, batch_size=2)
+    with sessionmaker(repository._engine)() as session:
+        updates = [album.updated_at for album in session.query(AlbumEntity).order_by(AlbumEntity.id)]
+
+    # When storing the catalog again, with one album changed
+    albums[3] = albums[3].model_copy(update={"tracklist": albums[3].tracklist[:1]})
+    saved = repository.add_albums(albums, batch_size=2)
+
+    # Then only the changed album should be written, along with its tracks
+    assert saved == 1
+    assert repository.add_albums(albums) == 0
+    assert repository.get_albums() == albums
+    with sessionmaker(repository._engine)() as session:
+        entities = session.query(AlbumEntity).order_by(AlbumEntity.id).all()
+        changed = [entity.album_id for entity, at in zip(entities, updates, strict=True) if entity.updated_at != at]
+    assert changed == ["3"]
+
+
+def test_initialize_should_keep_stored_albums(tmp_path, enriched_album):
+    # Given an album stored in a database file
+    url = f"sqlite:///{tmp_path / 'albums.db'}"
+    repository = DatabaseAlbumPersistence(db_url=url)
+    repository.initialize()
+    repository.add_album(enriched_album)
+
+    # When initializing the database again
+    repository = DatabaseAlbumPersistence(db_url=url)
+    repository.initialize()
+
+    # Then the album should still be stored, with the schema at its last version
+    assert repository.get_albums() == [enriched_album]
+    with repository._engine.connect() as connection:
+        assert schema_version(connection) == MIGRATIONS[-1].version
+
+
+def test_initialize_should_migrate_a_database_created_before_schema_versions(tmp_path, enriched_album):
+    # Given a database created without schema versions, holding genres as JSON
+    url = f"sqlite:///{tmp_path / 'albums.db'}"
+    engine = create_engine(url)
+    migrate(engine, MIGRATIONS[:1])
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE schema_version"))
+        connection.execute(
+            text(
+                "INSERT INTO album (album_id, title, artist, year, genres, styles, labels, external_urls, "
+                "external_ids, created_at, updated_at) "
+                "VALUES ('legacy', 'Le Cimetière des arlequins', 'Ange', 1973, '[\"Rock\"]', "
+                "'[\"Prog Rock\", \"Symphonic Rock\"]', '[]', '{}', '{}', "
+                "'2024-01-01 00:00:00', '2024-01-01 00:00:00')"
+            )
+        )
+    engine.dispose()
+
+    # When initializing the database
+    repository = DatabaseAlbumPersistence(db_url=url)
+    repository.initialize()
+
+    # Then stored albums should keep their tags and be searchable, and new ones saved with their content hash
+    legacy_album = repository.get_album_by_id("legacy")
+    assert (legacy_album.genres, legacy_album.styles) == (["Rock"], ["Prog Rock", "Symphonic Rock"])
+    assert [album.album_id for album in repository.search_albums("cimetiere")] == ["legacy"]
+    assert [album.album_id for album in repository.search_albums("style:symphonic")] == ["legacy"]
+    assert repository.get_facets()["styles"] == {"Prog Rock": 1, "Symphonic Rock": 1}
+    assert repository.add_albums([enriched_album]) == 1
+    assert repository.add_albums([enriched_album]) == 0
+
+
+def test_repository_should_apply_sqlite_pragmas_on_every_connection(tmp_path):
+    # Given a repository on a database file, with a custom cache size
+    repository = DatabaseAlbumPersistence(
+        db_url=f"sqlite:///{tmp_path / 'albums.db'}", sqlite_pragmas={"journal_mode": "wal", "cache_size": -1024}
+    )
+
+    # When opening connections
+    with repository._engine.connect() as first, repository._engine.connect() as second:
+        # Then each of them should use the pragmas
+        for connection in (first, second):
+            assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert connection.execute(text("PRAGMA cache_size")).scalar() == -1024
+    assert repository._engine.pool.size() == 5
+
+
+@pytest.fixture()
+def french_albums():
+    return [
+        Album(
+            album_id="ange",
+            title="Émile Jacotey",
+            artist="Ange",
+            year=1975,
+            genres=["Rock"],
+            styles=["Prog Rock"],
+            tracklist=[Track(position=1, title="Bêle, bêle petit chat", duration=245)],
+        ),
+        Album(
+            album_id="harmonium",
+            title="L'Heptade",
+            artist="Harmonium",
+            year=1976,
+            genres=["Rock", "Folk"],
+            tracklist=[Track(position=1, title="Comme un fou", duration=600)],
+        ),
+        Album(
+            album_id="mona",
+            title="Les Années Folles",
+            artist="Mona Lisa",
+            year=1976,
+            genres=["Rock"],
+            tracklist=[Track(position=1, title="Émile", duration=300)],
+        ),
+    ]
+
+
+def test_search_albums_should_fold_accents_and_rank_title_matches_first(repository, french_albums):
+    # Given albums with accented titles, one of them having a track named like the title of another
+    repository.add_albums(french_albums)
+
+    # When searching without accents
+    albums = repository.search_albums("emile", top_k=5)
+
+    # Then the album titled so should come before the album with such a track
+    assert [album.album_id for album in albums] == ["ange", "mona"]
+
+
+def test_search_albums_should_search_qualified_fields_only_in_their_column(repository, french_albums):
+    repository.add_albums(french_albums)
+
+    assert [album.album_id for album in repository.search_albums("title:emile")] == ["ange"]
+    assert [album.album_id for album in repository.search_albums("track:emile")] == ["mona"]
+    assert [album.album_id for album in repository.search_albums("artist:mona title:annees")] == ["mona"]
+    assert [album.album_id for album in repository.search_albums("genre:folk year:1976")] == ["harmonium"]
+    assert repository.search_albums("artist:ange year:1976") == []
+    assert repository.search_albums('"') == []
+
+
+def test_search_albums_should_find_albums_by_their_updated_tracks(repository, french_albums):
+    # Given a stored album
+    repository.add_albums(french_albums)
+    heptade = french_albums[1]
+
+    # When replacing its tracks
+    tracklist = [Track(position=1, title="Lumière", duration=300)]
+    repository.update_album(heptade.album_id, heptade.model_copy(update={"tracklist": tracklist}))
+
+    # Then the album should be found by its new tracks only
+    assert [album.album_id for album in repository.search_albums("track:lumiere")] == ["harmonium"]
+    assert repository.search_albums("track:fou") == []
+
+
+def test_search_albums_should_leave_out_the_words_most_albums_hold(repository, french_albums, monkeypatch):
+    # Given albums all of the Rock genre, once words held by more than one album are common
+    monkeypatch.setattr(databases, "COMMON_TERM_MIN_ALBUMS", 1)
+    repository.add_albums(french_albums)
+
+    # When searching a common word along with a rarer one
+    # Then only the rarer word should be searched, unless all the words searched are common
+    assert [album.album_id for album in repository.search_albums("rock heptade")] == ["harmonium"]
+    assert {album.album_id for album in repository.search_albums("rock", top_k=5)} == {"ange", "harmonium", "mona"}
+
+    # And words should be counted again once albums are written, both words searched once both are common
+    repository.add_albums([french_albums[1].model_copy(update={"album_id": "heptade", "genres": ["Jazz"]})])
+    assert [album.album_id for album in repository.search_albums("rock heptade")] == ["harmonium"]
+
+
+def test_search_albums_by_metadata_should_match_all_criteria(repository, french_albums):
+    # Given albums with genres, styles and years
+    repository.add_albums(french_albums)
+
+    # When searching them by metadata
+    def search(**metadata):
+        return [album.album_id for album in repository.search_albums_by_metadata(metadata, top_k=5)]
+
+    # Then albums should match every criterion
+    assert search(genres="Rock") == ["ange", "harmonium", "mona"]
+    assert search(genres=["Rock", "Folk"]) == ["harmonium"]
+    assert search(genres="Rock", styles="Prog Rock", year=(1970, 1975)) == ["ange"]
+    assert search(genres="Rock", year=(1976, None)) == ["harmonium", "mona"]
+    assert search(artist="Mona Lisa", year=1976) == ["mona"]
+    assert search(genres="Jazz") == []
+
+
+def test_search_albums_by_metadata_should_reject_unknown_criteria(repository):
+    with pytest.raises(ValueError, match="Unknown album metadata: rating"):
+        repository.search_albums_by_metadata({"rating": 5})
+
+
+def test_update_album_should_replace_its_tags(repository, french_albums):
+    repository.add_albums(french_albums)
+
+    repository.update_album("mona", french_albums[2].model_copy(update={"genres": ["Pop"], "labels": ["Arcane"]}))
+
+    assert repository.search_albums_by_metadata({"genres": "Rock"}, top_k=5) == french_albums[:2]
+    assert repository.get_album_by_id("mona").labels == ["Arcane"]
+    assert [album.album_id for album in repository.search_albums("label:arcane")] == ["mona"]
+
+
+def test_get_facets_should_count_albums_as_they_are_written(repository, french_albums):
+    # Given albums stored in bulk
+    repository.add_albums(french_albums)
+
+    # When one album is updated and another one stored again with other tags, decade and country
+    repository.update_album("mona", french_albums[2].model_copy(update={"genres": ["Pop"], "year": 1981}))
+    repository.add_album(french_albums[1].model_copy(update={"styles": ["Prog Rock"], "country": "Canada"}))
+
+    # Then the counts should follow every change
+    facets = repository.get_facets()
+    assert facets == {
+        "genres": {"Rock": 2, "Folk": 1, "Pop": 1},
+        "styles": {"Prog Rock": 2},
+        "labels": {},
+        "decades": {"1970s": 2, "1980s": 1},
+        "countries": {"Canada": 1},
+    }
+    # And they should be the ones counted from the albums themselves
+    assert repository.get_facets({"year": (None, None)}) == facets
+
+
+def test_get_facets_should_count_albums_matching_criteria_only(repository, french_albums):
+    repository.add_albums(french_albums)
+
+    assert repository.get_facets({"genres": "Rock", "year": 1976}) == {
+        "genres": {"Rock": 2, "Folk": 1},
+        "styles": {},
+        "labels": {},
+        "decades": {"1970s": 2},
+        "countries": {},
+    }
+    assert repository.get_facets({"genres": "Jazz"})["genres"] == {}
+
+
+def count_statements(repository, method):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(repository._engine, "before_cursor_execute", listener)
+    try:
+        method()
+    finally:
+        event.remove(repository._engine, "before_cursor_execute", listener)
+    return len(statements)
+
+
+@pytest.mark.parametrize("number_albums", [1, 10, 50])
+def test_listing_albums_should_take_the_same_number_of_statements_whatever_their_number(number_albums, enriched_album):
+    # Given albums with tracklists
+    repository = DatabaseAlbumPersistence(db_url=TEST_DATABASE_URL)
+    repository.initialize()
+    album = enriched_album
+    repository.add_albums([album.model_copy(update={"album_id": str(i)}) for i in range(number_albums)])
+
+    repository.search_albums("paint")
+
+    # When listing, searching and looking them up
+    # Then albums, tracks and tags should each be read by a single statement, after the tags or the best matches
+    # searched if any
+    assert count_statements(repository, repository.get_albums) == 3
+    assert count_statements(repository, lambda: repository.search_albums("paint", top_k=number_albums)) == 4
+    assert count_statements(repository, lambda: repository.search_albums_by_metadata({"genres": "Rock"}, 50)) == 4
+    # And the tracks of an album looked up alone should be read along with it
+    assert count_statements(repository, lambda: repository.get_album_by_id("0")) == 2
+    assert repository.get_album_by_id("0").tracklist == album.tracklist
+
+
+def test_listing_albums_should_read_tracks_album_by_album_when_loaded_lazily(enriched_album):
+    repository = DatabaseAlbumPersistence(db_url=TEST_DATABASE_URL, list_loading="lazy")
+    repository.initialize()
+    repository.add_albums([enriched_album.model_copy(update={"album_id": str(i)}) for i in range(10)])
+
+    assert count_statements(repository, repository.get_albums) == 12
+
+
+def test_repository_should_reject_unknown_loading_strategies():
+    with pytest.raises(ValueError, match="Unknown loading strategy: eager"):
+        DatabaseAlbumPersistence(db_url=TEST_DATABASE_URL, single_loading="eager")
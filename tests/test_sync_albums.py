@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+
+from localllm.application.use_cases.enrich_albums import EnrichAlbums
+from localllm.application.use_cases.sync_albums import SyncAlbums
+from localllm.domain.multimedia import Album
+from localllm.infra.spi.persistence.file.checkpoints import JSONLAlbumCheckpoint
+
+
+class SlowEnricher:
+    name = "discogs"
+
+    def __init__(self, events: list):
+        self.events = events
+
+    async def get_album_metadata(self, artist: str, album: str, external_ids: dict | None = None) -> Album | None:
+        await asyncio.sleep(0.02)
+        self.events.append(("enriched", album))
+        return Album(album_id="discogs_1", title=album, artist=artist, year=2000, genres=["Rock"])
+
+
+class RecordingStage:
+    """Blocking store or index use case recording the albums it processed."""
+
+    def __init__(self, name: str, events: list, failing: set[str] | None = None):
+        self.name = name
+        self.events = events
+        self.failing = failing or set()
+        self.albums = []
+
+    def process(self, album: Album) -> Album:
+        time.sleep(0.005)
+        if album.album_id in self.failing:
+            raise RuntimeError("disk full")
+        self.albums.append(album)
+        self.events.append((self.name, album.title))
+        return album
+
+    store_album = index_album = update_album = process
+
+
+@pytest.fixture()
+def catalog():
+    return [Album(album_id=str(i), title=f"Album {i}", artist="Artist Name", year=2000) for i in range(12)]
+
+
+@pytest.fixture()
+def events():
+    return []
+
+
+@pytest.mark.asyncio
+async def test_sync_albums_should_index_albums_while_others_are_enriched(catalog, events):
+    # Given a pipeline with a slow enrichment
+    store, index = RecordingStage("stored", events), RecordingStage("indexed", events)
+    use_case = SyncAlbums(EnrichAlbums([SlowEnricher(events)], workers=2), store, index, queue_size=2)
+
+    # When synchronizing albums
+    stages = await use_case.sync_albums(catalog)
+
+    # Then every album should go through each stage in order
+    assert [album.album_id for album in store.albums] == [album.album_id for album in catalog]
+    assert [album.album_id for album in index.albums] == [album.album_id for album in catalog]
+    assert index.albums[0].genres == ["Rock"]
+    # And the first album should be indexed before the last one is enriched
+    assert events.index(("indexed", "Album 0")) < events.index(("enriched", "Album 11"))
+    assert [(stage.name, stage.processed, stage.failed) for stage in stages] == [
+        ("load", 12, 0),
+        ("enrich", 12, 0),
+        ("store", 12, 0),
+        ("index", 12, 0),
+    ]
+    assert all(stage.throughput > 0 for stage in stages)
+
+
+@pytest.mark.asyncio
+async def test_sync_albums_should_index_albums_that_failed_to_be_stored(catalog, events):
+    store, index = RecordingStage("stored", events, failing={"3"}), RecordingStage("indexed", events)
+    use_case = SyncAlbums(EnrichAlbums([SlowEnricher(events)]), store, index)
+
+    stages = await use_case.sync_albums(catalog, enrich=False)
+
+    assert [stage.name for stage in stages] == ["load", "store", "index"]
+    assert (stages[1].processed, stages[1].failed) == (11, 1)
+    assert len(index.albums) == 12
+    assert not [event for event in events if event[0] == "enriched"]
+
+
+@pytest.mark.asyncio
+async def test_sync_albums_should_accept_asynchronous_streams(catalog, events):
+    async def stream():
+        for album in catalog:
+            yield album
+
+    index = RecordingStage("indexed", events)
+    use_case = SyncAlbums(EnrichAlbums([SlowEnricher(events)]), RecordingStage("stored", events), index)
+
+    await use_case.sync_albums(stream())
+
+    assert len(index.albums) == 12
+
+
+@pytest.mark.asyncio
+async def test_sync_albums_should_update_albums_patched_after_their_deadline(catalog, events):
+    # Given an enrichment always missing the deadline
+    store, index = RecordingStage("stored", events), RecordingStage("indexed", events)
+    use_case = SyncAlbums(EnrichAlbums([SlowEnricher(events)], deadline=0.005), store, index)
+
+    # When synchronizing albums
+    stages = await use_case.sync_albums(catalog)
+
+    # Then albums should be stored and indexed right away, then again once patched
+    assert [album.genres for album in store.albums[: len(catalog)]] == [[]] * len(catalog)
+    assert [album.genres for album in index.albums[len(catalog) :]] == [["Rock"]] * len(catalog)
+    assert [(stage.name, stage.processed, stage.backfilled) for stage in stages] == [
+        ("load", 12, 0),
+        ("enrich", 12, 12),
+        ("store", 12, 12),
+        ("index", 12, 12),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sync_albums_should_keep_the_enrichment_checkpoint(catalog, events, tmp_path):
+    # Given an enrichment checkpoint holding the albums of an interrupted run
+    checkpoint = JSONLAlbumCheckpoint(tmp_path / "enriched_albums.jsonl")
+    for album in catalog[:3]:
+        checkpoint.append(album)
+    checkpoint.close()
+    enrich_albums = EnrichAlbums([SlowEnricher(events)], checkpoint=checkpoint)
+    use_case = SyncAlbums(enrich_albums, RecordingStage("stored", events), RecordingStage("indexed", events))
+
+    # When synchronizing albums
+    await use_case.sync_albums(catalog)
+
+    # Then the checkpoint should still hold the albums of the interrupted run
+    assert [album.album_id for album in checkpoint.iter_albums()] == ["0", "1", "2"]